@@ -1,10 +1,9 @@
 from django.contrib import admin, messages
 from .models import Message, TrainingPhrase, SmalltalkPair
-from .services import Assistant
 
 @admin.register(Message)
 class MessageAdmin(admin.ModelAdmin):
-    list_display = ("id", "sender", "text", "created_at")
+    list_display = ("id", "conversation", "sender", "text", "created_at")
     list_filter = ("sender",)
     search_fields = ("text",)
 
@@ -14,19 +13,24 @@ class TrainingPhraseAdmin(admin.ModelAdmin):
     list_filter = ("label",)
     search_fields = ("text",)
 
-    actions = ("retrain_intents",)
+    actions = ("retrain_intents", "rebuild_intents")
 
-    def retrain_intents(self, request, queryset):
+    def _train(self, request, full: bool):
         try:
             # Use the same assistant instance as the chat view if available
-            from . import views as chat_views
-            if getattr(chat_views, "assistant", None) is None:
-                chat_views.assistant = Assistant()
-            msg = chat_views.assistant.router.train()
+            from .views import get_assistant
+            msg = get_assistant().router.train(full=full)
             messages.success(request, f"Intents retrained: {msg}")
         except Exception as e:
             messages.error(request, f"Retrain failed: {e}")
-    retrain_intents.short_description = "Retrain intents (TF‑IDF + Logistic Regression)"
+
+    def retrain_intents(self, request, queryset):
+        self._train(request, full=False)
+    retrain_intents.short_description = "Retrain intents (new phrases only in incremental mode)"
+
+    def rebuild_intents(self, request, queryset):
+        self._train(request, full=True)
+    rebuild_intents.short_description = "Rebuild intents from scratch"
 
 
 @admin.register(SmalltalkPair)
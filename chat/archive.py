@@ -0,0 +1,142 @@
+"""Retention for the chat ``Message`` table.
+
+Messages older than ``CHAT_RETENTION_DAYS`` are appended to one compressed
+JSONL file per month under ``CHAT_ARCHIVE_DIR`` (zstd when the ``zstandard``
+package is installed, gzip otherwise) and then deleted, chunk by chunk, in
+``(created_at, id)`` order along the ``created_at`` index. Rows are deleted
+only after their chunk is on disk, so an interrupted run at worst archives a
+chunk twice. Both formats allow appending further compressed frames, and
+``read_month`` reads all of them back.
+"""
+from __future__ import annotations
+import gzip
+import json
+import os
+import re
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import IO, Any, Dict, Iterator, List, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.timezone import now
+
+from .models import Message
+
+try:
+    import zstandard
+except ImportError:  # gzip is always available
+    zstandard = None
+
+MONTH = re.compile(r"^messages-(\d{4}-\d{2})\.jsonl\.(gz|zst)$")
+CONTENT_TYPES = {"gz": "application/gzip", "zst": "application/zstd"}
+
+
+def archive_dir() -> Path:
+    return Path(getattr(settings, "CHAT_ARCHIVE_DIR", Path(settings.BASE_DIR) / "var" / "archive" / "messages"))
+
+
+def _ext() -> str:
+    return "zst" if zstandard is not None else "gz"
+
+
+def month_path(month: str, ext: Optional[str] = None) -> Path:
+    return archive_dir() / f"messages-{month}.jsonl.{ext or _ext()}"
+
+
+def months() -> Dict[str, Path]:
+    """Archived months (``YYYY-MM``) and their files, oldest first."""
+    found: Dict[str, Path] = {}
+    if archive_dir().is_dir():
+        for p in sorted(archive_dir().iterdir()):
+            m = MONTH.match(p.name)
+            if m:
+                found[m.group(1)] = p
+    return found
+
+
+def _default(value: Any) -> Any:
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+
+def _append(path: Path, lines: List[bytes]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    data = b"".join(lines)
+    with open(path, "ab") as fh:
+        # Each call adds a complete frame/member; readers decode them back to back.
+        if path.suffix == ".zst":
+            fh.write(zstandard.ZstdCompressor(level=10).compress(data))
+        else:
+            fh.write(gzip.compress(data, compresslevel=6))
+        fh.flush()
+        os.fsync(fh.fileno())
+
+
+def _open(path: Path) -> IO[bytes]:
+    if path.suffix == ".zst":
+        if zstandard is None:
+            raise RuntimeError(f"{path.name} needs the 'zstandard' package")
+        return zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), read_across_frames=True, closefd=True)
+    return gzip.open(path, "rb")
+
+
+def read_month(month: str) -> Iterator[Dict[str, Any]]:
+    path = months().get(month)
+    if path is None:
+        return
+    rest = b""
+    for chunk in iter_raw(path):
+        lines = (rest + chunk).split(b"\n")
+        rest = lines.pop()
+        for line in lines:
+            if line.strip():
+                yield json.loads(line)
+    if rest.strip():
+        yield json.loads(rest)
+
+
+def iter_raw(path: Path, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    """Decompressed JSONL of an archive file, in chunks (for streaming responses)."""
+    with _open(path) as fh:
+        while True:
+            chunk = fh.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+
+def cutoff(days: Optional[int] = None) -> Optional[datetime]:
+    days = int(getattr(settings, "CHAT_RETENTION_DAYS", 0)) if days is None else days
+    return now() - timedelta(days=days) if days > 0 else None
+
+
+def archive_messages(before: Optional[datetime] = None, chunk_size: int = 1000, dry_run: bool = False) -> Dict[str, int]:
+    """Move messages created before ``before`` into the monthly archive files."""
+    before = before or cutoff()
+    if before is None:
+        return {}
+    counts: Dict[str, int] = {}
+    qs = Message.objects.filter(created_at__lt=before).order_by("created_at", "id")
+    if dry_run:
+        for created in qs.values_list("created_at", flat=True).iterator(chunk_size=chunk_size):
+            key = created.strftime("%Y-%m")
+            counts[key] = counts.get(key, 0) + 1
+        return counts
+    while True:
+        rows = list(qs.values()[:chunk_size])
+        if not rows:
+            return counts
+        by_month: Dict[str, List[bytes]] = {}
+        for row in rows:
+            line = json.dumps(row, default=_default, ensure_ascii=False) + "\n"
+            by_month.setdefault(row["created_at"].strftime("%Y-%m"), []).append(line.encode("utf-8"))
+        existing = months()
+        for month, lines in by_month.items():
+            # Keep appending to a month's existing file even if the codec changed since.
+            path = existing.get(month) or month_path(month)
+            _append(path, lines)
+            counts[month] = counts.get(month, 0) + len(lines)
+        with transaction.atomic():
+            Message.objects.filter(id__in=[r["id"] for r in rows]).delete()
@@ -0,0 +1,380 @@
+"""Benchmarks and accuracy checks for the assistant's hot paths.
+
+Run through ``python manage.py benchmark``; every section returns plain
+JSON-serialisable dicts so results can be stored and diffed between runs.
+"""
+from __future__ import annotations
+import gc
+import math
+import os
+import platform
+import re
+import statistics
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from django.utils.timezone import get_current_timezone, make_aware, now, is_naive
+
+from . import ml
+from .services import parse_datetime, route_label, rule_label
+
+# Phrasings seen in chat for tasks/reminders, plus a few that contain no date at all.
+DATE_CORPUS: List[str] = [
+    "remind me in 10 minutes to stretch",
+    "remind me in 1 hour to check the oven",
+    "add task call alice in 2 hours",
+    "add task renew passport in 3 weeks",
+    "remind me in 45 seconds to breathe",
+    "add task water plants in 2 days",
+    "add task buy milk tomorrow",
+    "add task buy milk tomorrow at 09:00",
+    "remind me tomorrow at 9am to call mom",
+    "remind me tomorrow at 7:30pm to take out the trash",
+    "remind me tomorrow at 9 to call mom",
+    "add task pay rent today at 18:00",
+    "remind me today at 6pm to leave",
+    "remind me today at 23:59:30 to sleep",
+    "add task dentist on 2025-08-25",
+    "add task dentist on 2025-08-25 at 14:00",
+    "add task dentist on 2025-08-25 at 2:15pm",
+    "add task submit report 2025-09-01",
+    "add task submit report 2025-09-01 17:30",
+    "add task submit report 2025-09-01 5pm",
+    "add task plan the trip on 2025-10-10 in 2 days",
+    "add task buy milk",
+    "remind me to stretch",
+    "add task read chapter 3 of the book about 2025 goals",
+]
+
+# Expected parses relative to DATE_BASE: (text, local due time or None, remainder).
+# Remainders are compared with whitespace collapsed.
+DATE_BASE = (2025, 8, 20, 10, 0)
+DATE_CASES: List[Tuple[str, Optional[str], str]] = [
+    ("remind me in 10 minutes to stretch", "2025-08-20 10:10:00", "remind me to stretch"),
+    ("add task call alice in 2 hours", "2025-08-20 12:00:00", "add task call alice"),
+    ("add task renew passport in 3 weeks", "2025-09-10 10:00:00", "add task renew passport"),
+    ("remind me in 45 seconds to breathe", "2025-08-20 10:00:45", "remind me to breathe"),
+    ("in 90 minutes call bob", "2025-08-20 11:30:00", "call bob"),
+    ("add task buy milk tomorrow", "2025-08-21 09:00:00", "add task buy milk"),
+    ("add task buy milk tomorrow at 09:00", "2025-08-21 09:00:00", "add task buy milk"),
+    ("remind me tomorrow at 7:30pm to take out the trash", "2025-08-21 19:30:00", "remind me to take out the trash"),
+    ("remind me tomorrow at 9 to call mom", "2025-08-21 09:00:00", "remind me to call mom"),
+    ("tomorrow at 12am", "2025-08-21 00:00:00", ""),
+    ("today at 12pm lunch", "2025-08-20 12:00:00", "lunch"),
+    ("remind me today at 23:59:30 to sleep", "2025-08-20 23:59:30", "remind me to sleep"),
+    ("add task dentist on 2025-08-25", "2025-08-25 09:00:00", "add task dentist"),
+    ("add task dentist on 2025-08-25 at 2:15pm", "2025-08-25 14:15:00", "add task dentist"),
+    ("add task submit report 2025-09-01 17:30", "2025-09-01 17:30:00", "add task submit report"),
+    ("add task submit report 2025-09-01 5pm", "2025-09-01 17:00:00", "add task submit report"),
+    ("on 2025-12-31 at 23:59 party", "2025-12-31 23:59:00", "party"),
+    ("add task plan the trip on 2025-10-10 in 2 days", "2025-08-22 10:00:00", "add task plan the trip on 2025-10-10"),
+    # Examples advertised in DOCS.md and on the import page
+    ("tomorrow at 9", "2025-08-21 09:00:00", ""),
+    ("in 2 hours", "2025-08-20 12:00:00", ""),
+    ("today at 18:00", "2025-08-20 18:00:00", ""),
+    ("add task call bob today at 18", "2025-08-20 18:00:00", "add task call bob"),
+    ("on 2025-08-25 14:00", "2025-08-25 14:00:00", ""),
+    ("add task read chapter 3 tomorrow at 123", "2025-08-21 09:00:00", "add task read chapter 3 at 123"),
+    ("add task pay rent on 2025-02-30", None, "add task pay rent on 2025-02-30"),
+    ("remind me today at 25:00 to sleep", None, "remind me today at 25:00 to sleep"),
+    ("add task buy milk", None, "add task buy milk"),
+    ("add task read chapter 3 of the book about 2025 goals", None, "add task read chapter 3 of the book about 2025 goals"),
+]
+
+# Labeled utterances for every router label, worded differently from the seed phrases.
+ROUTING_CORPUS: List[Tuple[str, str]] = [
+    ("add task buy groceries", "tasks"),
+    ("add task call the plumber tomorrow", "tasks"),
+    ("new task: finish the quarterly report", "tasks"),
+    ("list my tasks", "tasks"),
+    ("show open tasks", "tasks"),
+    ("complete task 3", "tasks"),
+    ("mark task 12 as done", "tasks"),
+    ("add task renew passport in 3 weeks", "tasks"),
+    ("what tasks do i have", "tasks"),
+    ("todo: clean the garage", "tasks"),
+    ("note the wifi password is hunter2", "notes"),
+    ("note: parking spot B12", "notes"),
+    ("search notes for wifi", "notes"),
+    ("search notes recipes", "notes"),
+    ("list notes", "notes"),
+    ("show my notes", "notes"),
+    ("take a note that alice likes tea", "notes"),
+    ("find the note about the budget", "notes"),
+    ("remind me in 10 minutes to stretch", "reminders"),
+    ("remind me tomorrow at 9am to call mom", "reminders"),
+    ("remind me to drink water in 1 hour", "reminders"),
+    ("list reminders", "reminders"),
+    ("show my reminders", "reminders"),
+    ("cancel reminder 4", "reminders"),
+    ("set a reminder for the meeting", "reminders"),
+    ("remind me today at 6pm to leave", "reminders"),
+    ("add event team lunch on 2025-09-01 at 12:30", "events"),
+    ("add event dentist tomorrow at 15:00", "events"),
+    ("list events", "events"),
+    ("show upcoming events", "events"),
+    ("delete event 2", "events"),
+    ("what events are on my calendar", "events"),
+    ("schedule an event for friday", "events"),
+    ("what time is it", "time"),
+    ("what's the date today", "time"),
+    ("current time please", "time"),
+    ("which timezone are you in", "time"),
+    ("tell me the time", "time"),
+    ("what day is it", "time"),
+    ("hello", "smalltalk"),
+    ("hi there", "smalltalk"),
+    ("good morning", "smalltalk"),
+    ("how are you", "smalltalk"),
+    ("thanks a lot", "smalltalk"),
+    ("thank you", "smalltalk"),
+    ("bye for now", "smalltalk"),
+    ("hey", "smalltalk"),
+    ("about me", "profile"),
+    ("who am i", "profile"),
+    ("tell me about myself", "profile"),
+    ("show my profile", "profile"),
+    ("what do you know about me", "profile"),
+    ("what is my bio", "profile"),
+    ("my projects", "projects"),
+    ("show projects", "projects"),
+    ("what projects am i working on", "projects"),
+    ("list my projects", "projects"),
+    ("tell me about my current project", "projects"),
+    ("which projects are active", "projects"),
+    ("help", "help"),
+    ("what can you do", "help"),
+    ("how to use this", "help"),
+    ("show commands", "help"),
+    ("help me please", "help"),
+    ("examples", "help"),
+]
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile (``q`` in 0..100)."""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[max(0, min(len(ordered) - 1, math.ceil(q / 100 * len(ordered)) - 1))]
+
+
+def environment() -> Dict[str, Any]:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "sklearn_installed": ml.SKLEARN_OK,
+        "at": now().isoformat(),
+    }
+
+
+# --- reference implementation (pre single-pass parser), kept for comparison ---
+_TIME24 = r"(?P<h>\d{1,2}):(?P<m>\d{2})(?::(?P<s>\d{2}))?"
+_TIME12 = r"(?P<h>\d{1,2})(?::(?P<m>\d{2}))?\s?(?P<ampm>am|pm)"
+_DATE = r"(?P<y>\d{4})-(?P<mo>\d{2})-(?P<d>\d{2})"
+_TIME24_SIMPLE = r"\d{1,2}:\d{2}(?::\d{2})?"
+_TIME12_SIMPLE = r"\d{1,2}(?::\d{2})?\s?(?:am|pm)"
+
+def _legacy_parse_time_into(base: datetime, token: str) -> datetime:
+    token = token.strip().lower()
+    m = re.match(_TIME24 + r"$", token)
+    if m:
+        hh = int(m.group("h")); mm = int(m.group("m")); ss = int(m.group("s")) if m.group("s") else 0
+        return base.replace(hour=hh, minute=mm, second=ss, microsecond=0)
+    m = re.match(_TIME12 + r"$", token)
+    if m:
+        hh = int(m.group("h")); mm = int(m.group("m")) if m.group("m") else 0
+        if hh == 12: hh = 0
+        if m.group("ampm") == "pm": hh += 12
+        return base.replace(hour=hh, minute=mm, second=0, microsecond=0)
+    return base
+
+def legacy_parse_datetime(text: str, base: Optional[datetime] = None) -> tuple[Optional[datetime], str]:
+    tz = get_current_timezone()
+    base = base or now()
+    s = text.strip().lower()
+    def _aware(dt: datetime) -> datetime:
+        return make_aware(dt, tz) if is_naive(dt) else dt
+
+    m = re.search(r"\bin\s+(?P<n>\d+)\s+(?P<u>seconds?|minutes?|hours?|days?|weeks?)\b", s)
+    if m:
+        n = int(m.group("n")); u = m.group("u")
+        delta = dict(second=timedelta(seconds=n), seconds=timedelta(seconds=n),
+                     minute=timedelta(minutes=n), minutes=timedelta(minutes=n),
+                     hour=timedelta(hours=n), hours=timedelta(hours=n),
+                     day=timedelta(days=n), days=timedelta(days=n),
+                     week=timedelta(weeks=n), weeks=timedelta(weeks=n))[u]
+        when = base + delta
+        remainder = (s[: m.start()] + s[m.end():]).strip()
+        return _aware(when), remainder
+
+    m = re.search(r"\btomorrow(?:\s+at\s+(?P<t>" + _TIME24_SIMPLE + r"|" + _TIME12_SIMPLE + r"))?\b", s)
+    if m:
+        base2 = base + timedelta(days=1)
+        base2 = base2.replace(hour=9, minute=0, second=0, microsecond=0)
+        t = m.group("t")
+        when = _legacy_parse_time_into(base2, t) if t else base2
+        remainder = (s[: m.start()] + s[m.end():]).strip()
+        return _aware(when), remainder
+
+    m = re.search(r"\btoday\s+at\s+(?P<t>" + _TIME24_SIMPLE + r"|" + _TIME12_SIMPLE + r")\b", s)
+    if m:
+        when = _legacy_parse_time_into(base, m.group("t"))
+        if when <= base:
+            when += timedelta(days=1)
+        remainder = (s[: m.start()] + s[m.end():]).strip()
+        return _aware(when), remainder
+
+    m = re.search(r"\bon\s+" + _DATE + r"(?:\s+at\s+(?P<t>" + _TIME24_SIMPLE + r"|" + _TIME12_SIMPLE + r"))?\b", s)
+    if m:
+        y, mo, d = int(m.group("y")), int(m.group("mo")), int(m.group("d"))
+        base2 = base.replace(year=y, month=mo, day=d, hour=9, minute=0, second=0, microsecond=0)
+        t = m.group("t")
+        when = _legacy_parse_time_into(base2, t) if t else base2
+        remainder = (s[: m.start()] + s[m.end():]).strip()
+        return _aware(when), remainder
+
+    m = re.search(_DATE + r"(?:\s+" + _TIME24_SIMPLE + r")?", s)
+    if m:
+        y, mo, d = int(m.group("y")), int(m.group("mo")), int(m.group("d"))
+        base2 = base.replace(year=y, month=mo, day=d, hour=9, minute=0, second=0, microsecond=0)
+        when = base2
+        mm = re.match(r"^\s+(" + _TIME24_SIMPLE + r"|" + _TIME12_SIMPLE + r")\b", s[m.end():])
+        if mm:
+            when = _legacy_parse_time_into(when, mm.group(1))
+        remainder = (s[: m.start()] + s[m.end():]).strip()
+        return _aware(when), remainder
+
+    return None, s
+
+
+def _time_per_call(fn: Callable[[str, datetime], Any], corpus: List[str], base: datetime, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        for text in corpus:
+            fn(text, base)
+    return (time.perf_counter() - started) / (iterations * len(corpus))
+
+
+def bench_dates(iterations: int = 200, base: Optional[datetime] = None) -> Dict[str, Any]:
+    """Time ``parse_datetime`` against the reference parser over ``DATE_CORPUS``."""
+    base = base or now().replace(microsecond=0)
+    new = _time_per_call(parse_datetime, DATE_CORPUS, base, iterations)
+    old = _time_per_call(legacy_parse_datetime, DATE_CORPUS, base, iterations)
+    differences = []
+    for text in DATE_CORPUS:
+        a, b = parse_datetime(text, base), legacy_parse_datetime(text, base)
+        if a != b:
+            differences.append({"text": text, "parse_datetime": _fmt(a), "legacy": _fmt(b)})
+    return {
+        "phrasings": len(DATE_CORPUS),
+        "iterations": iterations,
+        "parse_datetime_us": round(new * 1e6, 2),
+        "legacy_us": round(old * 1e6, 2),
+        "speedup": round(old / new, 2) if new else None,
+        "differences": differences,
+    }
+
+
+def _fmt(result: tuple[Optional[datetime], str]) -> List[Optional[str]]:
+    when, remainder = result
+    return [when.isoformat() if when else None, remainder]
+
+
+def check_dates() -> Dict[str, Any]:
+    """``parse_datetime`` against the expected results in ``DATE_CASES``."""
+    base = make_aware(datetime(*DATE_BASE), get_current_timezone())
+    failures = []
+    for text, expected, remainder in DATE_CASES:
+        when, rest = parse_datetime(text, base)
+        got = when.astimezone(base.tzinfo).strftime("%Y-%m-%d %H:%M:%S") if when else None
+        if got != expected or " ".join(rest.split()) != remainder:
+            failures.append({"text": text, "expected": [expected, remainder], "got": [got, " ".join(rest.split())]})
+    return {
+        "cases": len(DATE_CASES),
+        "correct": len(DATE_CASES) - len(failures),
+        "accuracy": round(1 - len(failures) / len(DATE_CASES), 4),
+        "failures": failures,
+    }
+
+
+def _fit(backend: Any, X: List[str], y: List[str]) -> Tuple[Any, float, int, int]:
+    """Fit a fresh model; returns it with fit seconds, retained bytes and peak bytes."""
+    backend.new_model("full")  # pay for lazy imports outside the measurement
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    model = backend.new_model("full")
+    model.fit(X, y)
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return model, elapsed, retained, peak
+
+
+def bench_routing(backends: Optional[Sequence[str]] = None, iterations: int = 20) -> Dict[str, Any]:
+    """Accuracy, latency and memory of each router backend on ``ROUTING_CORPUS``.
+
+    ``model_accuracy`` is the bare model; ``routed_accuracy`` is what
+    ``Assistant.dispatch`` acts on (keyword rules below the threshold).
+    Latency is one uncached ``predict_proba`` call per utterance.
+    """
+    router = ml.IntentRouter()
+    X, y = router.collect_training()
+    texts = [ml.normalize_text(t) for t, _ in ROUTING_CORPUS]
+    expected = [label for _, label in ROUTING_CORPUS]
+    rules = [rule_label(t) for t in texts]
+    results: Dict[str, Any] = {
+        "utterances": len(texts),
+        "training_phrases": len(X),
+        "threshold": router.threshold,
+        "rules_only_accuracy": round(sum(r == e for r, e in zip(rules, expected)) / len(texts), 4),
+        "backends": {},
+    }
+    for name in backends or list(ml.BACKENDS):
+        backend = ml.BACKENDS[name]
+        if not backend.available():
+            results["backends"][name] = {"available": False}
+            continue
+        model, fit_s, retained, peak = _fit(backend, X, y)
+        labels, confs = [], []
+        for proba in model.predict_proba(texts):
+            idx = max(range(len(proba)), key=proba.__getitem__)
+            labels.append(str(model.classes_[idx]))
+            confs.append(float(proba[idx]))
+        routed = [route_label(t, lbl, c, router.threshold) for t, lbl, c in zip(texts, labels, confs)]
+        timings = []
+        for _ in range(iterations):
+            for t in texts:
+                started = time.perf_counter()
+                model.predict_proba([t])
+                timings.append(time.perf_counter() - started)
+        mean = statistics.fmean(timings)
+        per_label: Dict[str, List[int]] = {}
+        for e, r in zip(expected, routed):
+            hit = per_label.setdefault(e, [0, 0])
+            hit[0] += r == e
+            hit[1] += 1
+        results["backends"][name] = {
+            "available": True,
+            "model_accuracy": round(sum(a == e for a, e in zip(labels, expected)) / len(texts), 4),
+            "routed_accuracy": round(sum(r == e for r, e in zip(routed, expected)) / len(texts), 4),
+            "below_threshold": sum(c < router.threshold for c in confs),
+            "per_label_routed_accuracy": {k: round(v[0] / v[1], 4) for k, v in sorted(per_label.items())},
+            "fit_s": round(fit_s, 4),
+            "p50_us": round(percentile(timings, 50) * 1e6, 2),
+            "p99_us": round(percentile(timings, 99) * 1e6, 2),
+            "mean_us": round(mean * 1e6, 2),
+            "throughput_per_core": round(1 / mean) if mean else None,
+            "model_kb": round(retained / 1024, 1),
+            "fit_peak_kb": round(peak / 1024, 1),
+            "misrouted": [
+                {"text": t, "expected": e, "routed": r, "model": lbl, "confidence": round(c, 3)}
+                for (t, e), r, lbl, c in zip(ROUTING_CORPUS, routed, labels, confs) if r != e
+            ],
+        }
+    return results
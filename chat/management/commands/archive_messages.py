@@ -0,0 +1,24 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from chat import archive
+
+
+class Command(BaseCommand):
+    help = "Move chat messages older than the retention period into monthly compressed JSONL archives."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=None, help="Retention in days (default: CHAT_RETENTION_DAYS)")
+        parser.add_argument("--chunk-size", type=int, default=1000)
+        parser.add_argument("--dry-run", action="store_true", help="Only count what would be archived")
+
+    def handle(self, *args, **options):
+        before = archive.cutoff(options["days"])
+        if before is None:
+            self.stdout.write("Retention disabled (CHAT_RETENTION_DAYS=0); nothing to do.")
+            return
+        counts = archive.archive_messages(before, chunk_size=options["chunk_size"], dry_run=options["dry_run"])
+        self.stdout.write(json.dumps(counts, indent=2, sort_keys=True))
+        verb = "Would archive" if options["dry_run"] else "Archived"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {sum(counts.values())} messages created before {before:%Y-%m-%d %H:%M} -> {archive.archive_dir()}"))
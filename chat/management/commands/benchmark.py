@@ -0,0 +1,38 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from chat import benchmarks, ml
+
+SECTIONS = ("routing", "dates")
+
+
+class Command(BaseCommand):
+    help = "Benchmark intent routing (accuracy, latency, memory per backend) and the date parser; prints JSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=200, help="Date parser iterations per phrase.")
+        parser.add_argument("--routing-iterations", type=int, default=20, help="Timed passes over the routing corpus.")
+        parser.add_argument("--only", choices=SECTIONS, action="append", help="Run only this section (repeatable).")
+        parser.add_argument("--backends", help=f"Comma-separated router backends (default: all of {', '.join(ml.BACKENDS)}).")
+        parser.add_argument("--output", help="Also write the JSON report to this file.")
+
+    def handle(self, *args, **options):
+        sections = options["only"] or SECTIONS
+        backends = None
+        if options["backends"]:
+            backends = [b.strip() for b in options["backends"].split(",") if b.strip()]
+            unknown = sorted(set(backends) - set(ml.BACKENDS))
+            if unknown:
+                raise CommandError(f"Unknown backend(s): {', '.join(unknown)}")
+        result = {"environment": benchmarks.environment()}
+        if "routing" in sections:
+            result["routing"] = benchmarks.bench_routing(backends, iterations=options["routing_iterations"])
+        if "dates" in sections:
+            result["dates"] = benchmarks.bench_dates(iterations=options["iterations"])
+            result["dates"]["correctness"] = benchmarks.check_dates()
+        report = json.dumps(result, indent=2)
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as fh:
+                fh.write(report + "\n")
+        self.stdout.write(report)
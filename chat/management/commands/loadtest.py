@@ -0,0 +1,59 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from personal_assistant import loadtest
+
+
+class Command(BaseCommand):
+    help = "Drive chat, reminder polling and list pages with concurrent users; report requests/sec and latency percentiles."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--mode", action="append", choices=loadtest.MODES,
+                            help="client (in-process WSGI), async-client (in-process ASGI), wsgi (gunicorn), asgi (uvicorn), url. Repeatable; default client.")
+        parser.add_argument("--workers", default="1", help="Server processes for wsgi/asgi modes, comma-separated (e.g. 1,2,4).")
+        parser.add_argument("--threads", type=int, default=4, help="Threads per gunicorn worker.")
+        parser.add_argument("--users", type=int, default=8, help="Concurrent virtual users.")
+        parser.add_argument("--duration", type=float, default=10.0, help="Seconds per run.")
+        parser.add_argument("--rows", type=int, default=10_000, help="Seeded rows per model.")
+        parser.add_argument("--mix", default="chat=3,due=4,lists=3", help="Request weights: chat, due (reminder polling), lists.")
+        parser.add_argument("--url", default="", help="Base URL of a running server (url mode).")
+        parser.add_argument("--seed-only", action="store_true", help="Seed the configured database (not a test copy) and exit.")
+        parser.add_argument("--json", action="store_true", help="Print the report as JSON.")
+
+    def handle(self, *args, **options):
+        if options["seed_only"]:
+            counts = loadtest.seed(options["rows"])
+            self.stdout.write(self.style.SUCCESS(f"Seeded {counts}"))
+            return
+        modes = options["mode"] or ["client"]
+        if "url" in modes and not options["url"]:
+            raise CommandError("url mode needs --url")
+        for mode in modes:
+            if mode in loadtest.SERVERS and not loadtest.server_available(mode):
+                raise CommandError(f"{mode} mode needs {loadtest.SERVERS[mode]} (pip install {loadtest.SERVERS[mode]})")
+        try:
+            workers = [int(w) for w in options["workers"].split(",") if w.strip()]
+            mix = {k.strip(): int(v) for k, v in (part.split("=") for part in options["mix"].split(",") if part.strip())}
+        except ValueError:
+            raise CommandError("--workers must be integers and --mix look like chat=3,due=4,lists=3")
+        if set(mix) - set(loadtest.DEFAULT_MIX) or not any(mix.values()):
+            raise CommandError(f"--mix groups are {', '.join(loadtest.DEFAULT_MIX)}")
+        scenario = loadtest.Scenario(
+            modes=modes, workers=workers, users=options["users"], duration=options["duration"],
+            rows=options["rows"], mix=mix, url=options["url"], threads=options["threads"],
+        )
+        log = (lambda s: None) if options["json"] else (lambda s: self.stderr.write(s))
+        report = loadtest.run(scenario, log=log)
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        self.stdout.write(f"database: {report['database']}, {report['rows_per_model']} rows per model, {report['duration_s']:g}s per run")
+        for r in report["runs"]:
+            t = r["total"]
+            self.stdout.write(
+                f"{r['mode']:<13} workers={r['workers']:<2} users={r['users']:<3} {t['rps']:>8.1f} req/s  "
+                f"p50 {t['p50_ms']:.1f}ms  p90 {t['p90_ms']:.1f}ms  p99 {t['p99_ms']:.1f}ms  errors {t['errors']}"
+            )
+            for group, g in r["by_group"].items():
+                self.stdout.write(f"    {group:<6} {g['requests']:>6} req  {g['rps']:>8.1f} req/s  p50 {g['p50_ms']:.1f}ms  p99 {g['p99_ms']:.1f}ms  errors {g['errors']}")
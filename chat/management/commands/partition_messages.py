@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from chat import partitions
+
+
+class Command(BaseCommand):
+    help = "PostgreSQL only: range-partition chat_message by month on created_at, or add upcoming partitions."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--convert", action="store_true", help="Rebuild the existing table as a partitioned table (locks it while copying)")
+        parser.add_argument("--months-ahead", type=int, default=3)
+
+    def handle(self, *args, **options):
+        if not partitions.supported():
+            raise CommandError("Range partitioning needs PostgreSQL (DATABASE_URL=postgresql://...).")
+        if options["convert"]:
+            created = partitions.convert(options["months_ahead"])
+        elif not partitions.is_partitioned():
+            raise CommandError("chat_message is not partitioned yet; run with --convert first.")
+        else:
+            created = partitions.ensure(options["months_ahead"])
+        for name in created:
+            self.stdout.write(f"created {name}")
+        self.stdout.write(self.style.SUCCESS(f"{len(created)} partitions created."))
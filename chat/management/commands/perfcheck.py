@@ -0,0 +1,36 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from personal_assistant import perfcheck
+
+
+class Command(BaseCommand):
+    help = "Check query-count and latency budgets of every view and chat intent at several data sizes (uses a test database)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", default=",".join(map(str, perfcheck.SIZES)), help="Rows per model, comma-separated.")
+        parser.add_argument("--repeat", type=int, default=5, help="Timed runs per check and size (median is used).")
+        parser.add_argument("--growth", type=float, default=3.0, help="Allowed latency ratio between the largest and smallest size.")
+        parser.add_argument("--only", default="", help="Only run checks whose name contains this text.")
+        parser.add_argument("--json", action="store_true", help="Print the full report as JSON.")
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(s) for s in options["sizes"].split(",") if s.strip()]
+        except ValueError:
+            raise CommandError("--sizes must be comma-separated integers")
+        log = (lambda s: None) if options["json"] else (lambda s: self.stderr.write(s))
+        report = perfcheck.run(sizes, options["repeat"], options["growth"], options["only"], log=log)
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+        else:
+            for r in report["results"]:
+                queries = "/".join(str(r["queries"][s]) for s in report["sizes"])
+                ms = "/".join(f"{r['ms'][s]:.1f}" for s in report["sizes"])
+                status = self.style.ERROR("FAIL " + "; ".join(r["failures"])) if r["failures"] else self.style.SUCCESS("ok")
+                self.stdout.write(f"{r['check']:<58} q {queries:<9} ms {ms:<20} {status}")
+            for name in report["unbudgeted_urls"]:
+                self.stdout.write(self.style.ERROR(f"{name}: no EndpointCheck in personal_assistant/perfcheck.py"))
+        if report["failed"]:
+            raise CommandError(f"{len(report['failed'])} performance check(s) failed")
@@ -0,0 +1,58 @@
+import json
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+
+from chat.ml import IntentRouter
+from chat.models import Message
+
+
+class Command(BaseCommand):
+    help = "Stream chat Messages through the intent router in batches and report the routing."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=1000)
+        parser.add_argument("--sender", default="user", help="Only route messages from this sender ('' for all).")
+        parser.add_argument("--jsonl", action="store_true", help="Print one JSON line per message (id, label, confidence).")
+
+    def handle(self, *args, **options):
+        router = IntentRouter()
+        if not router.load():
+            router.train(publish=False)
+        qs = Message.objects.order_by("id")
+        if options["sender"]:
+            qs = qs.filter(sender=options["sender"])
+        size = options["chunk_size"]
+        counts: Counter = Counter()
+        total = low = 0
+        started = time.perf_counter()
+        batch = []
+        for row in qs.values_list("id", "text").iterator(chunk_size=size):
+            batch.append(row)
+            if len(batch) >= size:
+                low += self._route(router, batch, counts, options["jsonl"])
+                total += len(batch)
+                batch = []
+        if batch:
+            low += self._route(router, batch, counts, options["jsonl"])
+            total += len(batch)
+        elapsed = time.perf_counter() - started
+        if options["jsonl"]:
+            return
+        self.stdout.write(f"Routed {total} messages in {elapsed:.2f}s ({total / elapsed if elapsed else 0:.0f}/s)")
+        self.stdout.write(f"Below threshold {router.threshold}: {low}")
+        for label, n in counts.most_common():
+            self.stdout.write(f"  {label}: {n}")
+
+    def _route(self, router, batch, counts, jsonl) -> int:
+        labels, confs = router.predict_many([text for _, text in batch])
+        low = 0
+        for (pk, _), label, conf in zip(batch, labels, confs):
+            label = None if label is None else str(label)
+            counts[label] += 1
+            if conf < router.threshold:
+                low += 1
+            if jsonl:
+                self.stdout.write(json.dumps({"id": pk, "label": label, "confidence": round(float(conf), 4)}))
+        return low
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from chat.ml import IntentRouter
+
+
+class Command(BaseCommand):
+    help = "Fit the intent router once and publish the model artifact for all workers."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--full", action="store_true", help="Rebuild from scratch even in incremental mode.")
+
+    def handle(self, *args, **options):
+        router = IntentRouter()
+        router.load()
+        msg = router.train(full=options["full"])
+        self.stdout.write(self.style.SUCCESS(msg))
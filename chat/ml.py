@@ -1,32 +1,244 @@
-from __future__ import annotations
-from typing import List, Optional, Tuple
+"""Intent routing.
 
-try:
-    from sklearn.feature_extraction.text import TfidfVectorizer
-    from sklearn.linear_model import LogisticRegression
-    from sklearn.pipeline import Pipeline
-    SKLEARN_OK = True
-except Exception:  # pragma: no cover
-    SKLEARN_OK = False
+scikit-learn, joblib and NumPy are imported on first use (``_ml()``), not at
+module import, so processes that never route a message (migrations, most
+management commands, Celery workers) don't pay for them. How long that
+import took is kept in ``IMPORT_TIMINGS``.
+"""
+from __future__ import annotations
+import copy
+import hashlib
+import importlib.util
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from types import SimpleNamespace
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple
 
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
 from django.db.utils import OperationalError, ProgrammingError
 from .models import TrainingPhrase
+from .ngram import NgramModel
+
+if TYPE_CHECKING:  # pragma: no cover
+    from sklearn.pipeline import Pipeline
+
+# Checks that the packages are installed without importing them.
+SKLEARN_OK = all(importlib.util.find_spec(m) is not None for m in ("sklearn", "joblib", "numpy"))
+IMPORT_TIMINGS: Dict[str, float] = {}
+_modules: Optional[SimpleNamespace] = None
+_import_lock = threading.Lock()
+
+
+def _ml() -> SimpleNamespace:
+    """The ML stack, imported once per process on first use."""
+    global _modules
+    if _modules is None:
+        with _import_lock:
+            if _modules is None:
+                t = time.perf_counter()
+                import joblib
+                import numpy
+                from sklearn.feature_extraction.text import HashingVectorizer, TfidfVectorizer
+                from sklearn.linear_model import LogisticRegression, SGDClassifier
+                from sklearn.pipeline import Pipeline
+                IMPORT_TIMINGS["sklearn"] = round(time.perf_counter() - t, 4)
+                _modules = SimpleNamespace(
+                    joblib=joblib, np=numpy, Pipeline=Pipeline,
+                    HashingVectorizer=HashingVectorizer, TfidfVectorizer=TfidfVectorizer,
+                    LogisticRegression=LogisticRegression, SGDClassifier=SGDClassifier,
+                )
+    return _modules
+
+
+class SklearnBackend:
+    """TF-IDF (or hashing) + linear model pipelines, stored with joblib so arrays can be memory-mapped."""
+
+    name = "sklearn"
+    suffix = ".joblib"
+
+    def available(self) -> bool:
+        return SKLEARN_OK
+
+    def new_model(self, mode: str) -> Pipeline:
+        ml = _ml()
+        if mode == "incremental":
+            return ml.Pipeline([
+                ("hash", ml.HashingVectorizer(ngram_range=(1, 2), lowercase=True, alternate_sign=False, n_features=2 ** 18)),
+                ("clf", ml.SGDClassifier(loss="log_loss", alpha=1e-4, max_iter=1000, random_state=0)),
+            ])
+        return ml.Pipeline([
+            ("tfidf", ml.TfidfVectorizer(ngram_range=(1, 2), lowercase=True)),
+            ("clf", ml.LogisticRegression(max_iter=1000)),
+        ])
+
+    def dump(self, artifact: Dict[str, Any], path: Path) -> None:
+        _ml().joblib.dump(artifact, path)
+
+    def load(self, path: Path) -> Dict[str, Any]:
+        return _ml().joblib.load(path, mmap_mode="r")
+
+
+class NgramBackend:
+    """Pure-Python hashed n-gram softmax model (``chat.ngram``), stored as JSON."""
+
+    name = "ngram"
+    suffix = ".json"
+
+    def available(self) -> bool:
+        return True
+
+    def new_model(self, mode: str) -> NgramModel:
+        return NgramModel()
+
+    def dump(self, artifact: Dict[str, Any], path: Path) -> None:
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump(dict(artifact, pipeline=artifact["pipeline"].to_dict()), fh, separators=(",", ":"))
+
+    def load(self, path: Path) -> Dict[str, Any]:
+        with open(path, encoding="utf-8") as fh:
+            artifact = json.load(fh)
+        artifact["pipeline"] = NgramModel.from_dict(artifact["pipeline"])
+        return artifact
+
+
+BACKENDS = {b.name: b for b in (SklearnBackend(), NgramBackend())}
+
+
+def get_backend(name: Optional[str] = None):
+    """``INTENT_ROUTER_BACKEND``: "sklearn", "ngram", or "auto" (sklearn when installed)."""
+    name = name or getattr(settings, "INTENT_ROUTER_BACKEND", "auto")
+    if name == "auto":
+        name = "sklearn" if SKLEARN_OK else "ngram"
+    try:
+        return BACKENDS[name]
+    except KeyError:
+        raise ImproperlyConfigured(f"INTENT_ROUTER_BACKEND must be one of auto, {', '.join(BACKENDS)}; got {name!r}")
+
+
+def normalize_text(text: str) -> str:
+    """Cache key for predictions: lowercased, whitespace-collapsed input.
+
+    Both vectorizers lowercase and tokenize on word boundaries, so predicting
+    on the normalized form gives the same result as on the raw text.
+    """
+    return " ".join(text.lower().split())
+
+
+def training_fingerprint(X: List[str], y: List[str], parent: str = "") -> str:
+    """Order-independent hash of the (label, text) pairs a model was fitted on.
+
+    Incremental fits chain onto the ``parent`` fingerprint of the model they update.
+    """
+    h = hashlib.sha1(parent.encode("ascii"))
+    for label, text in sorted(zip(y, X)):
+        h.update(f"{label}\t{text}\n".encode("utf-8"))
+    return h.hexdigest()
+
+
+class ModelStore:
+    """Versioned intent model artifacts shared by every worker process.
+
+    Each fit is written to ``model-<version>.<suffix>`` by its backend
+    (uncompressed joblib for sklearn so numpy arrays can be memory-mapped,
+    JSON for ngram) and ``CURRENT.json`` is atomically replaced to point at
+    it. Readers only ever see complete artifacts.
+    """
+
+    POINTER = "CURRENT.json"
+    KEEP = 3
+
+    def __init__(self, path: Optional[Path] = None) -> None:
+        self.path = Path(path or getattr(settings, "INTENT_MODEL_DIR", Path(settings.BASE_DIR) / "var" / "intent_models"))
+
+    def current(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.path / self.POINTER, encoding="utf-8") as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return None
+
+    def publish(self, payload: Dict[str, Any], meta: Dict[str, Any], backend: Any = None) -> Dict[str, Any]:
+        backend = backend or BACKENDS["sklearn"]
+        self.path.mkdir(parents=True, exist_ok=True)
+        cur = self.current() or {}
+        version = max(int(time.time() * 1000), int(cur.get("version", 0)) + 1)
+        info = dict(meta, version=version, backend=backend.name, file=f"model-{version}{backend.suffix}")
+        tmp = self.path / f".{info['file']}.tmp"
+        backend.dump(dict(payload, **info), tmp)
+        os.replace(tmp, self.path / info["file"])
+        tmp = self.path / f".{self.POINTER}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(info, fh)
+        os.replace(tmp, self.path / self.POINTER)
+        self._prune()
+        return info
+
+    def load(self, info: Dict[str, Any]) -> Dict[str, Any]:
+        return BACKENDS[info.get("backend", "sklearn")].load(self.path / info["file"])
+
+    def _prune(self) -> None:
+        files = sorted(self.path.glob("model-*"), key=lambda p: p.stat().st_mtime, reverse=True)
+        for old in files[self.KEEP:]:
+            try:
+                old.unlink()
+            except OSError:
+                pass
+
 
 class IntentRouter:
-    """TF‑IDF + Logistic Regression classifier (optional).
+    """Intent classifier behind a pluggable backend (``INTENT_ROUTER_BACKEND``).
 
-    Falls back to None if scikit‑learn is not available or insufficient data.
+    The sklearn backend is TF‑IDF + Logistic Regression; the ngram backend
+    is a dependency-free hashed n-gram softmax model. Predictions are None
+    if the chosen backend is unavailable or there is insufficient data.
+    Trained models are published through a ``ModelStore``; other processes
+    pick up newer versions on their next prediction without refitting.
+
+    With ``INTENT_TRAINING_MODE = "incremental"`` the pipeline is a hashing
+    vectorizer + SGD classifier instead, so ``train()`` only feeds the
+    TrainingPhrase rows added since the last fit to ``partial_fit``.
     """
 
     def __init__(self) -> None:
-        self.enabled = SKLEARN_OK
-        self.pipeline: Optional[Pipeline] = None
+        self.backend = get_backend()
+        self.enabled = self.backend.available()
+        self.pipeline: Any = None  # fitted model: sklearn Pipeline or NgramModel
         self.labels: List[str] = []
         self.threshold: float = 0.55
+        self.version: Optional[int] = None
+        self.fingerprint: Optional[str] = None
+        self.trained_at: Optional[float] = None
+        # Incremental partial_fit is an sklearn feature; ngram refits are fast enough to always be full.
+        self.mode: str = getattr(settings, "INTENT_TRAINING_MODE", "full") if self.backend.name == "sklearn" else "full"
+        self.incremental_epochs = int(getattr(settings, "INTENT_INCREMENTAL_EPOCHS", 5))
+        # TrainingPhrase watermark of the current model: highest id and row count seen.
+        self.phrase_id: int = 0
+        self.phrase_count: int = 0
+        self.store = ModelStore()
+        self.check_interval = float(getattr(settings, "INTENT_MODEL_CHECK_INTERVAL", 5.0))
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+        # LRU of normalized text -> (label, confidence), valid for one model only.
+        self.cache_size = int(getattr(settings, "INTENT_CACHE_SIZE", 1024))
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._cache: "OrderedDict[str, Tuple[Optional[str], float]]" = OrderedDict()
+        self._cache_model: Any = None
+        self._cache_lock = threading.Lock()
 
     def collect_training(self) -> Tuple[List[str], List[str]]:
+        X, y, _, _ = self._collect()
+        return X, y
+
+    def _collect(self) -> Tuple[List[str], List[str], int, int]:
         X: List[str] = []
         y: List[str] = []
+        max_id = count = 0
         # Built‑ins (seed data)
         seed = {
             "tasks": ["add task", "list tasks", "complete task"],
@@ -44,34 +256,191 @@ class IntentRouter:
                 X.append(p); y.append(lbl)
         # User-taught phrases from DB (guarded: during first migrations table may not exist)
         try:
-            for tp in TrainingPhrase.objects.all():
+            for tp in TrainingPhrase.objects.order_by("id"):
                 X.append(tp.text); y.append(tp.label)
+                max_id = tp.id; count += 1
         except (OperationalError, ProgrammingError):
             # Database not ready (e.g., before migrations). Proceed with seeds only.
             pass
-        return X, y
+        return X, y, max_id, count
 
-    def train(self) -> str:
+    def train(self, publish: bool = True, full: bool = False) -> str:
+        """Refit the router.
+
+        In incremental mode only rows added since the last fit are learned,
+        unless ``full`` is set or the delta can't be applied (rows deleted,
+        unseen labels, no current model); then the model is rebuilt.
+        """
         if not self.enabled:
             self.pipeline = None
             return "ML disabled (install scikit‑learn)."
-        X, y = self.collect_training()
+        if self.mode == "incremental" and not full and self._is_incremental():
+            msg = self._train_delta()
+            if msg is None:
+                return "Already up to date."
+            if msg:
+                return self._publish(msg) if publish else msg
+        X, y, max_id, count = self._collect()
         if len(set(y)) < 2:
             self.pipeline = None
             return "Not enough distinct labels. Use admin or a form to add TrainingPhrase."
-        self.pipeline = Pipeline([
-            ("tfidf", TfidfVectorizer(ngram_range=(1, 2), lowercase=True)),
-            ("clf", LogisticRegression(max_iter=1000)),
-        ])
-        self.pipeline.fit(X, y)
-        self.labels = sorted(set(y))
-        return f"Trained on {len(X)} phrases across {len(self.labels)} labels."
+        fp = training_fingerprint(X, y)
+        if not full and self.pipeline is not None and fp == self.fingerprint:
+            return "Already up to date."
+        pipeline = self.backend.new_model(self.mode)
+        pipeline.fit(X, y)
+        with self._lock:
+            self.pipeline = pipeline
+            self.labels = sorted(set(y))
+            self.fingerprint = fp
+            self.trained_at = time.time()
+            self.phrase_id, self.phrase_count = max_id, count
+        msg = f"Trained on {len(X)} phrases across {len(self.labels)} labels."
+        return self._publish(msg) if publish else msg
+
+    def _is_incremental(self) -> bool:
+        return self.pipeline is not None and "hash" in getattr(self.pipeline, "named_steps", {})
+
+    def _train_delta(self) -> Optional[str]:
+        """partial_fit on new TrainingPhrase rows.
+
+        Returns None when nothing changed and "" when a full rebuild is needed.
+        """
+        try:
+            count = TrainingPhrase.objects.count()
+            delta = list(TrainingPhrase.objects.filter(id__gt=self.phrase_id).order_by("id").values_list("id", "text", "label"))
+        except (OperationalError, ProgrammingError):
+            return None
+        if count != self.phrase_count + len(delta):
+            return ""  # rows were deleted since the last fit
+        if not delta:
+            return None
+        X = [t for _, t, _ in delta]
+        y = [lbl for _, _, lbl in delta]
+        if not set(y) <= set(self.labels):
+            return ""  # SGD can't grow new classes in place
+        # Published models are memory-mapped read-only; update a private copy.
+        pipeline = copy.deepcopy(self.pipeline)
+        clf = pipeline.named_steps["clf"]
+        np = _ml().np
+        clf.coef_ = np.array(clf.coef_)
+        clf.intercept_ = np.array(clf.intercept_)
+        features = pipeline.named_steps["hash"].transform(X)
+        for _ in range(self.incremental_epochs):
+            clf.partial_fit(features, y)
+        with self._lock:
+            self.pipeline = pipeline
+            self.fingerprint = training_fingerprint(X, y, parent=self.fingerprint or "")
+            self.trained_at = time.time()
+            self.phrase_id, self.phrase_count = delta[-1][0], count
+        return f"Incrementally trained on {len(X)} new phrases."
+
+    def _publish(self, msg: str) -> str:
+        try:
+            info = self.store.publish({"pipeline": self.pipeline}, {
+                "labels": self.labels,
+                "fingerprint": self.fingerprint,
+                "trained_at": self.trained_at,
+                "mode": self.mode,
+                "phrase_id": self.phrase_id,
+                "phrase_count": self.phrase_count,
+            }, self.backend)
+        except OSError as e:
+            return f"{msg} Model not persisted: {e}"
+        self.version = info["version"]
+        return f"{msg} Published model version {self.version}."
+
+    def load(self) -> bool:
+        """Load the current published artifact. Returns False if there is none."""
+        if not self.enabled:
+            return False
+        info = self.store.current()
+        if not info or info.get("backend", "sklearn") != self.backend.name:
+            return False  # nothing published yet, or a model of another backend
+        if info.get("version") == self.version:
+            return True
+        try:
+            artifact = self.store.load(info)
+        except Exception:
+            # Missing or half-pruned artifact: keep whatever we already have.
+            return self.pipeline is not None
+        with self._lock:
+            self.pipeline = artifact["pipeline"]
+            self.labels = list(artifact["labels"])
+            self.fingerprint = artifact["fingerprint"]
+            self.trained_at = artifact["trained_at"]
+            self.phrase_id = artifact.get("phrase_id", 0)
+            self.phrase_count = artifact.get("phrase_count", 0)
+            self.version = artifact["version"]
+        return True
+
+    def refresh(self) -> bool:
+        """Hot-swap to a newer published model (checked at most every ``check_interval`` s)."""
+        t = time.monotonic()
+        if t < self._next_check:
+            return False
+        self._next_check = t + self.check_interval
+        info = self.store.current()
+        if not info or int(info.get("version", 0)) <= (self.version or 0):
+            return False
+        return self.load()
 
     def predict(self, text: str) -> Tuple[Optional[str], float]:
-        if not (self.enabled and self.pipeline):
+        self.refresh()
+        pipeline = self.pipeline
+        if not (self.enabled and pipeline):
             return None, 0.0
-        proba = self.pipeline.predict_proba([text])[0]
-        idx = int(proba.argmax())
-        label = self.pipeline.classes_[idx]
+        key = normalize_text(text)
+        with self._cache_lock:
+            if self._cache_model is not pipeline:
+                # Retrained, loaded or hot-swapped since the entries were stored.
+                self._cache.clear()
+                self._cache_model = pipeline
+            hit = self._cache.get(key)
+            if hit is not None:
+                self._cache.move_to_end(key)
+                self.cache_hits += 1
+                return hit
+            self.cache_misses += 1
+        proba = pipeline.predict_proba([key])[0]
+        idx = max(range(len(proba)), key=proba.__getitem__)
+        label = str(pipeline.classes_[idx])
         conf = float(proba[idx])
+        if self.cache_size > 0:
+            with self._cache_lock:
+                if self._cache_model is pipeline:
+                    self._cache[key] = (label, conf)
+                    if len(self._cache) > self.cache_size:
+                        self._cache.popitem(last=False)
         return label, conf
+
+    def cache_info(self) -> Dict[str, int]:
+        return {
+            "size": len(self._cache),
+            "max_size": self.cache_size,
+            "hits": self.cache_hits,
+            "misses": self.cache_misses,
+        }
+
+    def predict_many(self, texts: Sequence[str]) -> Tuple[Sequence[Optional[str]], Sequence[float]]:
+        """Batch ``predict``: returns (labels, confidences).
+
+        numpy arrays from one vectorised ``predict_proba`` call for the
+        sklearn backend, lists for ngram. Labels are None wherever no model
+        is available.
+        """
+        self.refresh()
+        pipeline = self.pipeline
+        if not (self.enabled and pipeline) or not len(texts):
+            return [None] * len(texts), [0.0] * len(texts)
+        if not hasattr(pipeline, "named_steps"):
+            labels, confs = [], []
+            for proba in pipeline.predict_proba([normalize_text(t) for t in texts]):
+                idx = max(range(len(proba)), key=proba.__getitem__)
+                labels.append(pipeline.classes_[idx])
+                confs.append(proba[idx])
+            return labels, confs
+        np = _ml().np
+        proba = pipeline.predict_proba([normalize_text(t) for t in texts])
+        idx = proba.argmax(axis=1)
+        return pipeline.classes_[idx], proba[np.arange(len(idx)), idx]
@@ -1,13 +1,21 @@
 from django.db import models
+from django.utils import timezone
 
 class Message(models.Model):
     SENDER_CHOICES = [("user", "User"), ("assistant", "Assistant")]
     sender = models.CharField(max_length=16, choices=SENDER_CHOICES)
     text = models.TextField()
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Set when the message is built, not when it is written (see chat.transcript).
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
+    # Browser-scoped thread key (chat_conversation cookie); "" for messages from before threads.
+    conversation = models.CharField(max_length=64, blank=True, default="")
 
     class Meta:
-        ordering = ["-created_at"]
+        ordering = ["-created_at", "-id"]
+        indexes = [
+            models.Index(fields=["created_at"], name="message_created_idx"),
+            models.Index(fields=["conversation", "created_at"], name="message_conversation_idx"),
+        ]
 
 class TrainingPhrase(models.Model):
     label = models.CharField(max_length=64)  # e.g. tasks, notes, reminders, events, time, smalltalk
@@ -0,0 +1,99 @@
+"""Dependency-free intent classifier: hashed word n-grams + softmax regression.
+
+Features are the message's word unigrams and bigrams (the same n-grams the
+TF-IDF pipeline uses), hashed with CRC32 into ``n_features`` buckets and
+L2-normalised. Training is plain multinomial logistic regression by SGD,
+which is quick for the few hundred phrases this app has. The fitted model is
+a sparse weight matrix (one row of per-class weights per seen bucket) plus a
+bias vector, so a prediction is a handful of dict lookups and one softmax.
+It mimics the part of the scikit-learn estimator API ``IntentRouter`` uses:
+``fit``, ``predict_proba`` and ``classes_``.
+"""
+from __future__ import annotations
+import math
+import random
+import re
+import zlib
+from collections import Counter
+from typing import Any, Dict, List, Sequence, Tuple
+
+_WORD = re.compile(r"(?u)\b\w\w+\b")  # TfidfVectorizer's default token pattern
+
+
+class NgramModel:
+    def __init__(self, n_features: int = 2 ** 18, epochs: int = 40, learning_rate: float = 0.5, l2: float = 1e-4, seed: int = 0) -> None:
+        self.n_features = n_features
+        self.epochs = epochs
+        self.learning_rate = learning_rate
+        self.l2 = l2
+        self.seed = seed
+        self.classes_: List[str] = []
+        self.weights: Dict[int, List[float]] = {}
+        self.bias: List[float] = []
+
+    def features(self, text: str) -> List[Tuple[int, float]]:
+        tokens = _WORD.findall(text.lower())
+        grams = Counter(tokens)
+        grams.update(f"{a} {b}" for a, b in zip(tokens, tokens[1:]))
+        buckets: Counter = Counter()
+        for gram, n in grams.items():
+            buckets[zlib.crc32(gram.encode("utf-8")) % self.n_features] += n
+        norm = math.sqrt(sum(v * v for v in buckets.values())) or 1.0
+        return [(f, v / norm) for f, v in buckets.items()]
+
+    def _scores(self, feats: List[Tuple[int, float]]) -> List[float]:
+        scores = list(self.bias)
+        weights = self.weights
+        for f, v in feats:
+            row = weights.get(f)
+            if row is not None:
+                for c, w in enumerate(row):
+                    scores[c] += w * v
+        top = max(scores)
+        exps = [math.exp(s - top) for s in scores]
+        total = sum(exps)
+        return [e / total for e in exps]
+
+    def fit(self, X: Sequence[str], y: Sequence[str]) -> "NgramModel":
+        self.classes_ = sorted(set(y))
+        index = {c: i for i, c in enumerate(self.classes_)}
+        k = len(self.classes_)
+        samples = [(self.features(x), index[label]) for x, label in zip(X, y)]
+        self.weights, self.bias = {}, [0.0] * k
+        order = list(range(len(samples)))
+        rng = random.Random(self.seed)
+        for epoch in range(self.epochs):
+            rng.shuffle(order)
+            lr = self.learning_rate / (1 + 0.1 * epoch)
+            decay = 1 - lr * self.l2
+            for i in order:
+                feats, target = samples[i]
+                probs = self._scores(feats)
+                probs[target] -= 1.0  # gradient of the log loss w.r.t. the scores
+                for c in range(k):
+                    self.bias[c] -= lr * probs[c]
+                for f, v in feats:
+                    row = self.weights.setdefault(f, [0.0] * k)
+                    for c in range(k):
+                        row[c] = row[c] * decay - lr * probs[c] * v
+        return self
+
+    def predict_proba(self, texts: Sequence[str]) -> List[List[float]]:
+        return [self._scores(self.features(t)) for t in texts]
+
+    # --- persistence (plain JSON, no pickle) ---
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "n_features": self.n_features,
+            "classes": self.classes_,
+            "bias": [round(b, 6) for b in self.bias],
+            "weights": {str(f): [round(w, 6) for w in row] for f, row in self.weights.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "NgramModel":
+        model = cls(n_features=int(data["n_features"]))
+        model.classes_ = list(data["classes"])
+        model.bias = [float(b) for b in data["bias"]]
+        model.weights = {int(f): [float(w) for w in row] for f, row in data["weights"].items()}
+        return model
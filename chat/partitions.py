@@ -0,0 +1,142 @@
+"""Optional native range partitioning of ``chat_message`` on PostgreSQL.
+
+``convert()`` rebuilds the table as ``PARTITION BY RANGE (created_at)`` with
+one partition per (UTC) month plus a default partition. ``ensure()`` creates
+upcoming months ahead of time, and ``drop_before()`` drops months that
+``chat.archive`` has already emptied, which is much cheaper than deleting
+rows. Everything here is a no-op on other databases.
+"""
+from __future__ import annotations
+import re
+from datetime import datetime, timezone
+from typing import List
+
+from django.db import connection, transaction
+
+from .models import Message
+
+TABLE = Message._meta.db_table
+
+
+def _month_start(dt: datetime) -> datetime:
+    return datetime(dt.year, dt.month, 1, tzinfo=timezone.utc)
+
+
+def _next_month(dt: datetime) -> datetime:
+    return datetime(dt.year + dt.month // 12, dt.month % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def _name(month: datetime) -> str:
+    return f"{TABLE}_p{month:%Y%m}"
+
+
+def supported() -> bool:
+    return connection.vendor == "postgresql"
+
+
+def is_partitioned() -> bool:
+    if not supported():
+        return False
+    with connection.cursor() as cur:
+        cur.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", [TABLE])
+        row = cur.fetchone()
+    return bool(row) and row[0] == "p"
+
+
+def _create(cur, month: datetime) -> bool:
+    name = _name(month)
+    cur.execute("SELECT to_regclass(%s)", [name])
+    if cur.fetchone()[0]:
+        return False
+    q = connection.ops.quote_name
+    cur.execute(
+        f"CREATE TABLE {q(name)} PARTITION OF {q(TABLE)} FOR VALUES FROM (%s) TO (%s)",
+        [month, _next_month(month)],
+    )
+    return True
+
+
+def _create_range(cur, start: datetime, months_ahead: int) -> List[str]:
+    created = []
+    month = _month_start(start)
+    end = _month_start(datetime.now(timezone.utc))
+    for _ in range(months_ahead):
+        end = _next_month(end)
+    while month <= end:
+        if _create(cur, month):
+            created.append(_name(month))
+        month = _next_month(month)
+    return created
+
+
+def ensure(months_ahead: int = 3) -> List[str]:
+    """Create partitions for this month and the next ``months_ahead`` months."""
+    if not is_partitioned():
+        return []
+    with transaction.atomic(), connection.cursor() as cur:
+        return _create_range(cur, datetime.now(timezone.utc), months_ahead)
+
+
+def convert(months_ahead: int = 3) -> List[str]:
+    """Turn the plain table into a partitioned one, copying every row (takes an exclusive lock)."""
+    if not supported():
+        raise RuntimeError("Range partitioning needs PostgreSQL")
+    if is_partitioned():
+        return ensure(months_ahead)
+    q = connection.ops.quote_name
+    old = f"{TABLE}_unpartitioned"
+    with transaction.atomic(), connection.cursor() as cur:
+        cur.execute(f"LOCK TABLE {q(TABLE)} IN ACCESS EXCLUSIVE MODE")
+        cur.execute(
+            "SELECT indexdef FROM pg_indexes WHERE tablename = %s AND indexname <> %s",
+            [TABLE, f"{TABLE}_pkey"],
+        )
+        indexes = [row[0] for row in cur.fetchall()]
+        cur.execute(f"SELECT min(created_at) FROM {q(TABLE)}")
+        first = cur.fetchone()[0]
+        cur.execute(f"ALTER TABLE {q(TABLE)} RENAME TO {q(old)}")
+        cur.execute(
+            f"CREATE TABLE {q(TABLE)} (LIKE {q(old)} INCLUDING DEFAULTS INCLUDING IDENTITY) "
+            f"PARTITION BY RANGE (created_at)"
+        )
+        # The partition key has to be part of every unique constraint.
+        cur.execute(f"ALTER TABLE {q(TABLE)} ADD PRIMARY KEY (id, created_at)")
+        cur.execute(f"CREATE TABLE {q(TABLE + '_default')} PARTITION OF {q(TABLE)} DEFAULT")
+        created = _create_range(cur, first or datetime.now(timezone.utc), months_ahead)
+        cur.execute(f"INSERT INTO {q(TABLE)} SELECT * FROM {q(old)}")
+        cur.execute(
+            f"SELECT setval(pg_get_serial_sequence(%s, 'id'), COALESCE(max(id), 0) + 1, false) FROM {q(TABLE)}",
+            [TABLE],
+        )
+        cur.execute(f"DROP TABLE {q(old)}")
+        for indexdef in indexes:
+            # Same index names and columns, now on the partitioned parent.
+            cur.execute(re.sub(r" ON (\S+\.)?\S+ ", f" ON {q(TABLE)} ", indexdef, count=1))
+    return created
+
+
+def drop_before(before: datetime) -> List[str]:
+    """Drop monthly partitions that end at or before ``before`` and hold no rows."""
+    if not is_partitioned():
+        return []
+    dropped = []
+    q = connection.ops.quote_name
+    with transaction.atomic(), connection.cursor() as cur:
+        cur.execute(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(%s) ORDER BY c.relname",
+            [TABLE],
+        )
+        for (name,) in cur.fetchall():
+            m = re.fullmatch(rf"{re.escape(TABLE)}_p(\d{{4}})(\d{{2}})", name)
+            if not m:
+                continue
+            month = datetime(int(m.group(1)), int(m.group(2)), 1, tzinfo=timezone.utc)
+            if _next_month(month) > before:
+                continue
+            cur.execute(f"SELECT EXISTS (SELECT 1 FROM {q(name)})")
+            if cur.fetchone()[0]:
+                continue
+            cur.execute(f"DROP TABLE {q(name)}")
+            dropped.append(name)
+    return dropped
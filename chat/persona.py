@@ -0,0 +1,71 @@
+"""Process-level cache of the Persona/Profile data used to style replies.
+
+Greeting and closing are formatted when the cache is built and the profile
+reply is pre-rendered, so answering needs no queries. Invalidated by
+Profile, Persona and QAPair signals (see ``chat.signals``).
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Optional
+
+from personal_assistant.versions import Versioned
+
+
+@dataclass(frozen=True)
+class PersonaContext:
+    has_persona: bool = False
+    greeting: str = ""
+    closing: str = ""
+    profile_reply: Optional[str] = None  # None when no Profile exists
+
+    def apply(self, text: str) -> str:
+        if not self.has_persona:
+            return text
+        out = text
+        if self.greeting:
+            out = f"{self.greeting}\n\n{out}"
+        if self.closing:
+            out = f"{out}\n\n{self.closing}"
+        return out
+
+
+def _profile_body(prof, faq) -> str:
+    parts = []
+    parts.append((f"About {prof.display_name}: {prof.short_bio}" if prof.short_bio else f"About {prof.display_name}").strip())
+    if prof.full_bio:
+        parts.append(prof.full_bio)
+    links = []
+    if prof.website:
+        links.append(f"Website: {prof.website}")
+    if prof.email:
+        links.append(f"Email: {prof.email}")
+    if prof.location:
+        links.append(f"Location: {prof.location}")
+    if links:
+        parts.append("\n".join(links))
+    if faq:
+        parts.append(f"FAQ - {faq.question}: {faq.answer}")
+    return "\n\n".join([p for p in parts if p])
+
+
+def _build() -> PersonaContext:
+    from profileapp.models import Persona, Profile, QAPair
+    persona = Persona.objects.first()
+    profile = Profile.objects.first()
+    ctx = PersonaContext()
+    if persona:
+        name = profile.display_name if (profile and getattr(profile, "display_name", None)) else (getattr(persona, "refer_to_user_as", "") or "")
+        greeting = ""
+        if getattr(persona, "greeting_template", "") and name:
+            try:
+                greeting = persona.greeting_template.format(name=name)
+            except Exception:
+                greeting = persona.greeting_template
+        ctx = PersonaContext(has_persona=True, greeting=greeting, closing=getattr(persona, "closing_template", "") or "")
+    if profile:
+        body = _profile_body(profile, QAPair.objects.first())
+        ctx = PersonaContext(ctx.has_persona, ctx.greeting, ctx.closing, ctx.apply(body))
+    return ctx
+
+
+context: Versioned[PersonaContext] = Versioned("persona", _build)
@@ -1,261 +1,405 @@
 ﻿from __future__ import annotations
 from dataclasses import dataclass
 from datetime import datetime, timedelta
+from functools import partial
 import re
 import random
-from typing import Optional
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from django.conf import settings
+from django.db import transaction
 from django.utils.timezone import get_current_timezone, make_aware, now, is_naive
 
 from tasks.models import Task
 from notes.models import Note
+from notes import index as notes_index
+from notes.search import backend as notes_backend, search as search_notes
+from reminders import scheduler as reminder_scheduler
 from reminders.models import Reminder
 from events.models import Event
+from personal_assistant.profiling import span
 from .ml import IntentRouter
+from . import persona, smalltalk
 
 # --- lightweight natural date parser (similar to your CLI) ---
-_TIME24 = r"(?P<h>\d{1,2}):(?P<m>\d{2})(?::(?P<s>\d{2}))?"
-_TIME12 = r"(?P<h>\d{1,2})(?::(?P<m>\d{2}))?\s?(?P<ampm>am|pm)"
-_DATE = r"(?P<y>\d{4})-(?P<mo>\d{2})-(?P<d>\d{2})"
-_TIME24_SIMPLE = r"\d{1,2}:\d{2}(?::\d{2})?"
-_TIME12_SIMPLE = r"\d{1,2}(?::\d{2})?\s?(?:am|pm)"
-
-def _parse_time_into(base: datetime, token: str) -> datetime:
-    token = token.strip().lower()
-    m = re.match(_TIME24 + r"$", token)
-    if m:
-        hh = int(m.group("h")); mm = int(m.group("m")); ss = int(m.group("s")) if m.group("s") else 0
-        return base.replace(hour=hh, minute=mm, second=ss, microsecond=0)
-    m = re.match(_TIME12 + r"$", token)
-    if m:
-        hh = int(m.group("h")); mm = int(m.group("m")) if m.group("m") else 0
+# One precompiled alternation finds every supported date expression in a
+# single scan; branch names double as priorities (earlier wins, as before).
+# The lookahead lets the scan skip positions that can't start any branch.
+def _time_re(p: str) -> str:
+    # 24h first so "9:30pm" backtracks into the 12h branch
+    return (rf"(?:(?P<{p}h>\d{{1,2}}):(?P<{p}m>\d{{2}})(?::(?P<{p}s>\d{{2}}))?"
+            rf"|(?P<{p}h12>\d{{1,2}})(?::(?P<{p}m12>\d{{2}}))?\s?(?P<{p}ap>am|pm))")
+
+def _hour_re(p: str) -> str:
+    # A bare hour ("at 9", 24h clock); only accepted after "at"
+    return rf"(?P<{p}hb>[01]?\d|2[0-3])(?![:\d])"
+
+def _at_re(p: str) -> str:
+    return rf"\s+at\s+(?:{_time_re(p)}|{_hour_re(p)})"
+
+def _date_re(p: str) -> str:
+    return rf"(?P<{p}y>\d{{4}})-(?P<{p}mo>\d{{2}})-(?P<{p}d>\d{{2}})"
+
+_DATE_EXPR = re.compile(r"(?=[iot\d])(?:" + "|".join([
+    r"(?P<rel>\bin\s+(?P<n>\d+)\s+(?P<u>second|minute|hour|day|week)s?\b)",
+    rf"(?P<tom>\btomorrow(?:{_at_re('tm')})?\b)",
+    rf"(?P<tod>\btoday{_at_re('td')}\b)",
+    rf"(?P<on>\bon\s+{_date_re('on')}(?:{_at_re('on')}|\s+{_time_re('on2')})?\b)",
+    rf"(?P<iso>{_date_re('iso')}(?:\s+{_time_re('iso')}\b)?)",
+]) + ")")
+_PRIORITY = {"rel": 0, "tom": 1, "tod": 2, "on": 3, "iso": 4}
+_UNITS = {
+    "second": timedelta(seconds=1), "minute": timedelta(minutes=1), "hour": timedelta(hours=1),
+    "day": timedelta(days=1), "week": timedelta(weeks=1),
+}
+
+def _clock(m: re.Match, p: str) -> Optional[tuple[int, int, int]]:
+    if m.group(p + "h") is not None:
+        return int(m.group(p + "h")), int(m.group(p + "m")), int(m.group(p + "s") or 0)
+    if m.group(p + "h12") is not None:
+        hh = int(m.group(p + "h12")); mm = int(m.group(p + "m12") or 0)
         if hh == 12: hh = 0
-        if m.group("ampm") == "pm": hh += 12
-        return base.replace(hour=hh, minute=mm, second=0, microsecond=0)
-    return base
+        if m.group(p + "ap") == "pm": hh += 12
+        return hh, mm, 0
+    if p + "hb" in m.re.groupindex and m.group(p + "hb") is not None:
+        return int(m.group(p + "hb")), 0, 0
+    return None
+
+def _at(base: datetime, clock: Optional[tuple[int, int, int]]) -> datetime:
+    if clock is None:
+        return base
+    return base.replace(hour=clock[0], minute=clock[1], second=clock[2], microsecond=0)
+
+def _resolve(m: re.Match, base: datetime) -> datetime:
+    kind = m.lastgroup
+    if kind == "rel":
+        when = base + int(m.group("n")) * _UNITS[m.group("u")]
+    elif kind == "tom":
+        base2 = (base + timedelta(days=1)).replace(hour=9, minute=0, second=0, microsecond=0)
+        when = _at(base2, _clock(m, "tm"))
+    elif kind == "tod":
+        when = _at(base, _clock(m, "td"))
+        if when <= base:
+            when += timedelta(days=1)
+    else:
+        p = "on" if kind == "on" else "iso"
+        base2 = base.replace(year=int(m.group(p + "y")), month=int(m.group(p + "mo")), day=int(m.group(p + "d")),
+                             hour=9, minute=0, second=0, microsecond=0)
+        when = _at(base2, _clock(m, p) or (_clock(m, "on2") if kind == "on" else None))
+    return when
 
 def parse_datetime(text: str, base: Optional[datetime] = None) -> tuple[Optional[datetime], str]:
-    tz = get_current_timezone()
     base = base or now()
     s = text.strip().lower()
-    def _aware(dt: datetime) -> datetime:
-        return make_aware(dt, tz) if is_naive(dt) else dt
-
-    m = re.search(r"\bin\s+(?P<n>\d+)\s+(?P<u>seconds?|minutes?|hours?|days?|weeks?)\b", s)
-    if m:
-        n = int(m.group("n")); u = m.group("u")
-        delta = dict(second=timedelta(seconds=n), seconds=timedelta(seconds=n),
-                     minute=timedelta(minutes=n), minutes=timedelta(minutes=n),
-                     hour=timedelta(hours=n), hours=timedelta(hours=n),
-                     day=timedelta(days=n), days=timedelta(days=n),
-                     week=timedelta(weeks=n), weeks=timedelta(weeks=n))[u]
-        when = base + delta
-        remainder = (s[: m.start()] + s[m.end():]).strip()
-        return _aware(when), remainder
-
-    m = re.search(r"\btomorrow(?:\s+at\s+(?P<t>" + _TIME24_SIMPLE + r"|" + _TIME12_SIMPLE + r"))?\b", s)
-    if m:
-        base2 = base + timedelta(days=1)
-        base2 = base2.replace(hour=9, minute=0, second=0, microsecond=0)
-        t = m.group("t")
-        when = _parse_time_into(base2, t) if t else base2
-        remainder = (s[: m.start()] + s[m.end():]).strip()
-        return _aware(when), remainder
-
-    m = re.search(r"\btoday\s+at\s+(?P<t>" + _TIME24_SIMPLE + r"|" + _TIME12_SIMPLE + r")\b", s)
-    if m:
-        when = _parse_time_into(base, m.group("t"))
-        if when <= base:
-            when += timedelta(days=1)
-        remainder = (s[: m.start()] + s[m.end():]).strip()
-        return _aware(when), remainder
-
-    m = re.search(r"\bon\s+" + _DATE + r"(?:\s+at\s+(?P<t>" + _TIME24_SIMPLE + r"|" + _TIME12_SIMPLE + r"))?\b", s)
-    if m:
-        y, mo, d = int(m.group("y")), int(m.group("mo")), int(m.group("d"))
-        base2 = base.replace(year=y, month=mo, day=d, hour=9, minute=0, second=0, microsecond=0)
-        t = m.group("t")
-        when = _parse_time_into(base2, t) if t else base2
-        remainder = (s[: m.start()] + s[m.end():]).strip()
-        return _aware(when), remainder
-
-    m = re.search(_DATE + r"(?:\s+" + _TIME24_SIMPLE + r")?", s)
-    if m:
-        y, mo, d = int(m.group("y")), int(m.group("mo")), int(m.group("d"))
-        base2 = base.replace(year=y, month=mo, day=d, hour=9, minute=0, second=0, microsecond=0)
-        when = base2
-        mm = re.match(r"^\s+(" + _TIME24_SIMPLE + r"|" + _TIME12_SIMPLE + r")\b", s[m.end():])
-        if mm:
-            when = _parse_time_into(when, mm.group(1))
-        remainder = (s[: m.start()] + s[m.end():]).strip()
-        return _aware(when), remainder
-
-    return None, s
+
+    best = None
+    for m in _DATE_EXPR.finditer(s):
+        if best is None or _PRIORITY[m.lastgroup] < _PRIORITY[best.lastgroup]:
+            best = m
+            if m.lastgroup == "rel":
+                break
+    if best is None:
+        return None, s
+    try:
+        when = _resolve(best, base)
+    except (ValueError, OverflowError):  # e.g. 2025-02-30, 25:00, in 99999999 weeks: not a date after all
+        return None, s
+    remainder = (s[: best.start()] + s[best.end():]).strip()
+    # The active timezone lookup is comparatively slow; only naive bases need it.
+    return (make_aware(when, get_current_timezone()) if is_naive(when) else when), remainder
+
+def parse_datetimes(texts: Iterable[str], base: Optional[datetime] = None) -> List[tuple[Optional[datetime], str]]:
+    """``parse_datetime`` for many texts against one base time.
+
+    The base is converted to the current timezone once, so clock times such
+    as "tomorrow at 9" are local and no result needs the timezone lookup, and
+    repeated texts, common in bulk imports, are parsed once.
+    """
+    tz = get_current_timezone()
+    base = base or now()
+    base = make_aware(base, tz) if is_naive(base) else base.astimezone(tz)
+    seen: dict[str, tuple[Optional[datetime], str]] = {}
+    out = []
+    for text in texts:
+        result = seen.get(text)
+        if result is None:
+            result = seen[text] = parse_datetime(text, base)
+        out.append(result)
+    return out
 
 # --- main assistant orchestration ---
+_GREETING = re.compile(r"\b(hi|hello|hey|yo|good\s+(morning|afternoon|evening))\b")
+
+
+def rule_label(text: str) -> Optional[str]:
+    """Keyword routing used when the model is unsure; None if nothing matches."""
+    s = text.lower()
+    if s.startswith("help") or s.strip() in ("help", "/help", "commands", "examples", "how to use"):
+        return "help"
+    if _GREETING.search(s) or "how are you" in s or "thank" in s:
+        return "smalltalk"
+    if s.startswith("add task") or "task" in s:
+        return "tasks"
+    if s.startswith("remind me") or "reminder" in s:
+        return "reminders"
+    if s.startswith("note ") or s.startswith("search notes") or "note" in s:
+        return "notes"
+    if s.startswith("add event") or "event" in s:
+        return "events"
+    if "about me" in s or "who am i" in s or "profile" in s:
+        return "profile"
+    if "projects" in s or "project" in s:
+        return "projects"
+    if "time" in s or "date" in s:
+        return "time"
+    return None
+
+
+def route_label(text: str, label: Optional[str], conf: float, threshold: float) -> Optional[str]:
+    """The label ``Assistant.dispatch`` acts on: the model's if confident, else the keyword rules'."""
+    if not label or conf < threshold:
+        return rule_label(text)
+    return label
+
+_COMMAND_SEP = re.compile(r"(;|\r?\n)")
+_BLANK = " \t\r\n;"
+# Statements that start a new command in a multi-command message
+_COMMAND_START = re.compile(r"(?:add\s+(?:task|event)|search\s+notes|remind\s+me|note)\b", re.I)
+# Other intents also start one, except inside a note (whose lines are free text)
+_INTENT_START = re.compile(
+    r"(?:help|what\s+time|about\s+me|who\s+am\s+i"
+    r"|(?:(?:list|show)(?:\s+(?:my|all|open))?|my)\s+(?:tasks|notes|reminders|events|projects))\b",
+    re.I,
+)
+
+
+def split_commands(text: str) -> List[str]:
+    """The commands in one message.
+
+    Statements are separated by ";" or new lines, but only one that begins
+    like a command starts a new command; anything else continues the previous
+    one, separator included, so "note Shopping: eggs\nbread" stays one note.
+    """
+    commands: List[str] = []
+    pieces = _COMMAND_SEP.split(text)  # statement, separator, statement, ...
+    for i in range(0, len(pieces), 2):
+        stmt = pieces[i].strip()
+        in_note = bool(commands) and commands[-1].lstrip().lower().startswith("note ")
+        if not commands or not commands[-1].strip(_BLANK) or _COMMAND_START.match(stmt) or (not in_note and _INTENT_START.match(stmt)):
+            commands.append(pieces[i])
+        else:
+            commands[-1] += pieces[i - 1] + pieces[i]
+    return [c.strip(_BLANK) for c in commands if c.strip(_BLANK)]
+
+def _after_bulk_create(model: Any, objs: List[Any]) -> None:
+    """What the Note and Reminder save signals do, once per batch (``bulk_create`` sends none)."""
+    if model is Note and notes_backend() == "index":
+        if all(n.pk for n in objs):
+            notes_index.update_many((n.pk, n.title, n.content) for n in objs)
+        else:
+            notes_index.rebuild()  # the database didn't return the new ids
+    elif model is Reminder:
+        reminder_scheduler.bulk_changed([r.pk for r in objs])
+
 @dataclass
 class AssistResult:
     reply: str
 
+@dataclass
+class Creation:
+    obj: Any  # unsaved model instance
+    reply: Callable[[Any], str]  # called with the saved instance
+
 class Assistant:
     def __init__(self) -> None:
         self.router = IntentRouter()
-        self.router.train()  # train once at import; could add admin button to retrain
+        # Prefer the published artifact; only fit in-process when none exists yet.
+        if not self.router.load():
+            self.router.train()
 
     def handle(self, user_text: str) -> AssistResult:
-        label, conf = self.router.predict(user_text)
-        if not label or conf < self.router.threshold:
-            # simple rule fallback
-            s = user_text.lower()
-            if s.startswith("help") or s.strip() in ("help", "/help", "commands", "examples", "how to use"):
-                return self._handle_help()
-            if re.search(r"\b(hi|hello|hey|yo|good\s+(morning|afternoon|evening))\b", s) or "how are you" in s or "thank" in s:
-                return self._handle_smalltalk(user_text)
-            if s.startswith("add task") or "task" in s:
-                return self._handle_tasks(user_text)
-            if s.startswith("remind me") or "reminder" in s:
-                return self._handle_reminders2(user_text)
-            if s.startswith("note ") or s.startswith("search notes") or "note" in s:
-                return self._handle_notes(user_text)
-            if s.startswith("add event") or "event" in s:
-                return self._handle_events(user_text)
-            if "about me" in s or "who am i" in s or "profile" in s:
-                return self._handle_profile(user_text)
-            if "projects" in s or "project" in s:
-                return self._handle_projects(user_text)
-            if "time" in s or "date" in s:
-                return AssistResult(reply=now().strftime("It is %Y-%m-%d %H:%M:%S %Z"))
+        commands = split_commands(user_text)
+        if len(commands) > 1:
+            with span("intent.predict"):
+                labels, confs = self.router.predict_many(commands)
+            return self.dispatch_many(commands, labels, confs)
+        with span("intent.predict"):
+            label, conf = self.router.predict(user_text)
+        return self.dispatch(user_text, label, conf)
+
+    def dispatch_many(self, commands: Sequence[str], labels: Sequence[Any], confs: Sequence[Any]) -> AssistResult:
+        """Run several commands with labels from one ``predict_many`` call; reply with one numbered message.
+
+        Additions are grouped by model and inserted with one ``bulk_create``
+        each, in a single transaction, before the other commands run (so a
+        "search notes" later in the message sees the new note).
+        """
+        limit = getattr(settings, "CHAT_MAX_COMMANDS", 20)
+        dropped = max(len(commands) - limit, 0)
+        commands = commands[:limit]
+        builders = {"tasks": self._build_task, "notes": self._build_note,
+                    "reminders": self._build_reminder, "events": self._build_event}
+        replies: List[Optional[str]] = [None] * len(commands)
+        routes: List[Tuple[Optional[str], float]] = []
+        creations: List[Tuple[int, Creation]] = []
+        for i, text in enumerate(commands):
+            label = None if labels[i] is None else str(labels[i])
+            routes.append((label, float(confs[i])))
+            build = builders.get(route_label(text, label, routes[i][1], self.router.threshold))
+            c = build(text) if build else None
+            if c is not None:
+                creations.append((i, c))
+        if creations:
+            by_model: Dict[Any, List[Any]] = {}
+            for _, c in creations:
+                by_model.setdefault(type(c.obj), []).append(c.obj)
+            with span("bulk_create"), transaction.atomic():
+                for model, objs in by_model.items():
+                    model.objects.bulk_create(objs)
+                    transaction.on_commit(partial(_after_bulk_create, model, objs))
+            for i, c in creations:
+                replies[i] = c.reply(c.obj)
+        for i, text in enumerate(commands):
+            if replies[i] is None:
+                replies[i] = self.dispatch(text, *routes[i]).reply
+        lines = [f"{n}. {r}" for n, r in enumerate(replies, 1)]
+        if dropped:
+            lines.append(f"(Skipped {dropped} more; up to {limit} commands per message.)")
+        return AssistResult(reply="\n".join(lines))
+
+    def dispatch(self, user_text: str, label: Optional[str], conf: float) -> AssistResult:
+        """Run the handler for an already predicted label (rule fallback below threshold)."""
+        routed = route_label(user_text, label, conf, self.router.threshold)
+        if routed is None:
             return AssistResult(reply="I didn't catch that. Try 'help'.")
-        # dispatch by label
-        if label == "help":
-            return self._handle_help()
-        if label == "tasks":
-            return self._handle_tasks(user_text)
-        if label == "reminders":
-            return self._handle_reminders2(user_text)
-        if label == "notes":
-            return self._handle_notes(user_text)
-        if label == "events":
-            return self._handle_events(user_text)
-        if label == "profile":
-            return self._handle_profile(user_text)
-        if label == "projects":
-            return self._handle_projects(user_text)
-        if label == "smalltalk":
-            return self._handle_smalltalk(user_text)
-        if label == "time":
-            return AssistResult(reply=now().strftime("It is %Y-%m-%d %H:%M:%S %Z"))
-        return AssistResult(reply="Okay.")
+        handler = {
+            "help": lambda _: self._handle_help(),
+            "tasks": self._handle_tasks,
+            "reminders": self._handle_reminders2,
+            "notes": self._handle_notes,
+            "events": self._handle_events,
+            "profile": self._handle_profile,
+            "projects": self._handle_projects,
+            "smalltalk": self._handle_smalltalk,
+            "time": lambda _: AssistResult(reply=now().strftime("It is %Y-%m-%d %H:%M:%S %Z")),
+        }.get(routed)
+        if handler is None:
+            return AssistResult(reply="Okay.")
+        with span(f"handler.{routed}"):
+            return handler(user_text)
 
     # --- handlers ---
-    def _handle_tasks(self, text: str) -> AssistResult:
-        when, remainder = parse_datetime(text)
+    # Creating commands are split into a builder, returning the unsaved object
+    # (or None if the text isn't a creation), and a save, so ``dispatch_many``
+    # can insert a whole message's additions with one query per model.
+    def _save(self, c: Creation) -> AssistResult:
+        c.obj.save(force_insert=True)
+        return AssistResult(reply=c.reply(c.obj))
+
+    def _build_task(self, text: str) -> Creation:
+        with span("parse_datetime"):
+            when, remainder = parse_datetime(text)
         title = remainder.replace("add task", "").strip() or remainder.strip() or "(untitled)"
         if title.startswith("task"):
             title = title.replace("task", "", 1).strip()
-        t = Task.objects.create(title=title, due_at=when)
         extra = f" (due {when:%Y-%m-%d %H:%M})" if when else ""
-        return AssistResult(reply=f"Added task #{t.id}: {t.title}{extra}")
+        return Creation(Task(title=title, due_at=when), lambda t: f"Added task #{t.id}: {t.title}{extra}")
+
+    def _handle_tasks(self, text: str) -> AssistResult:
+        return self._save(self._build_task(text))
+
+    def _build_note(self, text: str) -> Optional[Creation]:
+        s = text.strip()
+        if not s.lower().startswith("note "):
+            return None
+        body = s[len("note "):].strip()
+        if ":" in body:
+            title, content = [p.strip() for p in body.split(":", 1)]
+        else:
+            title, content = body[:40], body
+        return Creation(Note(title=title, content=content), lambda n: f"Saved note: {title}")
 
     def _handle_notes(self, text: str) -> AssistResult:
         s = text.strip()
         if s.lower().startswith("search notes"):
             q = s[len("search notes"):].strip()
-            qs = Note.objects.filter(title__icontains=q) | Note.objects.filter(content__icontains=q)
-            if not qs.exists():
+            if not re.search(r"\w", q):  # nothing to search for: list the latest notes
+                notes = list(Note.objects.all()[:10])
+                if not notes:
+                    return AssistResult(reply="No notes yet.")
+                return AssistResult(reply="Notes:\n" + "\n".join(f"[{n.id}] {n.title}" for n in notes))
+            hits = search_notes(q, limit=10)
+            if not hits:
                 return AssistResult(reply="No matches.")
-            preview = "\n".join([f"[{n.id}] {n.title}" for n in qs[:10]])
+            preview = "\n".join([f"[{h.note.id}] {h.note.title}" + (f" — {h.text}" if h.snippet else "") for h in hits])
             return AssistResult(reply=f"Matches:\n{preview}")
-        if s.lower().startswith("note "):
-            body = s[len("note "):].strip()
-            if ":" in body:
-                title, content = [p.strip() for p in body.split(":", 1)]
-            else:
-                title, content = body[:40], body
-            Note.objects.create(title=title, content=content)
-            return AssistResult(reply=f"Saved note: {title}")
+        c = self._build_note(s)
+        if c is not None:
+            return self._save(c)
         return AssistResult(reply="Try: 'note Title: content' or 'search notes milk'")
 
     def _handle_reminders(self, text: str) -> AssistResult:
-        when, remainder = parse_datetime(text)
+        with span("parse_datetime"):
+            when, remainder = parse_datetime(text)
         msg = remainder.replace("remind me", "").replace("to ", "", 1).strip() or "(no message)"
         if not when:
             return AssistResult(reply="I couldn't find a time in that. Try 'in 10 minutes' or 'tomorrow at 09:00'.")
         r = Reminder.objects.create(message=msg, due_at=when)
         return AssistResult(reply=f"Reminder #{r.id} set for {when:%Y-%m-%d %H:%M:%S} - {msg}")
 
-    # Safe replacement used by routing to avoid any encoding issues in old method
-    def _handle_reminders2(self, text: str) -> AssistResult:
-        when, remainder = parse_datetime(text)
+    def _build_reminder(self, text: str) -> Optional[Creation]:
+        with span("parse_datetime"):
+            when, remainder = parse_datetime(text)
         msg = remainder.replace("remind me", "").replace("to ", "", 1).strip() or "(no message)"
         if not when:
+            return None
+        return Creation(Reminder(message=msg, due_at=when), lambda r: f"Reminder #{r.id} set for {when:%Y-%m-%d %H:%M:%S} - {msg}")
+
+    # Safe replacement used by routing to avoid any encoding issues in old method
+    def _handle_reminders2(self, text: str) -> AssistResult:
+        c = self._build_reminder(text)
+        if c is None:
             return AssistResult(reply="I couldn't find a time in that. Try 'in 10 minutes' or 'tomorrow at 09:00'.")
-        r = Reminder.objects.create(message=msg, due_at=when)
-        return AssistResult(reply=f"Reminder #{r.id} set for {when:%Y-%m-%d %H:%M:%S} - {msg}")
+        return self._save(c)
 
-    def _handle_events(self, text: str) -> AssistResult:
+    def _build_event(self, text: str) -> Optional[Creation]:
         # Expect: add event 2025-08-25 14:00 - Title [@Location]
         m = re.search(r"(?P<date>\d{4}-\d{2}-\d{2})\s+(?P<time>\d{1,2}:\d{2})\s*-\s*(?P<title>.+)", text)
         if not m:
-            return AssistResult(reply="Usage: add event 2025-08-25 14:00 - Title [@Location]")
+            return None
         starts_at = make_aware(datetime.fromisoformat(f"{m.group('date')} {m.group('time')}"))
         rest = m.group("title")
         if "@" in rest:
             title, location = [p.strip() for p in rest.split("@", 1)]
         else:
             title, location = rest.strip(), None
-        e = Event.objects.create(title=title, starts_at=starts_at, location=location)
         loc = f" @ {location}" if location else ""
-        return AssistResult(reply=f"Event #{e.id} added: {title} at {starts_at:%Y-%m-%d %H:%M}{loc}")
+        return Creation(Event(title=title, starts_at=starts_at, location=location),
+                        lambda e: f"Event #{e.id} added: {title} at {starts_at:%Y-%m-%d %H:%M}{loc}")
+
+    def _handle_events(self, text: str) -> AssistResult:
+        c = self._build_event(text)
+        if c is None:
+            return AssistResult(reply="Usage: add event 2025-08-25 14:00 - Title [@Location]")
+        return self._save(c)
 
     # --- profile & projects ---
     def _apply_persona(self, text: str) -> str:
         try:
-            from profileapp.models import Persona, Profile
-            persona = Persona.objects.first()
-            profile = Profile.objects.first()
+            with span("persona"):
+                ctx = persona.context.get()
         except Exception:
-            persona = None
-            profile = None
-        if not persona:
             return text
-        name = profile.display_name if (profile and getattr(profile, "display_name", None)) else (getattr(persona, "refer_to_user_as", "") or "")
-        out = text
-        if getattr(persona, "greeting_template", "") and name:
-            try:
-                out = f"{persona.greeting_template.format(name=name)}\n\n{out}"
-            except Exception:
-                out = f"{persona.greeting_template}\n\n{out}"
-        if getattr(persona, "closing_template", ""):
-            out = f"{out}\n\n{persona.closing_template}"
-        return out
+        return ctx.apply(text)
 
     def _handle_profile(self, text: str) -> AssistResult:
         try:
-            from profileapp.models import Profile, QAPair
-        except Exception:
+            with span("persona"):
+                ctx = persona.context.get()
+        except ImportError:
             return AssistResult(reply="Profile module not installed.")
-        prof = Profile.objects.first()
-        if not prof:
+        if ctx.profile_reply is None:
             return AssistResult(reply="I don't have profile info yet. Add one in the admin under Profile.")
-        parts = []
-        parts.append((f"About {prof.display_name}: {prof.short_bio}" if prof.short_bio else f"About {prof.display_name}").strip())
-        if prof.full_bio:
-            parts.append(prof.full_bio)
-        links = []
-        if prof.website:
-            links.append(f"Website: {prof.website}")
-        if prof.email:
-            links.append(f"Email: {prof.email}")
-        if prof.location:
-            links.append(f"Location: {prof.location}")
-        if links:
-            parts.append("\n".join(links))
-        faq = QAPair.objects.first()
-        if faq:
-            parts.append(f"FAQ - {faq.question}: {faq.answer}")
-        reply = "\n\n".join([p for p in parts if p])
-        reply = self._apply_persona(reply)
-        return AssistResult(reply=reply)
+        return AssistResult(reply=ctx.profile_reply)
 
     def _handle_projects(self, text: str) -> AssistResult:
         try:
@@ -314,25 +458,7 @@ class Assistant:
         sl = s.lower()
         replies: list[str] = []
         try:
-            from .models import SmalltalkPair
-            for p in SmalltalkPair.objects.filter(is_active=True):
-                matched = False
-                if p.is_regex:
-                    try:
-                        if re.search(p.pattern, sl, re.IGNORECASE):
-                            matched = True
-                    except re.error:
-                        matched = False
-                else:
-                    if p.pattern.lower() in sl:
-                        matched = True
-                if matched:
-                    raw = p.answers.replace("\r", "\n")
-                    parts = []
-                    for chunk in raw.split("\n"):
-                        parts.extend([c.strip() for c in chunk.split("|")])
-                    parts = [a for a in parts if a]
-                    replies.extend(parts)
+            replies = smalltalk.matcher.get().match(sl)
         except Exception:
             # ignore DB errors
             pass
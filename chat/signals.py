@@ -0,0 +1,21 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from profileapp.models import Persona, Profile, QAPair
+
+from . import persona, smalltalk
+from .models import SmalltalkPair
+
+
+@receiver([post_save, post_delete], sender=SmalltalkPair)
+def smalltalk_changed(sender, **kwargs):
+    # After commit, so other workers can't rebuild from the old rows.
+    transaction.on_commit(smalltalk.matcher.invalidate)
+
+
+@receiver([post_save, post_delete], sender=Persona)
+@receiver([post_save, post_delete], sender=Profile)
+@receiver([post_save, post_delete], sender=QAPair)
+def persona_changed(sender, **kwargs):
+    transaction.on_commit(persona.context.invalidate)
@@ -0,0 +1,134 @@
+"""In-memory matcher for admin-defined ``SmalltalkPair`` rows.
+
+Literal patterns go into one Aho-Corasick automaton and regex patterns into
+one combined expression, so a message is matched against every pair in two
+scans instead of one database query plus a compile per row. The matcher is
+rebuilt only when SmalltalkPair rows change (see ``chat.signals``).
+"""
+from __future__ import annotations
+import re
+from collections import deque
+from typing import Dict, Iterable, List, Set, Tuple
+
+from personal_assistant.versions import Versioned
+
+
+def split_answers(raw: str) -> List[str]:
+    parts: List[str] = []
+    for chunk in raw.replace("\r", "\n").split("\n"):
+        parts.extend([c.strip() for c in chunk.split("|")])
+    return [a for a in parts if a]
+
+
+class AhoCorasick:
+    """Multi-substring search: reports which keys occur anywhere in a text."""
+
+    def __init__(self, keys: Iterable[Tuple[str, int]]) -> None:
+        self.goto: List[Dict[str, int]] = [{}]
+        self.out: List[List[int]] = [[]]
+        for word, key in keys:
+            node = 0
+            for ch in word:
+                nxt = self.goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[node][ch] = nxt
+                    self.goto.append({})
+                    self.out.append([])
+                node = nxt
+            self.out[node].append(key)
+        self.fail = [0] * len(self.goto)
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self.goto[node].items():
+                queue.append(nxt)
+                f = self.fail[node]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(ch, 0)
+                self.out[nxt] = self.out[nxt] + self.out[self.fail[nxt]]
+
+    def find(self, text: str) -> Set[int]:
+        found: Set[int] = set()
+        goto, fail, out = self.goto, self.fail, self.out
+        node = 0
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                found.update(out[node])
+        return found
+
+
+class SmalltalkMatcher:
+    def __init__(self, pairs: Iterable[Tuple[str, bool, str]]) -> None:
+        self.answers: List[List[str]] = []
+        literals: List[Tuple[str, int]] = []
+        regexes: List[Tuple[str, int]] = []
+        self.always: Set[int] = set()
+        for idx, (pattern, is_regex, answers) in enumerate(pairs):
+            self.answers.append(split_answers(answers))
+            if is_regex:
+                try:
+                    re.compile(pattern, re.IGNORECASE)
+                except re.error:
+                    continue  # invalid patterns never matched before either
+                regexes.append((pattern, idx))
+            elif pattern:
+                literals.append((pattern.lower(), idx))
+            else:
+                self.always.add(idx)  # "" is a substring of everything
+        self.literals = AhoCorasick(literals) if literals else None
+        self.regex_groups: List[Tuple[int, int]] = []
+        self.regex = self._combine(regexes)
+        # Patterns that can't share one expression (inline flags, backrefs) are tried one by one.
+        self.fallback = [] if self.regex is not None else [(re.compile(p, re.IGNORECASE), i) for p, i in regexes]
+
+    def _combine(self, regexes: List[Tuple[str, int]]):
+        """One optional lookahead per pattern, each searching from the start.
+
+        ``match`` then tells which patterns occur via which wrapper groups
+        participated, without stopping at the first hit like a plain alternation.
+        """
+        if not regexes:
+            return None
+        parts, group = [], 1
+        for pattern, idx in regexes:
+            compiled = re.compile(pattern, re.IGNORECASE)
+            if compiled.groups and re.search(r"\\\d|\(\?P=", pattern):
+                return None  # numbered/named backrefs would point at the wrong groups
+            parts.append(f"(?:(?=(?s:.*?)({pattern}))|)")
+            self.regex_groups.append((group, idx))
+            group += 1 + compiled.groups
+        try:
+            return re.compile("".join(parts), re.IGNORECASE)
+        except re.error:
+            self.regex_groups = []
+            return None
+
+    def match(self, text: str) -> List[str]:
+        """Replies of every pair matching ``text`` (already lowercased), in pair order."""
+        hits = set(self.always)
+        if self.literals is not None:
+            hits |= self.literals.find(text)
+        if self.regex is not None:
+            m = self.regex.match(text)
+            hits.update(idx for group, idx in self.regex_groups if m.group(group) is not None)
+        for compiled, idx in self.fallback:
+            if compiled.search(text):
+                hits.add(idx)
+        replies: List[str] = []
+        for idx in sorted(hits):
+            replies.extend(self.answers[idx])
+        return replies
+
+
+def _build() -> SmalltalkMatcher:
+    from .models import SmalltalkPair
+    rows = SmalltalkPair.objects.filter(is_active=True).values_list("pattern", "is_regex", "answers")
+    return SmalltalkMatcher(list(rows))
+
+
+matcher: Versioned[SmalltalkMatcher] = Versioned("smalltalk", _build)
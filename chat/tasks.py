@@ -0,0 +1,14 @@
+from celery import shared_task
+from . import archive, partitions
+
+@shared_task
+def archive_old_messages() -> int:
+    # Moves messages older than CHAT_RETENTION_DAYS into monthly archive files.
+    before = archive.cutoff()
+    if before is None:
+        return 0
+    n = sum(archive.archive_messages(before).values())
+    # Partitioned Postgres tables: drop the emptied months, create the coming ones.
+    partitions.drop_before(before)
+    partitions.ensure()
+    return n
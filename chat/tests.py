@@ -0,0 +1,75 @@
+import tempfile
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from . import views
+from tasks.models import Task
+
+from .ml import IntentRouter
+from .models import Message, TrainingPhrase
+from .services import Assistant, split_commands
+from .transcript import TranscriptWriter
+
+PHRASES = [
+    ("tasks", "add task buy milk"), ("tasks", "add task call bob tomorrow"), ("tasks", "new task finish the report"),
+    ("notes", "note trip: pack passport"), ("notes", "search notes passport"), ("notes", "take a note about the meeting"),
+    ("reminders", "remind me in 10 minutes to stretch"), ("reminders", "set a reminder for tomorrow"),
+    ("time", "what time is it"), ("time", "what is the date today"),
+]
+
+
+class PredictManyTests(TestCase):
+    def setUp(self):
+        TrainingPhrase.objects.bulk_create([TrainingPhrase(label=label, text=text) for label, text in PHRASES])
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.enterContext(override_settings(INTENT_MODEL_DIR=tmp.name))
+
+    def test_batch_matches_single_prediction(self):
+        router = IntentRouter()
+        if not router.enabled:
+            self.skipTest("no intent router backend installed")
+        router.train(publish=False)
+        for text in ["  Add TASK: Buy MILK!!  ", "What   TIME is it?", "REMIND me, in 10 minutes... to stretch"]:
+            labels, confs = router.predict_many([text])
+            label, conf = router.predict(text)
+            self.assertEqual(str(labels[0]), label)
+            self.assertAlmostEqual(float(confs[0]), conf)
+
+
+class ChatFormTests(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.enterContext(override_settings(INTENT_MODEL_DIR=tmp.name, CHAT_TRANSCRIPT_INTERVAL=3600, CHAT_TRANSCRIPT_BATCH=1000))
+        self.enterContext(mock.patch.object(views, "transcript", TranscriptWriter()))
+
+    def test_redirected_page_shows_the_turn_without_this_process_buffer(self):
+        response = self.client.post(reverse("chat:chat"), {"text": "what time is it"})
+        self.assertRedirects(response, reverse("chat:chat"), fetch_redirect_response=False)
+        self.assertEqual(Message.objects.filter(text="what time is it").count(), 1)
+        # Another worker: nothing of this turn in its write-behind buffer.
+        with mock.patch.object(views, "transcript", TranscriptWriter()):
+            page = self.client.get(reverse("chat:chat"))
+        self.assertContains(page, "what time is it")
+        self.assertContains(page, "It is ")
+
+
+class SplitCommandsTests(SimpleTestCase):
+    def test_list_and_show_intents_start_a_command(self):
+        self.assertEqual(split_commands("add task a; list tasks"), ["add task a", "list tasks"])
+        self.assertEqual(split_commands("add task a\nshow my reminders"), ["add task a", "show my reminders"])
+
+    def test_note_body_is_not_split(self):
+        self.assertEqual(split_commands("note Shopping: eggs\nbread\nbutter"), ["note Shopping: eggs\nbread\nbutter"])
+        self.assertEqual(split_commands("note Groceries: milk; list tasks"), ["note Groceries: milk; list tasks"])
+
+
+class MultiCommandTests(TestCase):
+    def test_task_title_stops_at_the_next_command(self):
+        with tempfile.TemporaryDirectory() as tmp, override_settings(INTENT_MODEL_DIR=tmp):
+            Assistant().handle("add task a; list tasks")
+        self.assertTrue(Task.objects.filter(title="a").exists())
+        self.assertFalse(Task.objects.filter(title__contains=";").exists())
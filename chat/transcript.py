@@ -0,0 +1,122 @@
+"""Write-behind logging of chat ``Message`` rows.
+
+Views hand finished messages to ``transcript.log``; a background thread
+writes them with one ``bulk_create`` once ``CHAT_TRANSCRIPT_BATCH`` messages
+are waiting or ``CHAT_TRANSCRIPT_INTERVAL`` seconds have passed. At most
+``CHAT_TRANSCRIPT_MAX_PENDING`` messages are held: beyond that ``log`` blocks
+until the flusher catches up. The buffer is flushed at interpreter exit, and
+``with_pending`` merges unflushed messages into transcript reads so this
+process never shows a transcript missing the messages it just accepted.
+Other processes only see them once they are flushed; the HTML form path
+therefore flushes its own conversation before redirecting.
+"""
+from __future__ import annotations
+import atexit
+import logging
+import threading
+import time
+from typing import List, Optional
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from .models import Message
+
+log = logging.getLogger(__name__)
+
+
+class TranscriptWriter:
+    def __init__(self, batch: Optional[int] = None, interval: Optional[float] = None, max_pending: Optional[int] = None) -> None:
+        self.batch = batch or int(getattr(settings, "CHAT_TRANSCRIPT_BATCH", 50))
+        self.interval = interval if interval is not None else float(getattr(settings, "CHAT_TRANSCRIPT_INTERVAL", 1.0))
+        self.max_pending = max(self.batch, max_pending or int(getattr(settings, "CHAT_TRANSCRIPT_MAX_PENDING", 1000)))
+        self._pending: List[Message] = []
+        self._inflight: List[Message] = []  # handed to bulk_create, not yet committed
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._oldest = 0.0
+
+    def log(self, *messages: Message) -> None:
+        """Queue unsaved messages; they keep the ``created_at`` they were given."""
+        with self._cond:
+            while len(self._pending) + len(messages) > self.max_pending:
+                self._cond.notify_all()
+                self._cond.wait(self.interval or 0.1)  # back-pressure: wait for the flusher
+            if not self._pending:
+                self._oldest = time.monotonic()
+            self._pending.extend(messages)
+            if len(self._pending) >= self.batch:
+                self._cond.notify_all()
+        self._ensure_thread()
+
+    def flush(self, conversation: Optional[str] = None) -> int:
+        """Write everything queued so far, or only ``conversation``'s messages; returns the rows written."""
+        with self._flush_lock:
+            with self._cond:
+                if conversation is None:
+                    batch, self._pending = self._pending, []
+                else:
+                    batch = [m for m in self._pending if m.conversation == conversation]
+                    self._pending = [m for m in self._pending if m.conversation != conversation]
+                self._inflight = batch
+                self._cond.notify_all()
+            if not batch:
+                return 0
+            try:
+                Message.objects.bulk_create(batch, batch_size=self.batch)
+            except Exception:
+                log.exception("Writing %d chat messages failed; will retry", len(batch))
+                with self._cond:
+                    self._pending[:0] = batch
+                return 0
+            finally:
+                with self._cond:
+                    self._inflight = []
+            return len(batch)
+
+    def pending(self) -> List[Message]:
+        with self._cond:
+            return self._inflight + self._pending
+
+    def with_pending(self, rows: List[Message], conversation: Optional[str] = None) -> List[Message]:
+        """``rows`` (newest first) merged with this process's unwritten messages.
+
+        Pending messages are compared by pk, so one flushed while ``rows`` was
+        being read is not shown twice.
+        """
+        unsaved = [m for m in self.pending() if conversation is None or m.conversation == conversation]
+        if not unsaved:
+            return rows
+        stored = {m.pk for m in rows}
+        merged = rows + [m for m in unsaved if m.pk is None or m.pk not in stored]
+        merged.sort(key=lambda m: m.created_at, reverse=True)
+        return merged
+
+    def _ensure_thread(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._cond:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="chat-transcript", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while len(self._pending) < self.batch:
+                    if self._pending:
+                        remaining = self._oldest + self.interval - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self._cond.wait(remaining)
+                    else:
+                        self._cond.wait()
+            close_old_connections()
+            if not self.flush():
+                time.sleep(self.interval or 0.1)  # nothing written (error or race): don't spin
+            close_old_connections()
+
+
+transcript = TranscriptWriter()
+atexit.register(transcript.flush)
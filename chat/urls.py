@@ -4,6 +4,11 @@ from . import views
 app_name = "chat"
 urlpatterns = [
     path("", views.chat, name="chat"),
+    path("api/chat/", views.api_chat, name="api_chat"),
+    path("api/chat/history/", views.api_history, name="api_history"),
     path("retrain/", views.retrain, name="retrain"),
     path("status/", views.status, name="status"),
+    path("metrics/", views.metrics, name="metrics"),
+    path("archive/", views.archive_index, name="archive"),
+    path("archive/<str:month>/", views.archive_export, name="archive_export"),
 ]
@@ -1,52 +1,229 @@
+import asyncio
+import hmac
+import json
+import re
+import secrets
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import render, redirect
+from django.urls import reverse
 from django.views.decorators.http import require_http_methods
 from django.contrib.admin.views.decorators import staff_member_required
+from . import archive, ml, warmup
+from personal_assistant import profiling
+from personal_assistant.pagination import page_size, paginate
 from .forms import ChatForm
 from .models import Message
-from .services import Assistant
+from .services import Assistant, split_commands
+from .transcript import transcript
+
+CONVERSATION_COOKIE = "chat_conversation"
+_CONVERSATION_RE = re.compile(r"[A-Za-z0-9_-]{16,64}")
 
 # Lazily instantiate to avoid DB access during import/migrations
 assistant = None
+_assistant_lock = threading.Lock()
+# Bounded pool for intent inference so async requests never run sklearn on the event loop
+_inference: Optional[ThreadPoolExecutor] = None
 
-@require_http_methods(["GET", "POST"])
-def chat(request):
+
+def get_assistant() -> Assistant:
     global assistant
     if assistant is None:
-        assistant = Assistant()
+        with _assistant_lock:
+            if assistant is None:
+                assistant = Assistant()
+    return assistant
+
+
+def _executor() -> ThreadPoolExecutor:
+    global _inference
+    if _inference is None:
+        with _assistant_lock:
+            if _inference is None:
+                workers = int(getattr(settings, "CHAT_INFERENCE_THREADS", 2))
+                _inference = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="intent")
+    return _inference
+
+
+def _message_json(m: Message) -> dict:
+    return {"id": m.id, "sender": m.sender, "text": m.text, "created_at": m.created_at.isoformat()}
+
+
+def conversation_key(request) -> str:
+    """This browser's thread key from its cookie, or a fresh one (see ``remember_conversation``)."""
+    key = request.COOKIES.get(CONVERSATION_COOKIE, "")
+    if not _CONVERSATION_RE.fullmatch(key):
+        key = secrets.token_urlsafe(16)
+    return key
+
+
+def remember_conversation(request, response, key: str):
+    if request.COOKIES.get(CONVERSATION_COOKIE) != key:
+        response.set_cookie(CONVERSATION_COOKIE, key, max_age=365 * 24 * 3600, httponly=True, samesite="Lax")
+    return response
+
+
+def history(conversation: str, cursor: Optional[str] = None, size: Optional[int] = None):
+    """One window of a thread, newest first, and the cursor of the next older window."""
+    size = size or int(getattr(settings, "CHAT_HISTORY_SIZE", 50))
+    page = paginate(Message.objects.filter(conversation=conversation), cursor, size)
+    items = page.items if cursor else transcript.with_pending(page.items, conversation)
+    return items, page.next_cursor
+
+
+@require_http_methods(["GET", "POST"])
+def chat(request):
+    assistant = get_assistant()
+    key = conversation_key(request)
     form = ChatForm(request.POST or None)
-    messages = Message.objects.all()[:50]
     if request.method == "POST" and form.is_valid():
         user_text = form.cleaned_data["text"]
-        Message.objects.create(sender="user", text=user_text)
+        user_msg = Message(sender="user", text=user_text, conversation=key)
         resp = assistant.handle(user_text)
-        Message.objects.create(sender="assistant", text=resp.reply)
-        return redirect("chat:chat")
-    return render(request, "chat/chat.html", {"form": form, "messages": messages})
+        with profiling.span("transcript"):
+            transcript.log(user_msg, Message(sender="assistant", text=resp.reply, conversation=key))
+            # The redirected GET may be served by another worker: write this thread's turn now.
+            transcript.flush(key)
+        return remember_conversation(request, redirect("chat:chat"), key)
+    with profiling.span("history"):
+        messages, older = history(key, request.GET.get("cursor"))
+    with profiling.span("render"):
+        response = render(request, "chat/chat.html", {"form": form, "messages": messages, "older_cursor": older})
+    return remember_conversation(request, response, key)
+
+
+@require_http_methods(["GET"])
+def api_history(request):
+    """``{"results": [...], "next": cursor}`` for this browser's thread, newest first."""
+    key = conversation_key(request)
+    messages, older = history(key, request.GET.get("cursor"), page_size(request, int(getattr(settings, "CHAT_HISTORY_SIZE", 50))))
+    return remember_conversation(request, JsonResponse({"results": [_message_json(m) for m in messages], "next": older}), key)
+
+
+async def api_chat(request):
+    """JSON chat in one round-trip: ``{"text": ...}`` in, both stored messages and the reply out.
+
+    Messages are queued on the write-behind ``transcript`` (so their ``id`` is
+    null in the response) and intent prediction runs in the
+    ``CHAT_INFERENCE_THREADS`` pool; handlers (which query the database) run
+    via ``sync_to_async``. A message with several commands (see
+    ``split_commands``) is classified in one ``predict_many`` call; its
+    ``label`` and ``confidence`` are null.
+    """
+    if request.method != "POST":
+        return JsonResponse({"error": "POST required"}, status=405)
+    if request.content_type == "application/json":
+        try:
+            data = json.loads(request.body or b"{}")
+        except ValueError:
+            data = None
+        if not isinstance(data, dict):
+            return JsonResponse({"error": "invalid JSON"}, status=400)
+    else:
+        data = request.POST
+    form = ChatForm({"text": data.get("text", "")})
+    if not form.is_valid():
+        return JsonResponse({"error": form.errors.get_json_data()}, status=400)
+    text = form.cleaned_data["text"]
+    bot = await sync_to_async(get_assistant)()
+    key = conversation_key(request)
+    user_msg = Message(sender="user", text=text, conversation=key)
+    commands = split_commands(text)
+    loop = asyncio.get_running_loop()
+    if len(commands) > 1:
+        with profiling.span("intent.predict"):
+            labels, confs = await loop.run_in_executor(_executor(), bot.router.predict_many, commands)
+        resp = await sync_to_async(bot.dispatch_many)(commands, labels, confs)
+        label, conf = None, None
+    else:
+        with profiling.span("intent.predict"):  # includes waiting for a free inference thread
+            label, conf = await loop.run_in_executor(_executor(), bot.router.predict, text)
+        resp = await sync_to_async(bot.dispatch)(text, label, conf)
+    reply_msg = Message(sender="assistant", text=resp.reply, conversation=key)
+    # Write-behind; may block briefly on back-pressure, so not on the event loop.
+    with profiling.span("transcript"):
+        await sync_to_async(transcript.log, thread_sensitive=False)(user_msg, reply_msg)
+    return remember_conversation(request, JsonResponse({
+        "reply": resp.reply,
+        "label": label,
+        "confidence": conf,
+        "messages": [_message_json(user_msg), _message_json(reply_msg)],
+    }), key)
 
 
 @staff_member_required
-@require_http_methods(["POST"])  # simple POST retrain endpoint
+@require_http_methods(["POST"])  # simple POST retrain endpoint; ?full=1 forces a rebuild
 def retrain(request):
-    global assistant
-    if assistant is None:
-        assistant = Assistant()
-    msg = assistant.router.train()
-    from django.http import JsonResponse
+    assistant = get_assistant()
+    full = (request.POST.get("full") or request.GET.get("full")) in ("1", "true", "yes")
+    msg = assistant.router.train(full=full)
     return JsonResponse({"status": "ok", "message": msg})
 
 
 @staff_member_required
 @require_http_methods(["GET"])  # report current router status
 def status(request):
-    global assistant
-    if assistant is None:
-        assistant = Assistant()
-    r = assistant.router
-    from django.http import JsonResponse
+    r = get_assistant().router
     data = {
         "enabled": bool(getattr(r, "enabled", False)),
         "trained": bool(getattr(r, "pipeline", None)),
         "labels": list(getattr(r, "labels", []) or []),
         "threshold": float(getattr(r, "threshold", 0.0)),
+        "backend": getattr(getattr(r, "backend", None), "name", None),
+        "mode": getattr(r, "mode", None),
+        "version": getattr(r, "version", None),
+        "fingerprint": getattr(r, "fingerprint", None),
+        "trained_at": getattr(r, "trained_at", None),
+        "cache": r.cache_info() if hasattr(r, "cache_info") else None,
+        "imports": dict(ml.IMPORT_TIMINGS),
+        "warmup": warmup.TIMINGS or None,
     }
     return JsonResponse(data)
+
+
+@require_http_methods(["GET"])
+def metrics(request):
+    """Prometheus text exposition of this worker's request and stage timings.
+
+    Staff only; a scraper can instead send ``Authorization: Bearer <METRICS_TOKEN>``.
+    """
+    token = getattr(settings, "METRICS_TOKEN", "")
+    auth = request.headers.get("Authorization", "")
+    if not (token and hmac.compare_digest(auth, f"Bearer {token}")):
+        if not (request.user.is_active and request.user.is_staff):
+            return HttpResponse("Forbidden\n", status=403, content_type="text/plain")
+    return HttpResponse(profiling.registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@staff_member_required
+@require_http_methods(["GET"])
+def archive_index(request):
+    """Archived months with their size and download URL."""
+    data = [{
+        "month": month,
+        "file": path.name,
+        "bytes": path.stat().st_size,
+        "url": reverse("chat:archive_export", args=[month]),
+    } for month, path in archive.months().items()]
+    return JsonResponse({"months": data})
+
+
+@staff_member_required
+@require_http_methods(["GET"])
+def archive_export(request, month: str):
+    """Stream one month's archive: the compressed file as-is, or JSONL with ``?decode=1``."""
+    path = archive.months().get(month)
+    if path is None:
+        raise Http404("No archive for that month")
+    if request.GET.get("decode") in ("1", "true", "yes"):
+        response = StreamingHttpResponse(archive.iter_raw(path), content_type="application/x-ndjson")
+        response["Content-Disposition"] = f'attachment; filename="{path.name.rsplit(".", 1)[0]}"'
+        return response
+    ext = path.name.rsplit(".", 1)[1]
+    return FileResponse(open(path, "rb"), as_attachment=True, filename=path.name, content_type=archive.CONTENT_TYPES[ext])
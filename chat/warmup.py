@@ -0,0 +1,47 @@
+"""Load the intent model before a worker process accepts traffic.
+
+``personal_assistant.wsgi`` and ``personal_assistant.asgi`` call
+``maybe_warm_up()`` right after building the application, so each server
+worker imports the ML stack and maps the published model at boot instead of
+on its first chat request. Management commands and Celery workers never
+import those modules and stay light. ``TIMINGS`` is reported on ``/status/``.
+"""
+from __future__ import annotations
+import logging
+import time
+from typing import Any, Dict
+
+from django.conf import settings
+
+from . import ml
+
+log = logging.getLogger(__name__)
+TIMINGS: Dict[str, Any] = {}
+
+
+def warm_up() -> Dict[str, Any]:
+    t0 = time.perf_counter()
+    from .views import get_assistant
+    router = get_assistant().router  # loads the published artifact; fits only if there is none
+    t1 = time.perf_counter()
+    router.predict("hello")  # first call pages in the memory-mapped arrays
+    t2 = time.perf_counter()
+    TIMINGS.update(
+        load_s=round(t1 - t0, 4),
+        first_predict_s=round(t2 - t1, 4),
+        total_s=round(t2 - t0, 4),
+        imports=dict(ml.IMPORT_TIMINGS),
+        model_version=router.version,
+        at=time.time(),
+    )
+    log.info("Intent router warm-up: %s", TIMINGS)
+    return TIMINGS
+
+
+def maybe_warm_up() -> None:
+    if not getattr(settings, "INTENT_WARMUP", True):
+        return
+    try:
+        warm_up()
+    except Exception:
+        log.exception("Intent router warm-up failed; the first chat request will load it")
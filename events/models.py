@@ -9,6 +9,7 @@ class Event(models.Model):
 
     class Meta:
         ordering = ["starts_at", "id"]
+        indexes = [models.Index(fields=["starts_at", "id"], name="event_list_idx")]
 
     def __str__(self) -> str:
         return self.title
@@ -4,4 +4,5 @@ from . import views
 app_name = "events"
 urlpatterns = [
     path("", views.list_events, name="list"),
+    path("api/", views.api_list, name="api_list"),
 ]
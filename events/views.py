@@ -1,6 +1,8 @@
 from django.shortcuts import render, redirect
 from django.views.decorators.http import require_http_methods
 from django import forms
+from django.http import JsonResponse
+from personal_assistant.pagination import page_size, paginate
 from .models import Event
 
 class EventForm(forms.ModelForm):
@@ -17,5 +19,12 @@ def list_events(request):
             return redirect("events:list")
     else:
         form = EventForm()
-    events = Event.objects.all()
-    return render(request, "events/list.html", {"events": events, "form": form})
+    page = paginate(Event.objects.all(), request.GET.get("cursor"))
+    return render(request, "events/list.html", {"events": page.items, "next_cursor": page.next_cursor, "form": form})
+
+
+@require_http_methods(["GET"])
+def api_list(request):
+    qs = Event.objects.values("id", "title", "starts_at", "ends_at", "location")
+    page = paginate(qs, request.GET.get("cursor"), page_size(request))
+    return JsonResponse({"results": page.items, "next": page.next_cursor})
@@ -0,0 +1,368 @@
+"""In-process inverted index over Note title/content.
+
+Used by ``notes.search`` when the database has no full-text support. Each
+posting list is a flat ``array('Q')`` of ``doc id, term frequency`` pairs
+sorted by doc id. The index is persisted to ``NOTES_INDEX_PATH`` and loaded
+with ``mmap``: posting lists stay zero-copy views of the file until a note
+touching them changes.
+
+Note signals (see ``notes.signals``) don't rewrite that file: each change is
+appended as one JSON line to a delta log beside it (``notes.idx.log``), and
+workers replay only the lines they haven't seen yet. Once the log outgrows
+``NOTES_INDEX_MERGE_BYTES`` it is merged into a new base file. Base and log
+share a generation id, so a worker notices a merge (or rebuild) and reloads.
+"""
+from __future__ import annotations
+import json
+import math
+import mmap
+import os
+import re
+import struct
+import threading
+import uuid
+from array import array
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+
+from personal_assistant.versions import Versioned
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows: single writer assumed
+    fcntl = None
+
+MAGIC = b"PANIDX02"
+TYPECODE = "Q"  # Note ids are 64-bit (BigAutoField)
+GENERATION_LEN = 16
+K1, B = 1.2, 0.75
+_WORD = re.compile(r"\w+")
+
+
+def stem(word: str) -> str:
+    """Strip the most common English suffixes ("stemming-lite")."""
+    if len(word) <= 3:
+        return word
+    if word.endswith("ies") and len(word) > 4:
+        return word[:-3] + "y"
+    for suffix in ("ing", "ed"):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            word = word[:-len(suffix)]
+            if len(word) > 3 and word[-1] == word[-2] and word[-1] not in "lsz":
+                word = word[:-1]  # running -> run
+            return word
+    if word.endswith("es") and word[-3] in "sxz":
+        return word[:-2]
+    if word.endswith("ly") and len(word) > 5:
+        return word[:-2]
+    if word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    return [stem(w) for w in _WORD.findall(text.lower())]
+
+
+def index_path() -> Path:
+    return Path(getattr(settings, "NOTES_INDEX_PATH", Path(settings.BASE_DIR) / "var" / "notes.idx"))
+
+
+def log_path(path: Path) -> Path:
+    return path.with_name(f"{path.name}.log")
+
+
+class InvertedIndex:
+    def __init__(self) -> None:
+        self.terms: Dict[str, int] = {}
+        self.vocab: List[str] = []
+        self.postings: List[Sequence[int]] = []
+        # doc id -> (token count, term ids in that doc); term ids make removals cheap
+        self.docs: Dict[int, Tuple[int, Sequence[int]]] = {}
+        self.total_len = 0
+        self.generation = ""
+        self._log_offset = 0  # bytes of the delta log already applied
+        self._mmap: Optional[mmap.mmap] = None
+        self._lock = threading.Lock()  # searches vs. catch_up() in another thread
+
+    # --- updates ---
+    def add(self, doc_id: int, title: str, content: str) -> None:
+        self.remove(doc_id)
+        tokens = tokenize(f"{title} {content}")
+        ids = array(TYPECODE)
+        for term, tf in Counter(tokens).items():
+            tid = self.terms.get(term)
+            if tid is None:
+                tid = self.terms[term] = len(self.vocab)
+                self.vocab.append(term)
+                self.postings.append(array(TYPECODE))
+            plist = self._writable(tid)
+            pos = _find(plist, doc_id)
+            plist[pos:pos] = array(TYPECODE, (doc_id, tf))
+            ids.append(tid)
+        self.docs[doc_id] = (len(tokens), ids)
+        self.total_len += len(tokens)
+
+    def remove(self, doc_id: int) -> None:
+        entry = self.docs.pop(doc_id, None)
+        if entry is None:
+            return
+        length, ids = entry
+        self.total_len -= length
+        for tid in ids:
+            plist = self._writable(tid)
+            pos = _find(plist, doc_id)
+            if pos < len(plist) and plist[pos] == doc_id:
+                del plist[pos:pos + 2]
+
+    def _writable(self, tid: int) -> array:
+        plist = self.postings[tid]
+        if not isinstance(plist, array):
+            # Copy-on-write out of the memory-mapped file.
+            plist = self.postings[tid] = array(TYPECODE, plist)
+        return plist
+
+    # --- queries ---
+    def search(self, q: str, limit: int = 50) -> List[Tuple[int, float]]:
+        """BM25-ranked ids of notes containing every query term."""
+        with self._lock:
+            return self._search(q, limit)
+
+    def _search(self, q: str, limit: int) -> List[Tuple[int, float]]:
+        lists = []
+        for term in set(tokenize(q)):
+            tid = self.terms.get(term)
+            if tid is None:
+                return []
+            lists.append(self.postings[tid])
+        if not lists or not self.docs:
+            return []
+        lists.sort(key=len)
+        n = len(self.docs)
+        avgdl = self.total_len / n or 1.0
+        scores: Optional[Dict[int, float]] = None
+        for plist in lists:
+            df = len(plist) // 2
+            idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+            cur: Dict[int, float] = {}
+            for i in range(0, len(plist), 2):
+                doc = plist[i]
+                if scores is not None and doc not in scores:
+                    continue
+                tf = plist[i + 1]
+                dl = self.docs[doc][0]
+                cur[doc] = (scores[doc] if scores else 0.0) + idf * tf * (K1 + 1) / (tf + K1 * (1 - B + B * dl / avgdl))
+            scores = cur
+            if not scores:
+                return []
+        return sorted(scores.items(), key=lambda kv: (-kv[1], -kv[0]))[:limit]
+
+    # --- delta log ---
+    def apply(self, entry: List) -> None:
+        """One log entry: ``[id, title, content]`` adds or replaces a note, ``[id]`` removes it."""
+        if len(entry) == 1:
+            self.remove(entry[0])
+        else:
+            self.add(entry[0], entry[1], entry[2])
+
+    def catch_up(self, path: Path) -> bool:
+        """Apply log entries written since this index was loaded; False if base and log were replaced."""
+        with self._lock:
+            try:
+                with open(log_path(path), "rb") as fh:
+                    if _log_generation(fh) != self.generation:
+                        return False
+                    fh.seek(max(self._log_offset, fh.tell()))
+                    self._log_offset = fh.tell() + _replay(fh.read(), self)
+            except OSError:
+                return False
+            return True
+
+    # --- persistence ---
+    def save(self, path: Path) -> None:
+        """Write a new base file and an empty delta log under a fresh generation."""
+        self.generation = uuid.uuid4().hex[:GENERATION_LEN]
+        data = array(TYPECODE)
+        postings = []
+        for plist in self.postings:
+            postings.append([len(data), len(plist)])
+            data.extend(plist)
+        docs = []
+        for doc, (length, ids) in self.docs.items():
+            docs.append([doc, length, len(data), len(ids)])
+            data.extend(ids)
+        header = json.dumps({"vocab": self.vocab, "postings": postings, "docs": docs, "total_len": self.total_len}).encode("utf-8")
+        pad = -(len(MAGIC) + 4 + len(header)) % data.itemsize
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.tmp")
+        with open(tmp, "wb") as fh:
+            fh.write(MAGIC + self.generation.encode("ascii") + struct.pack("<I", len(header)) + header + b"\0" * pad)
+            data.tofile(fh)
+        os.replace(tmp, path)
+        # A crash between these two replaces leaves a log of the old generation, which is ignored.
+        log = log_path(path)
+        tmp = log.with_name(f".{log.name}.tmp")
+        header_line = _log_header(self.generation)
+        tmp.write_bytes(header_line)
+        os.replace(tmp, log)
+        self._log_offset = len(header_line)
+
+    @classmethod
+    def load(cls, path: Path) -> "InvertedIndex":
+        idx = cls()
+        with open(path, "rb") as fh:
+            mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        if mm[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a notes index")
+        idx.generation = mm[len(MAGIC):len(MAGIC) + GENERATION_LEN].decode("ascii")
+        (hlen,) = struct.unpack_from("<I", mm, len(MAGIC) + GENERATION_LEN)
+        start = len(MAGIC) + GENERATION_LEN + 4
+        header = json.loads(mm[start:start + hlen])
+        offset = start + hlen
+        offset += -offset % array(TYPECODE).itemsize
+        words = memoryview(mm)[offset:].cast(TYPECODE)
+        idx._mmap = mm
+        idx.vocab = header["vocab"]
+        idx.terms = {t: i for i, t in enumerate(idx.vocab)}
+        idx.postings = [words[o:o + n] for o, n in header["postings"]]
+        idx.docs = {doc: (length, words[o:o + n]) for doc, length, o, n in header["docs"]}
+        idx.total_len = header["total_len"]
+        idx.catch_up(path)  # no-op unless the log is of this generation
+        return idx
+
+    @classmethod
+    def build(cls, rows: Iterable[Tuple[int, str, str]]) -> "InvertedIndex":
+        idx = cls()
+        for doc, title, content in rows:
+            idx.add(doc, title, content)
+        return idx
+
+
+def _find(plist: Sequence[int], doc_id: int) -> int:
+    """Offset of ``doc_id``'s pair in a posting list, or where it would go."""
+    lo, hi = 0, len(plist) // 2
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if plist[2 * mid] < doc_id:
+            lo = mid + 1
+        else:
+            hi = mid
+    return 2 * lo
+
+
+def _log_header(generation: str) -> bytes:
+    return json.dumps({"generation": generation}).encode("utf-8") + b"\n"
+
+
+def _log_generation(fh) -> Optional[str]:
+    """Generation of an open delta log, leaving the file positioned after its header line."""
+    try:
+        return json.loads(fh.readline()).get("generation")
+    except ValueError:
+        return None
+
+
+def _replay(data: bytes, idx: InvertedIndex) -> int:
+    """Apply the complete lines of ``data`` to ``idx``; returns the bytes consumed."""
+    end = data.rfind(b"\n") + 1  # a line still being appended is picked up next time
+    for line in data[:end].splitlines():
+        if line:
+            idx.apply(json.loads(line))
+    return end
+
+
+def _base_generation(path: Path) -> Optional[str]:
+    try:
+        with open(path, "rb") as fh:
+            head = fh.read(len(MAGIC) + GENERATION_LEN)
+    except OSError:
+        return None
+    if len(head) < len(MAGIC) + GENERATION_LEN or head[:len(MAGIC)] != MAGIC:
+        return None
+    return head[len(MAGIC):].decode("ascii")
+
+
+def _rows() -> Iterator[Tuple[int, str, str]]:
+    from .models import Note
+    return Note.objects.order_by("id").values_list("id", "title", "content").iterator(chunk_size=2000)
+
+
+@contextmanager
+def _locked(path: Path):
+    """Serialise read-modify-write of the index file across processes."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path.with_name(f"{path.name}.lock"), "a") as fh:
+        if fcntl:
+            fcntl.flock(fh, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+def rebuild() -> InvertedIndex:
+    path = index_path()
+    with _locked(path):
+        idx = InvertedIndex.build(_rows())
+        idx.save(path)
+    index.invalidate()
+    return idx
+
+
+_live: Optional[InvertedIndex] = None
+
+
+def _load_or_build() -> InvertedIndex:
+    """Catch the loaded index up with the delta log; reload only after a merge or rebuild."""
+    global _live
+    path = index_path()
+    if _live is not None and _live.catch_up(path):
+        return _live
+    try:
+        _live = InvertedIndex.load(path)
+    except (OSError, ValueError):
+        _live = rebuild()
+    return _live
+
+
+def _append(entries: List[List]) -> None:
+    """Log note changes for every worker to replay; merge the log into the base once it is large."""
+    path = index_path()
+    with _locked(path):
+        generation = _base_generation(path)
+        if generation is None:
+            InvertedIndex.build(_rows()).save(path)  # the rows already include these changes
+        else:
+            log = log_path(path)
+            try:
+                with open(log, "rb") as fh:
+                    current = _log_generation(fh) == generation
+            except OSError:
+                current = False
+            if not current:
+                log.write_bytes(_log_header(generation))
+            with open(log, "ab") as fh:
+                fh.write(b"".join(json.dumps(e, ensure_ascii=False).encode("utf-8") + b"\n" for e in entries))
+            if log.stat().st_size > int(getattr(settings, "NOTES_INDEX_MERGE_BYTES", 4 << 20)):
+                InvertedIndex.load(path).save(path)
+    index.invalidate()
+
+
+def update(doc_id: int, title: Optional[str] = None, content: Optional[str] = None, delete: bool = False) -> None:
+    """Record one note change and notify other workers."""
+    _append([[doc_id]] if delete else [[doc_id, title or "", content or ""]])
+
+
+def update_many(rows: Iterable[Tuple[int, str, str]]) -> None:
+    """Add or replace many ``(id, title, content)`` notes with one log write (bulk imports)."""
+    entries = [[doc_id, title or "", content or ""] for doc_id, title, content in rows]
+    if entries:
+        _append(entries)
+
+
+index: Versioned[InvertedIndex] = Versioned("notes-index", _load_or_build)
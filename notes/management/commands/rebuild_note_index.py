@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from notes import index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the in-process notes search index file from the database."
+
+    def handle(self, *args, **options):
+        idx = index.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {len(idx.docs)} notes, {len(idx.vocab)} terms -> {index.index_path()}"))
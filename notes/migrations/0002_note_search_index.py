@@ -0,0 +1,66 @@
+from django.db import migrations
+
+# sqlite: an external-content FTS5 table kept in sync with notes_note by triggers.
+# Note: table rebuilds done by later sqlite migrations on notes_note drop these
+# triggers; re-run this migration's forwards SQL if that ever happens.
+FTS_SQL = [
+    """CREATE VIRTUAL TABLE notes_note_fts USING fts5(
+        title, content, content='notes_note', content_rowid='id', tokenize='porter unicode61'
+    )""",
+    """CREATE TRIGGER notes_note_fts_ai AFTER INSERT ON notes_note BEGIN
+        INSERT INTO notes_note_fts(rowid, title, content) VALUES (new.id, new.title, new.content);
+    END""",
+    """CREATE TRIGGER notes_note_fts_ad AFTER DELETE ON notes_note BEGIN
+        INSERT INTO notes_note_fts(notes_note_fts, rowid, title, content) VALUES ('delete', old.id, old.title, old.content);
+    END""",
+    """CREATE TRIGGER notes_note_fts_au AFTER UPDATE ON notes_note BEGIN
+        INSERT INTO notes_note_fts(notes_note_fts, rowid, title, content) VALUES ('delete', old.id, old.title, old.content);
+        INSERT INTO notes_note_fts(rowid, title, content) VALUES (new.id, new.title, new.content);
+    END""",
+    "INSERT INTO notes_note_fts(notes_note_fts) VALUES ('rebuild')",
+]
+FTS_DROP_SQL = [
+    "DROP TRIGGER IF EXISTS notes_note_fts_ai",
+    "DROP TRIGGER IF EXISTS notes_note_fts_ad",
+    "DROP TRIGGER IF EXISTS notes_note_fts_au",
+    "DROP TABLE IF EXISTS notes_note_fts",
+]
+
+
+def _gin_index():
+    from django.contrib.postgres.indexes import GinIndex
+    from notes.search import search_vector
+    return GinIndex(search_vector(), name="notes_note_search_gin")
+
+
+def forwards(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        try:
+            schema_editor.execute(FTS_SQL[0])
+        except Exception:
+            return  # sqlite built without FTS5: search falls back to scanning
+        for sql in FTS_SQL[1:]:
+            schema_editor.execute(sql)
+    elif vendor == "postgresql":
+        schema_editor.add_index(apps.get_model("notes", "Note"), _gin_index())
+
+
+def backwards(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        for sql in FTS_DROP_SQL:
+            schema_editor.execute(sql)
+    elif vendor == "postgresql":
+        schema_editor.remove_index(apps.get_model("notes", "Note"), _gin_index())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
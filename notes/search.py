@@ -0,0 +1,145 @@
+"""Ranked full-text search over notes.
+
+- sqlite with FTS5: ``notes_note_fts`` (migration 0002), BM25 ranking
+- PostgreSQL: ``to_tsvector`` GIN expression index, ``ts_rank`` ranking
+- anything else: the in-process inverted index in ``notes.index``, BM25 ranking
+
+``NOTES_SEARCH_BACKEND`` overrides the choice ("fts5", "postgres", "index",
+or "scan" for the plain ``icontains`` scan).
+
+Hits carry a snippet with matches wrapped in ``HL_START``/``HL_END``; use
+``SearchHit.html`` in templates and ``SearchHit.text`` in chat replies.
+"""
+from __future__ import annotations
+import re
+from dataclasses import dataclass
+from typing import Dict, List
+
+from django.conf import settings
+from django.db import connections
+from django.utils.html import escape
+from django.utils.safestring import SafeString, mark_safe
+
+from .models import Note
+
+HL_START, HL_END = "\x02", "\x03"
+SNIPPET_CHARS = 80
+_backends: Dict[str, str] = {}
+
+
+@dataclass
+class SearchHit:
+    note: Note
+    rank: float
+    snippet: str
+
+    @property
+    def html(self) -> SafeString:
+        return mark_safe(escape(self.snippet).replace(HL_START, "<mark>").replace(HL_END, "</mark>"))
+
+    @property
+    def text(self) -> str:
+        return self.snippet.replace(HL_START, "*").replace(HL_END, "*")
+
+
+def search_vector():
+    from django.contrib.postgres.search import SearchVector
+    # Must stay identical to the indexed expression (migration 0002).
+    return SearchVector("title", "content", config="english")
+
+
+def backend(using: str = "default") -> str:
+    """Which search implementation the database behind ``using`` supports."""
+    if using not in _backends:
+        conn = connections[using]
+        chosen = getattr(settings, "NOTES_SEARCH_BACKEND", "auto")
+        if chosen != "auto":
+            _backends[using] = chosen
+        elif conn.vendor == "postgresql":
+            _backends[using] = "postgres"
+        elif conn.vendor == "sqlite" and "notes_note_fts" in conn.introspection.table_names():
+            _backends[using] = "fts5"
+        else:
+            _backends[using] = "index"
+    return _backends[using]
+
+
+def search(q: str, limit: int = 50) -> List[SearchHit]:
+    """Ranked hits for ``q``; none when it has no word characters to search for."""
+    terms = re.findall(r"\w+", q.lower())
+    if not terms:
+        return []
+    kind = backend()
+    if kind == "fts5":
+        return _search_fts5(terms, limit)
+    if kind == "postgres":
+        return _search_postgres(q, limit)
+    if kind == "index":
+        return _search_index(q, limit)
+    return _search_scan(q.strip(), limit)
+
+
+def _search_fts5(terms: List[str], limit: int) -> List[SearchHit]:
+    # Quote every term (no FTS query syntax from users) and prefix-match it.
+    match = " ".join('"%s"*' % t.replace('"', '""') for t in terms)
+    rows = Note.objects.raw(
+        "SELECT n.id, n.title, n.content, n.created_at,"
+        " bm25(notes_note_fts, 5.0, 1.0) AS search_rank,"
+        " snippet(notes_note_fts, -1, %s, %s, '…', 16) AS search_snippet"
+        " FROM notes_note_fts JOIN notes_note n ON n.id = notes_note_fts.rowid"
+        " WHERE notes_note_fts MATCH %s ORDER BY search_rank LIMIT %s",
+        [HL_START, HL_END, match, limit],
+    )
+    # bm25() is lower-is-better; flip it so every backend ranks higher-is-better.
+    return [SearchHit(n, -n.search_rank, n.search_snippet) for n in rows]
+
+
+def _search_postgres(q: str, limit: int) -> List[SearchHit]:
+    from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank
+    query = SearchQuery(q, config="english", search_type="websearch")
+    vector = search_vector()
+    qs = (
+        Note.objects.alias(search=vector).filter(search=query)
+        .annotate(
+            search_rank=SearchRank(vector, query),
+            search_snippet=SearchHeadline("content", query, config="english", start_sel=HL_START, stop_sel=HL_END, max_words=16, min_words=8),
+        )
+        .order_by("-search_rank", "-id")[:limit]
+    )
+    return [SearchHit(n, n.search_rank, n.search_snippet) for n in qs]
+
+
+def _search_scan(q: str, limit: int) -> List[SearchHit]:
+    qs = Note.objects.filter(title__icontains=q) | Note.objects.filter(content__icontains=q)
+    return [SearchHit(n, 0.0, highlight(n.content, q)) for n in qs[:limit]]
+
+
+def _search_index(q: str, limit: int) -> List[SearchHit]:
+    from . import index
+    ranked = index.index.get().search(q, limit)
+    notes = Note.objects.in_bulk([doc for doc, _ in ranked])
+    stems = set(index.tokenize(q))
+    hits = []
+    for doc, score in ranked:
+        n = notes.get(doc)
+        if n is None:
+            continue  # deleted since the index snapshot was taken
+        m = next((m for m in re.finditer(r"\w+", n.content) if index.stem(m.group().lower()) in stems), None)
+        hits.append(SearchHit(n, score, _window(n.content, m.start(), m.end()) if m else n.content[:SNIPPET_CHARS]))
+    return hits
+
+
+def highlight(content: str, q: str) -> str:
+    """Snippet of ``content`` around the first occurrence of ``q``."""
+    i = content.lower().find(q.lower())
+    if i < 0:
+        return content[:SNIPPET_CHARS]
+    return _window(content, i, i + len(q))
+
+
+def _window(content: str, i: int, end: int) -> str:
+    start = max(0, i - SNIPPET_CHARS // 2)
+    return (
+        ("…" if start else "") + content[start:i] + HL_START + content[i:end] + HL_END
+        + content[end:end + SNIPPET_CHARS // 2] + ("…" if end + SNIPPET_CHARS // 2 < len(content) else "")
+    )
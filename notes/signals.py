@@ -0,0 +1,21 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import index
+from .models import Note
+from .search import backend
+
+
+@receiver(post_save, sender=Note)
+def note_saved(sender, instance, **kwargs):
+    if backend() == "index":
+        pk, title, content = instance.pk, instance.title, instance.content
+        transaction.on_commit(lambda: index.update(pk, title, content))
+
+
+@receiver(post_delete, sender=Note)
+def note_deleted(sender, instance, **kwargs):
+    if backend() == "index":
+        pk = instance.pk
+        transaction.on_commit(lambda: index.update(pk, delete=True))
@@ -4,4 +4,5 @@ from . import views
 app_name = "notes"
 urlpatterns = [
     path("", views.list_notes, name="list"),
+    path("api/", views.api_list, name="api_list"),
 ]
@@ -1,7 +1,10 @@
 from django.shortcuts import render, redirect
 from django.views.decorators.http import require_http_methods
 from django import forms
+from django.http import JsonResponse
+from personal_assistant.pagination import page_size, paginate
 from .models import Note
+from .search import search
 
 class NoteForm(forms.ModelForm):
     class Meta:
@@ -10,10 +13,8 @@ class NoteForm(forms.ModelForm):
 
 @require_http_methods(["GET", "POST"])
 def list_notes(request):
-    q = request.GET.get("q", "")
-    qs = Note.objects.all()
-    if q:
-        qs = qs.filter(title__icontains=q) | qs.filter(content__icontains=q)
+    q = request.GET.get("q", "").strip()
+    hits = search(q) if q else None
     if request.method == "POST":
         form = NoteForm(request.POST)
         if form.is_valid():
@@ -21,4 +22,17 @@ def list_notes(request):
             return redirect("notes:list")
     else:
         form = NoteForm()
-    return render(request, "notes/list.html", {"notes": qs, "form": form, "q": q})
+    page = paginate(Note.objects.all(), request.GET.get("cursor")) if hits is None else None
+    return render(request, "notes/list.html", {
+        "notes": page.items if page else [],
+        "next_cursor": page.next_cursor if page else None,
+        "hits": hits, "form": form, "q": q,
+    })
+
+
+@require_http_methods(["GET"])
+def api_list(request):
+    qs = Note.objects.values("id", "title", "content", "created_at")
+    page = paginate(qs, request.GET.get("cursor"), page_size(request))
+    return JsonResponse({"results": page.items, "next": page.next_cursor})
+
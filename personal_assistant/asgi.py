@@ -3,3 +3,8 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", os.getenv("DJANGO_SETTINGS_MODULE", "personal_assistant.settings.dev"))
 application = get_asgi_application()
+
+# Load the intent model now rather than on the first chat request (INTENT_WARMUP).
+from chat.warmup import maybe_warm_up  # noqa: E402
+
+maybe_warm_up()
@@ -0,0 +1,378 @@
+"""Synthetic load for the chat pipeline, in-process or against real servers.
+
+``python manage.py loadtest`` seeds a throwaway database with tasks, notes,
+reminders, events, chat messages and training phrases, then runs virtual
+users that mix chat posts, ``/reminders/api/due/`` polling and list pages
+for a fixed duration, and reports requests/sec and latency percentiles.
+
+Modes:
+
+- ``client``: Django's WSGI handler in this process, one thread per user
+- ``async-client``: the ASGI handler in this process, one task per user
+- ``wsgi`` / ``asgi``: gunicorn / uvicorn subprocesses with ``--workers``
+  processes each, driven over HTTP (needs those packages installed)
+- ``url``: an already running server, driven over HTTP (no seeding; use
+  ``--seed-only`` against that server's database first)
+
+The database is whatever ``DATABASE_URL`` points at (SQLite or PostgreSQL);
+a test copy is created and destroyed around the run.
+"""
+from __future__ import annotations
+import asyncio
+import http.client
+import os
+import random
+import re
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+from http.cookies import SimpleCookie
+from importlib.util import find_spec
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import quote, urlencode, urlparse
+
+from django.conf import settings
+from django.db import connection, connections
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings
+
+from chat.benchmarks import ROUTING_CORPUS, percentile
+
+MODES = ("client", "async-client", "wsgi", "asgi", "url")
+SERVERS = {"wsgi": "gunicorn", "asgi": "uvicorn"}
+LIST_PATHS = ("/tasks/", "/notes/", "/reminders/", "/events/")
+CHAT_TEXTS = [text for text, _ in ROUTING_CORPUS]
+DEFAULT_MIX = {"chat": 3, "due": 4, "lists": 3}
+
+
+def seed(rows: int) -> Dict[str, int]:
+    """Seed ``rows`` rows per model plus training phrases into the current database."""
+    from chat.models import TrainingPhrase
+    from personal_assistant import perfcheck
+    perfcheck.seed_fixed()
+    counts = perfcheck.seed(rows)
+    TrainingPhrase.objects.bulk_create(
+        [TrainingPhrase(label=label, text=text) for text, label in ROUTING_CORPUS], ignore_conflicts=True
+    )
+    counts["chat.TrainingPhrase"] = TrainingPhrase.objects.count()
+    return counts
+
+
+# --- results ---
+@dataclass
+class Stats:
+    latencies: Dict[str, List[float]] = field(default_factory=dict)
+    errors: Dict[str, int] = field(default_factory=dict)
+    elapsed: float = 0.0  # wall time of the measured phase
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def add(self, group: str, seconds: float, ok: bool) -> None:
+        with self.lock:
+            self.latencies.setdefault(group, []).append(seconds)
+            if not ok:
+                self.errors[group] = self.errors.get(group, 0) + 1
+
+    def summary(self) -> Dict[str, Any]:
+        elapsed = self.elapsed or 1.0
+
+        def row(values: List[float], errors: int) -> Dict[str, Any]:
+            return {
+                "requests": len(values),
+                "errors": errors,
+                "rps": round(len(values) / elapsed, 1),
+                "p50_ms": round(percentile(values, 50) * 1000, 2),
+                "p90_ms": round(percentile(values, 90) * 1000, 2),
+                "p99_ms": round(percentile(values, 99) * 1000, 2),
+                "max_ms": round(max(values, default=0) * 1000, 2),
+            }
+        everything = [v for values in self.latencies.values() for v in values]
+        return {
+            "total": row(everything, sum(self.errors.values())),
+            "by_group": {g: row(v, self.errors.get(g, 0)) for g, v in sorted(self.latencies.items())},
+        }
+
+
+def _choose(rng: random.Random, mix: Dict[str, int]) -> Tuple[str, str, Optional[Dict[str, str]]]:
+    """(group, path, form data or None for GET) for the next request of a user."""
+    group = rng.choices(list(mix), weights=list(mix.values()))[0]
+    if group == "chat":
+        return group, "/", {"text": rng.choice(CHAT_TEXTS)}
+    if group == "due":
+        return group, "/reminders/api/due/", None
+    return group, rng.choice(LIST_PATHS), None
+
+
+# --- in-process drivers ---
+def run_client(users: int, duration: float, mix: Dict[str, int], seed_: int = 0) -> Stats:
+    stats = Stats()
+    deadline = time.perf_counter() + duration
+
+    def user(n: int) -> None:
+        rng, client = random.Random(seed_ + n), Client()
+        try:
+            while time.perf_counter() < deadline:
+                group, path, data = _choose(rng, mix)
+                started = time.perf_counter()
+                try:
+                    status = (client.post(path, data) if data is not None else client.get(path)).status_code
+                except Exception:
+                    status = 599
+                stats.add(group, time.perf_counter() - started, status < 400)
+        finally:
+            connections.close_all()
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=user, args=(n,)) for n in range(users)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    stats.elapsed = time.perf_counter() - started
+    return stats
+
+
+def run_async_client(users: int, duration: float, mix: Dict[str, int], seed_: int = 0) -> Stats:
+    stats = Stats()
+
+    async def user(n: int, deadline: float) -> None:
+        rng, client = random.Random(seed_ + n), AsyncClient()
+        while time.perf_counter() < deadline:
+            group, path, data = _choose(rng, mix)
+            started = time.perf_counter()
+            try:
+                status = (await (client.post(path, data) if data is not None else client.get(path))).status_code
+            except Exception:
+                status = 599
+            stats.add(group, time.perf_counter() - started, status < 400)
+
+    async def main() -> None:
+        deadline = time.perf_counter() + duration
+        await asyncio.gather(*(user(n, deadline) for n in range(users)))
+
+    started = time.perf_counter()
+    asyncio.run(main())
+    stats.elapsed = time.perf_counter() - started
+    return stats
+
+
+# --- HTTP driver ---
+_CSRF_INPUT = re.compile(rb'name="csrfmiddlewaretoken" value="([^"]+)"')
+
+
+class HttpUser:
+    """One keep-alive connection with its own cookies (CSRF token, chat thread)."""
+
+    def __init__(self, base: str, timeout: float = 30.0) -> None:
+        u = urlparse(base)
+        self.host, self.port, self.timeout = u.hostname or "127.0.0.1", u.port or 80, timeout
+        self.cookies: Dict[str, str] = {}
+        self.csrf = ""
+        self.conn: Optional[http.client.HTTPConnection] = None
+
+    def request(self, method: str, path: str, data: Optional[Dict[str, str]] = None) -> Tuple[int, bytes]:
+        headers = {"Host": f"{self.host}:{self.port}"}
+        if self.cookies:
+            headers["Cookie"] = "; ".join(f"{k}={v}" for k, v in self.cookies.items())
+        body = None
+        if data is not None:
+            body = urlencode({**data, "csrfmiddlewaretoken": self.csrf})
+            headers.update({"Content-Type": "application/x-www-form-urlencoded", "X-CSRFToken": self.csrf,
+                            "Referer": f"http://{self.host}:{self.port}/"})
+        for attempt in (0, 1):
+            if self.conn is None:
+                self.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            try:
+                self.conn.request(method, path, body=body, headers=headers)
+                resp = self.conn.getresponse()
+                payload = resp.read()
+                break
+            except (http.client.HTTPException, ConnectionError):
+                # Server closed the keep-alive connection; reconnect once.
+                self.conn.close()
+                self.conn = None
+                if attempt:
+                    raise
+        for header in resp.headers.get_all("Set-Cookie") or []:
+            for name, morsel in SimpleCookie(header).items():
+                self.cookies[name] = morsel.value
+        return resp.status, payload
+
+    def login(self) -> None:
+        """Load the chat page once for the CSRF token and conversation cookie."""
+        _, page = self.request("GET", "/")
+        m = _CSRF_INPUT.search(page)
+        self.csrf = m.group(1).decode() if m else self.cookies.get("csrftoken", "")
+
+    def close(self) -> None:
+        if self.conn is not None:
+            self.conn.close()
+
+
+def run_http(base: str, users: int, duration: float, mix: Dict[str, int], seed_: int = 0) -> Stats:
+    stats = Stats()
+    start: List[float] = []
+    # Everyone has a CSRF token before the clock starts.
+    ready = threading.Barrier(users + 1, action=lambda: start.append(time.perf_counter()))
+
+    def user(n: int) -> None:
+        rng, client = random.Random(seed_ + n), HttpUser(base)
+        try:
+            client.login()
+        finally:
+            ready.wait()
+        try:
+            while time.perf_counter() < start[0] + duration:
+                group, path, data = _choose(rng, mix)
+                started = time.perf_counter()
+                try:
+                    status, _ = client.request("POST" if data is not None else "GET", path, data)
+                except (OSError, http.client.HTTPException):
+                    status = 599
+                stats.add(group, time.perf_counter() - started, status < 400)
+        finally:
+            client.close()
+
+    threads = [threading.Thread(target=user, args=(n,)) for n in range(users)]
+    for t in threads:
+        t.start()
+    ready.wait()
+    for t in threads:
+        t.join()
+    stats.elapsed = time.perf_counter() - start[0]
+    return stats
+
+
+# --- servers ---
+def server_available(mode: str) -> bool:
+    return find_spec(SERVERS[mode]) is not None
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def database_url() -> str:
+    """``DATABASE_URL`` for the database this process is connected to (the test copy)."""
+    db = connection.settings_dict
+    if connection.vendor == "sqlite":
+        return f"sqlite:///{Path(db['NAME']).resolve()}"
+    auth = quote(db["USER"] or "", safe="") + (f":{quote(db['PASSWORD'], safe='')}" if db.get("PASSWORD") else "")
+    return f"postgresql://{auth}@{db['HOST'] or 'localhost'}:{db['PORT'] or 5432}/{db['NAME']}"
+
+
+def start_server(mode: str, workers: int, env: Dict[str, str], threads: int = 4) -> Tuple[subprocess.Popen, str]:
+    port = _free_port()
+    if mode == "wsgi":
+        cmd = [sys.executable, "-m", "gunicorn", "personal_assistant.wsgi:application", "--bind", f"127.0.0.1:{port}",
+               "--workers", str(workers), "--threads", str(threads), "--log-level", "warning"]
+    else:
+        cmd = [sys.executable, "-m", "uvicorn", "personal_assistant.asgi:application", "--host", "127.0.0.1",
+               "--port", str(port), "--workers", str(workers), "--log-level", "warning"]
+    proc = subprocess.Popen(cmd, cwd=settings.BASE_DIR, env={**os.environ, **env})
+    base = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"{SERVERS[mode]} exited with code {proc.returncode}")
+        try:
+            status, _ = HttpUser(base, timeout=2).request("GET", "/reminders/api/due/")
+            if status < 500:
+                return proc, base
+        except OSError:
+            time.sleep(0.2)
+    stop_server(proc)
+    raise RuntimeError(f"{SERVERS[mode]} did not start within 60s")
+
+
+def stop_server(proc: subprocess.Popen) -> None:
+    proc.terminate()
+    try:
+        proc.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+
+
+@dataclass
+class Scenario:
+    modes: Sequence[str] = ("client",)
+    workers: Sequence[int] = (1,)
+    users: int = 8
+    duration: float = 10.0
+    rows: int = 10_000
+    mix: Dict[str, int] = field(default_factory=lambda: dict(DEFAULT_MIX))
+    url: str = ""
+    threads: int = 4
+
+
+def run(scenario: Scenario, log: Callable[[str], None] = lambda s: None) -> Dict[str, Any]:
+    """Seed a test database once and run every mode x worker-count combination."""
+    from chat.ml import IntentRouter
+    from chat import views as chat_views
+
+    runs: List[Dict[str, Any]] = []
+    needs_db = any(m != "url" for m in scenario.modes)
+    tmp = Path(tempfile.mkdtemp(prefix="loadtest-"))
+    old_name = None
+    vendor = connection.vendor
+    try:
+        with override_settings(INTENT_MODEL_DIR=tmp / "models", NOTES_INDEX_PATH=tmp / "notes.idx"):
+            if needs_db:
+                if connection.vendor == "sqlite":
+                    # A file, not the default in-memory test database, so server processes can open it.
+                    connection.settings_dict.setdefault("TEST", {})["NAME"] = str(tmp / "loadtest.sqlite3")
+                old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+                started = time.perf_counter()
+                counts = seed(scenario.rows)
+                log(f"seeded {counts} in {time.perf_counter() - started:.1f}s")
+                # Publish a model trained on the seeded phrases; servers load it instead of training at boot.
+                IntentRouter().train()
+                chat_views.assistant = None
+            env = {
+                "DATABASE_URL": database_url() if needs_db else "",
+                "INTENT_MODEL_DIR": str(tmp / "models"),
+                "NOTES_INDEX_PATH": str(tmp / "notes.idx"),
+                "DJANGO_SETTINGS_MODULE": os.environ.get("DJANGO_SETTINGS_MODULE", "personal_assistant.settings.dev"),
+            }
+            for mode in scenario.modes:
+                for workers in (scenario.workers if mode in SERVERS else (1,)):
+                    log(f"{mode} workers={workers} users={scenario.users} for {scenario.duration:g}s")
+                    if mode == "client":
+                        stats = run_client(scenario.users, scenario.duration, scenario.mix)
+                    elif mode == "async-client":
+                        stats = run_async_client(scenario.users, scenario.duration, scenario.mix)
+                    elif mode == "url":
+                        stats = run_http(scenario.url, scenario.users, scenario.duration, scenario.mix)
+                    else:
+                        proc, base = start_server(mode, workers, env, scenario.threads)
+                        try:
+                            stats = run_http(base, scenario.users, scenario.duration, scenario.mix)
+                        finally:
+                            stop_server(proc)
+                    runs.append({
+                        "mode": mode,
+                        "server": SERVERS.get(mode, scenario.url if mode == "url" else "in-process"),
+                        "workers": workers,
+                        "users": scenario.users,
+                        **stats.summary(),
+                    })
+    finally:
+        chat_views.assistant = None
+        if old_name is not None:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+        shutil.rmtree(tmp, ignore_errors=True)
+    return {
+        "database": vendor if needs_db else "(server's own)",
+        "rows_per_model": scenario.rows if needs_db else None,
+        "duration_s": scenario.duration,
+        "mix": scenario.mix,
+        "runs": runs,
+    }
@@ -0,0 +1,292 @@
+"""Query-count and latency budgets for every view and chat intent.
+
+``python manage.py perfcheck`` builds a throwaway test database, seeds it
+at increasing sizes (``SIZES`` rows per model), and at each size requests
+every URL in ``personal_assistant.urls`` through the test client and runs
+every ``Assistant`` intent. A check fails when it runs more queries than its
+budget, when its query count changes between sizes (an N+1 or an unbounded
+queryset), when its median latency exceeds its budget, or when the latency
+at the largest size exceeds ``growth`` times the latency at the smallest.
+
+Every named URL outside the admin must have an ``EndpointCheck``; a new view
+without one fails the run until a budget is added here.
+"""
+from __future__ import annotations
+import random
+import statistics
+import tempfile
+import time
+from dataclasses import dataclass, field
+from datetime import timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+from django.utils.timezone import now
+
+SIZES = (100, 10_000, 100_000)
+CONVERSATION = "perfcheck-conversation-0001"
+RARE = "kumquat"  # in a fixed number of notes at every size, so searching it tests index use, not match count
+WORDS = (
+    "milk bread report invoice meeting dentist garden budget travel passport email client review "
+    "draft slides call plumber renew insurance birthday gift project deadline backup server lunch "
+    "gym doctor school pickup groceries laundry rent taxes flight hotel train ticket recipe"
+).split()
+
+
+@dataclass
+class EndpointCheck:
+    name: str  # URL name, e.g. "tasks:list"
+    max_queries: int
+    max_ms: float = 100.0
+    method: str = "get"
+    query: str = ""
+    data: Optional[Dict[str, Any]] = None
+    staff: bool = False
+    args: Optional[Callable[[], List[Any]]] = None  # URL args, evaluated per run after seeding
+    setup: Optional[Callable[[], None]] = None
+
+    @property
+    def label(self) -> str:
+        return f"{self.method.upper()} {self.name}{'?' + self.query if self.query else ''}"
+
+
+@dataclass
+class IntentCheck:
+    label: str  # router label passed straight to Assistant.dispatch
+    text: str
+    max_queries: int
+    max_ms: float = 50.0
+
+    @property
+    def key(self) -> str:
+        return f"intent {self.label}: {self.text}"
+
+
+def _first_id(model: Any) -> Callable[[], List[Any]]:
+    return lambda: [model.objects.order_by("id").values_list("id", flat=True).first()]
+
+
+def _archive_month() -> None:
+    from chat import archive
+    archive._append(archive.month_path("2000-01"), [b'{"id": 1, "sender": "user", "text": "hi"}\n'])
+
+
+def endpoint_checks() -> List[EndpointCheck]:
+    from events.models import Event
+    from reminders.models import Reminder
+    from tasks.models import Task
+    return [
+        EndpointCheck("chat:chat", 1),
+        EndpointCheck("chat:chat", 4, method="post", data={"text": "add task buy milk tomorrow"}),
+        EndpointCheck("chat:api_chat", 1, method="post", data={"text": "add task call the bank in 2 hours"}),
+        EndpointCheck("chat:api_history", 1),
+        EndpointCheck("chat:retrain", 3, max_ms=2000, method="post", staff=True),
+        EndpointCheck("chat:status", 2, staff=True),
+        EndpointCheck("chat:metrics", 2, staff=True),
+        EndpointCheck("chat:archive", 2, staff=True),
+        EndpointCheck("chat:archive_export", 2, staff=True, args=lambda: ["2000-01"], setup=_archive_month),
+        EndpointCheck("tasks:list", 1),
+        EndpointCheck("tasks:list", 1, method="post", data={"title": "perfcheck task"}),
+        EndpointCheck("tasks:api_list", 1),
+        EndpointCheck("tasks:complete", 3, method="post", args=_first_id(Task)),
+        EndpointCheck("notes:list", 1),
+        EndpointCheck("notes:list", 1, query=f"q={RARE}"),
+        EndpointCheck("notes:list", 1, method="post", data={"title": "perfcheck", "content": "note body"}),
+        EndpointCheck("notes:api_list", 1),
+        EndpointCheck("reminders:list", 1),
+        EndpointCheck("reminders:api_list", 1),
+        EndpointCheck("reminders:cancel", 5, method="post", args=_first_id(Reminder)),
+        EndpointCheck("reminders:api_due", 3),
+        EndpointCheck("reminders:stream", 0),
+        EndpointCheck("events:list", 1),
+        EndpointCheck("events:api_list", 1),
+        EndpointCheck("profileapp:about", 3),
+        EndpointCheck("transfer:index", 2, staff=True),
+        # Time to first byte: the test client doesn't consume the streamed body.
+        EndpointCheck("transfer:export", 2, staff=True, args=lambda: ["tasks", "csv"]),
+    ]
+
+
+INTENT_CHECKS = [
+    IntentCheck("tasks", "add task renew passport in 3 weeks", 1),
+    IntentCheck("notes", "note groceries: milk, eggs", 1),
+    IntentCheck("notes", f"search notes {RARE}", 1),
+    IntentCheck("reminders", "remind me in 10 minutes to stretch", 1),
+    IntentCheck("events", "add event 2030-01-15 14:00 - Review @ Office", 1),
+    IntentCheck("time", "what time is it", 0),
+    IntentCheck("smalltalk", "hello there", 0),
+    IntentCheck("profile", "about me", 0),
+    IntentCheck("projects", "my projects", 2),
+    IntentCheck("help", "help", 0),
+]
+
+
+def url_names(resolver: Optional[URLResolver] = None, prefix: str = "") -> List[str]:
+    """Every named route in the URLconf (admin excluded)."""
+    names: List[str] = []
+    for p in (resolver or get_resolver()).url_patterns:
+        if isinstance(p, URLResolver):
+            ns = f"{prefix}{p.namespace}:" if p.namespace else prefix
+            if p.namespace != "admin":
+                names.extend(url_names(p, ns))
+        elif isinstance(p, URLPattern) and p.name:
+            names.append(prefix + p.name)
+    return names
+
+
+# --- seeding ---
+def _text(rng: random.Random, n: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(n))
+
+
+def seed_fixed() -> None:
+    """Data that doesn't scale with usage: profile, persona, projects, FAQs, smalltalk."""
+    from chat.models import SmalltalkPair
+    from profileapp.models import Persona, Profile, Project, QAPair
+    Profile.objects.create(display_name="Perf Check", short_bio="Benchmarks things.", full_bio="Long bio.")
+    Persona.objects.create(tone="friendly", greeting_template="Hi!", closing_template="Cheers.")
+    Project.objects.bulk_create([Project(title=f"Project {i}", summary="summary", order=i) for i in range(20)])
+    QAPair.objects.bulk_create([QAPair(question=f"Question {i}?", answer="Answer.") for i in range(20)])
+    SmalltalkPair.objects.bulk_create([SmalltalkPair(pattern=f"phrase {i}", answers="ok|sure") for i in range(50)])
+
+
+def seed(size: int, batch: int = 2000) -> Dict[str, int]:
+    """Top up tasks, notes, reminders, events and chat messages to ``size`` rows each."""
+    from chat.models import Message
+    from events.models import Event
+    from notes.models import Note
+    from reminders.models import Reminder
+    from tasks.models import Task
+    rng = random.Random(size)
+    start = now()
+    makers: Dict[Any, Callable[[int], Any]] = {
+        Task: lambda i: Task(title=_text(rng, 4), is_completed=i % 3 == 0, due_at=start + timedelta(hours=i % 5000) if i % 2 else None),
+        Note: lambda i: Note(title=_text(rng, 3), content=_text(rng, 40) + (f" {RARE}" if i < 50 else "")),
+        # All in the future, so polling for due reminders stays a no-op.
+        Reminder: lambda i: Reminder(message=_text(rng, 5), due_at=start + timedelta(days=1, minutes=i), delivered=i % 4 == 0, notified=i % 4 == 0),
+        Event: lambda i: Event(title=_text(rng, 3), starts_at=start + timedelta(hours=i - size // 2), location=rng.choice(WORDS)),
+        Message: lambda i: Message(sender="user" if i % 2 else "assistant", text=_text(rng, 12), conversation=CONVERSATION,
+                                   created_at=start - timedelta(seconds=size - i)),
+    }
+    counts = {}
+    for model, make in makers.items():
+        have = model.objects.count()
+        for lo in range(have, size, batch):
+            model.objects.bulk_create([make(i) for i in range(lo, min(size, lo + batch))])
+        counts[model._meta.label] = max(have, size)
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cur:
+            cur.execute("ANALYZE")  # what autovacuum would have done on a real database
+    return counts
+
+
+# --- measurement ---
+@dataclass
+class Result:
+    key: str
+    max_queries: int
+    max_ms: float
+    queries: Dict[int, int] = field(default_factory=dict)
+    ms: Dict[int, float] = field(default_factory=dict)
+    statuses: Dict[int, int] = field(default_factory=dict)
+    failures: List[str] = field(default_factory=list)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"check": self.key, "budget": {"queries": self.max_queries, "ms": self.max_ms},
+                "queries": self.queries, "ms": self.ms, "status": self.statuses, "failures": self.failures}
+
+
+def _measure(fn: Callable[[], Any], repeat: int) -> tuple[int, float, Any]:
+    fn()  # warm caches (persona, smalltalk matcher, model) and the connection
+    queries, timings, out = 0, [], None
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as ctx:
+            started = time.perf_counter()
+            out = fn()
+            timings.append(time.perf_counter() - started)
+        queries = max(queries, len(ctx.captured_queries))
+    return queries, statistics.median(timings) * 1000, out
+
+
+def _endpoint_call(check: EndpointCheck, client: Client) -> Callable[[], Any]:
+    def call():
+        path = reverse(check.name, args=check.args() if check.args else None)
+        if check.query:
+            path += "?" + check.query
+        return getattr(client, check.method)(path, check.data or {})
+    return call
+
+
+def run(sizes: Sequence[int] = SIZES, repeat: int = 5, growth: float = 3.0, only: str = "",
+        log: Callable[[str], None] = lambda s: None) -> Dict[str, Any]:
+    """Seed, measure and judge every check; see the module docstring."""
+    from chat import views as chat_views
+    from chat.services import Assistant
+
+    checks = endpoint_checks()
+    missing = sorted(set(url_names()) - {c.name for c in checks})
+    endpoints = [c for c in checks if only in c.label]
+    intents = [c for c in INTENT_CHECKS if only in c.key]
+    results = {c.label: Result(c.label, c.max_queries, c.max_ms) for c in endpoints}
+    results.update({c.key: Result(c.key, c.max_queries, c.max_ms) for c in intents})
+
+    with tempfile.TemporaryDirectory() as tmp, override_settings(
+        CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "perfcheck"},
+                "shared": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "perfcheck-shared"}},
+        INTENT_MODEL_DIR=Path(tmp) / "models", NOTES_INDEX_PATH=Path(tmp) / "notes.idx",
+        CHAT_ARCHIVE_DIR=Path(tmp) / "archive", PROFILING_DIR=Path(tmp) / "profiles",
+    ):
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            seed_fixed()
+            staff = get_user_model().objects.create_user("perfcheck", password="x", is_staff=True)
+            client, staff_client = Client(), Client()
+            staff_client.force_login(staff)
+            for c in (client, staff_client):
+                c.cookies[chat_views.CONVERSATION_COOKIE] = CONVERSATION
+            chat_views.assistant = None  # rebuild against this database
+            assistant = chat_views.get_assistant()
+            for c in endpoints:
+                if c.setup:
+                    c.setup()
+            for size in sorted(sizes):
+                started = time.perf_counter()
+                seed(size)
+                log(f"seeded {size} rows per model in {time.perf_counter() - started:.1f}s")
+                for c in endpoints:
+                    q, ms, response = _measure(_endpoint_call(c, staff_client if c.staff else client), repeat)
+                    r = results[c.label]
+                    r.queries[size], r.ms[size], r.statuses[size] = q, round(ms, 2), response.status_code
+                for c in intents:
+                    q, ms, _ = _measure(lambda: assistant.dispatch(c.text, c.label, 1.0), repeat)
+                    r = results[c.key]
+                    r.queries[size], r.ms[size] = q, round(ms, 2)
+        finally:
+            chat_views.assistant = None
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    for r in results.values():
+        small, large = min(r.ms), max(r.ms)
+        if any(s >= 400 for s in r.statuses.values()):
+            r.failures.append(f"HTTP {max(r.statuses.values())}")
+        if max(r.queries.values()) > r.max_queries:
+            r.failures.append(f"{max(r.queries.values())} queries > budget {r.max_queries}")
+        if len(set(r.queries.values())) > 1:
+            r.failures.append("query count changes with data size")
+        if r.ms[large] > r.max_ms:
+            r.failures.append(f"{r.ms[large]:.1f}ms > budget {r.max_ms:g}ms")
+        if large != small and r.ms[large] > growth * r.ms[small] + 2:
+            r.failures.append(f"latency grows {r.ms[large] / max(r.ms[small], 0.001):.1f}x from {small} to {large} rows")
+    failed = [r.key for r in results.values() if r.failures]
+    return {
+        "sizes": sorted(sizes),
+        "database": connection.vendor,
+        "results": [r.as_dict() for r in results.values()],
+        "unbudgeted_urls": missing,
+        "failed": failed + [f"no budget for {name}" for name in missing],
+    }
@@ -0,0 +1,324 @@
+"""Per-request timings, query counts and Prometheus metrics.
+
+``ProfilingMiddleware`` (active when ``PROFILING_ENABLED`` is set) opens a
+``RequestProfile`` for every request. Code on the hot path marks stages with
+``span(name)``; each span records its wall time and the SQL queries run inside
+it, and the request as a whole records its total time, query count and query
+time. Queries are counted by an execute wrapper installed on every database
+connection, and the current profile lives in a context variable, so ORM calls
+made through ``sync_to_async`` are attributed to the right request too.
+
+Results go into an in-process ``Registry`` rendered in the Prometheus text
+format at ``/metrics/`` (one registry per worker process, so scrape each
+worker or run a single one) and into a ``Server-Timing`` response header.
+Optionally a sample of requests (``PROFILING_SAMPLE_RATE``) runs under
+cProfile, or pyinstrument when installed, and the profile of any sampled
+request slower than ``PROFILING_SLOW_MS`` is written to ``PROFILING_DIR``.
+"""
+from __future__ import annotations
+import bisect
+import contextvars
+import cProfile
+import random
+import threading
+import time
+from importlib.util import find_spec
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+PYINSTRUMENT_OK = find_spec("pyinstrument") is not None
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_current: contextvars.ContextVar[Optional["RequestProfile"]] = contextvars.ContextVar("request_profile", default=None)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    def __init__(self, name: str, doc: str, labels: Sequence[str] = ()) -> None:
+        self.name, self.doc, self.labelnames = name, doc, tuple(labels)
+        self.values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        self.values[labels] = self.values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        out = [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self.values.items()):
+            out.append(f"{self.name}{_labels(self.labelnames, labels)} {value:g}")
+        return out
+
+
+class Histogram:
+    def __init__(self, name: str, doc: str, labels: Sequence[str] = (), buckets: Sequence[float] = BUCKETS) -> None:
+        self.name, self.doc, self.labelnames = name, doc, tuple(labels)
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts..., +Inf count], sum
+        self.values: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        counts, total = self.values.setdefault(labels, ([0] * (len(self.buckets) + 1), [0.0]))
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        total[0] += value
+
+    def render(self) -> List[str]:
+        out = [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total) in sorted(self.values.items()):
+            running = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                running += n
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                bucket = _labels(self.labelnames, labels, 'le="%s"' % le)
+                out.append(f"{self.name}_bucket{bucket} {running}")
+            out.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {total[0]:.6f}")
+            out.append(f"{self.name}_count{_labels(self.labelnames, labels)} {running}")
+        return out
+
+
+class Registry:
+    """The metrics this module records; ``render()`` is the /metrics/ body."""
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.requests = Counter("pa_http_requests_total", "Requests by view, method and status.", ("view", "method", "status"))
+        self.latency = Histogram("pa_http_request_duration_seconds", "Request wall time by view.", ("view",))
+        self.queries = Counter("pa_db_queries_total", "SQL queries run while handling requests, by view.", ("view",))
+        self.query_time = Counter("pa_db_query_seconds_total", "Time spent in SQL queries, by view.", ("view",))
+        self.spans = Histogram("pa_span_duration_seconds", "Wall time of instrumented stages.", ("span",))
+        self.span_queries = Counter("pa_span_queries_total", "SQL queries run inside each stage.", ("span",))
+        self.profiles = Counter("pa_profiles_written_total", "Slow-request profiles written to PROFILING_DIR.")
+
+    def record(self, profile: "RequestProfile", view: str, method: str, status: int, elapsed: float) -> None:
+        with self.lock:
+            self.requests.inc(view, method, str(status))
+            self.latency.observe(elapsed, view)
+            self.queries.inc(view, amount=profile.queries)
+            self.query_time.inc(view, amount=profile.query_time)
+            for name, seconds, queries in profile.spans:
+                self.spans.observe(seconds, name)
+                self.span_queries.inc(name, amount=queries)
+
+    def render(self) -> str:
+        with self.lock:
+            metrics = (self.requests, self.latency, self.queries, self.query_time, self.spans, self.span_queries, self.profiles)
+            return "\n".join(line for m in metrics for line in m.render()) + "\n"
+
+
+registry = Registry()
+
+
+class RequestProfile:
+    __slots__ = ("queries", "query_time", "spans")
+
+    def __init__(self) -> None:
+        self.queries = 0
+        self.query_time = 0.0
+        self.spans: List[Tuple[str, float, int]] = []
+
+    def server_timing(self) -> str:
+        totals: Dict[str, float] = {}
+        for name, seconds, _ in self.spans:
+            totals[name] = totals.get(name, 0.0) + seconds
+        parts = [f"{name.replace('.', '-')};dur={seconds * 1000:.2f}" for name, seconds in totals.items()]
+        parts.append(f"db;desc=\"{self.queries} queries\";dur={self.query_time * 1000:.2f}")
+        return ", ".join(parts)
+
+
+class span:
+    """Time a stage of the current request: ``with span("intent.predict"): ...``.
+
+    A no-op outside a profiled request. Nested spans are recorded separately
+    (each with its own inclusive time).
+    """
+    __slots__ = ("name", "profile", "started", "queries")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.profile = _current.get()
+
+    def __enter__(self) -> "span":
+        if self.profile is not None:
+            self.queries = self.profile.queries
+            self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        if self.profile is not None:
+            self.profile.spans.append((self.name, time.perf_counter() - self.started, self.profile.queries - self.queries))
+
+
+def current() -> Optional[RequestProfile]:
+    return _current.get()
+
+
+def _count_query(execute, sql, params, many, context):
+    profile = _current.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.queries += 1
+        profile.query_time += time.perf_counter() - started
+
+
+def _install_wrapper(sender=None, connection=None, **kwargs) -> None:
+    if _count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_count_query)
+
+
+def install() -> None:
+    """Count queries on every database connection, current and future."""
+    connection_created.connect(_install_wrapper, dispatch_uid="profiling-count-queries")
+    for conn in connections.all(initialized_only=True):
+        _install_wrapper(connection=conn)
+
+
+# --- sampled profiles of slow requests ---
+_profiler_lock = threading.Lock()  # the interpreter allows one active profiler at a time
+
+
+def profile_dir() -> Path:
+    return Path(getattr(settings, "PROFILING_DIR", Path(settings.BASE_DIR) / "var" / "profiles"))
+
+
+class _Sampler:
+    def __init__(self, is_async: bool) -> None:
+        use = getattr(settings, "PROFILING_PROFILER", "auto")
+        self.kind = "pyinstrument" if PYINSTRUMENT_OK and use in ("auto", "pyinstrument") else "cprofile"
+        if self.kind == "pyinstrument":
+            from pyinstrument import Profiler
+            self.profiler: Any = Profiler(async_mode="enabled" if is_async else "disabled")
+        else:
+            self.profiler = cProfile.Profile()
+
+    def start(self) -> None:
+        if self.kind == "pyinstrument":
+            self.profiler.start()
+        else:
+            self.profiler.enable()
+
+    def stop(self) -> None:
+        if self.kind == "pyinstrument":
+            self.profiler.stop()
+        else:
+            self.profiler.disable()
+
+    def dump(self, view: str, elapsed: float) -> Path:
+        directory = profile_dir()
+        directory.mkdir(parents=True, exist_ok=True)
+        stem = f"{time.strftime('%Y%m%d-%H%M%S')}-{view.replace(':', '.')}-{elapsed * 1000:.0f}ms-{random.randrange(16 ** 4):04x}"
+        if self.kind == "pyinstrument":
+            path = directory / f"{stem}.html"
+            path.write_text(self.profiler.output_html(), encoding="utf-8")
+        else:
+            path = directory / f"{stem}.prof"
+            self.profiler.dump_stats(str(path))
+        keep = int(getattr(settings, "PROFILING_KEEP", 50))
+        dumps = sorted(directory.glob("*.prof")) + sorted(directory.glob("*.html"))
+        for old in sorted(dumps, key=lambda p: p.stat().st_mtime)[:-keep] if keep > 0 else []:
+            old.unlink(missing_ok=True)
+        return path
+
+
+def _view_name(request) -> str:
+    match = getattr(request, "resolver_match", None)
+    return match.view_name if match is not None else "unresolved"
+
+
+class ProfilingMiddleware:
+    """Records timings for every request; works under both WSGI and ASGI."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response) -> None:
+        if not getattr(settings, "PROFILING_ENABLED", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        self.sample_rate = float(getattr(settings, "PROFILING_SAMPLE_RATE", 0.0))
+        self.slow = float(getattr(settings, "PROFILING_SLOW_MS", 500)) / 1000
+        install()
+
+    def _sampler(self) -> Optional[_Sampler]:
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            return None
+        if not _profiler_lock.acquire(blocking=False):
+            return None
+        try:
+            sampler = _Sampler(self.is_async)
+            sampler.start()
+        except Exception:
+            _profiler_lock.release()
+            return None
+        return sampler
+
+    def _abort(self, sampler: Optional[_Sampler]) -> None:
+        if sampler is not None:
+            try:
+                sampler.stop()
+            finally:
+                _profiler_lock.release()
+
+    def _finish(self, request, response, profile: RequestProfile, sampler: Optional[_Sampler], elapsed: float):
+        view = _view_name(request)
+        if sampler is not None:
+            try:
+                sampler.stop()
+                if elapsed >= self.slow:
+                    sampler.dump(view, elapsed)
+                    with registry.lock:
+                        registry.profiles.inc()
+            finally:
+                _profiler_lock.release()
+        registry.record(profile, view, request.method, response.status_code, elapsed)
+        response["Server-Timing"] = profile.server_timing() + f", total;dur={elapsed * 1000:.2f}"
+        return response
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        profile = RequestProfile()
+        token = _current.set(profile)
+        sampler = self._sampler()
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            self._abort(sampler)
+            raise
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, profile, sampler, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        profile = RequestProfile()
+        token = _current.set(profile)
+        sampler = self._sampler()
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        except BaseException:
+            self._abort(sampler)
+            raise
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, profile, sampler, time.perf_counter() - started)
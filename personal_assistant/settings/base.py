@@ -24,9 +24,11 @@ INSTALLED_APPS = [
     "reminders",
     "events",
     "profileapp",
+    "transfer",
 ]
 
 MIDDLEWARE = [
+    "personal_assistant.profiling.ProfilingMiddleware",  # no-op unless PROFILING_ENABLED
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -85,6 +87,67 @@ STATIC_URL = "static/"
 STATIC_ROOT = BASE_DIR / "staticfiles"
 STATICFILES_DIRS = [BASE_DIR / "static"] if (BASE_DIR / "static").exists() else []
 
+# Rows per page in list views (keyset pagination)
+LIST_PAGE_SIZE = int(os.getenv("LIST_PAGE_SIZE", "50"))
+
+# Caches. "shared" holds version stamps that invalidate per-process caches in
+# every worker: Redis when CACHE_URL is set, otherwise files on this host
+# (bumps are then serialised with a file lock, see personal_assistant/versions.py).
+CACHE_URL = os.getenv("CACHE_URL", "")
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "shared": (
+        {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": CACHE_URL}
+        if CACHE_URL else
+        {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": BASE_DIR / "var" / "cache"}
+    ),
+}
+VERSION_CACHE_ALIAS = "shared"
+VERSION_CHECK_INTERVAL = float(os.getenv("VERSION_CHECK_INTERVAL", "2"))
+
+# Notes search: "auto" picks FTS5 / Postgres full-text, else the in-process index
+NOTES_SEARCH_BACKEND = os.getenv("NOTES_SEARCH_BACKEND", "auto")
+NOTES_INDEX_PATH = Path(os.getenv("NOTES_INDEX_PATH", BASE_DIR / "var" / "notes.idx"))
+NOTES_INDEX_MERGE_BYTES = int(os.getenv("NOTES_INDEX_MERGE_BYTES", str(4 << 20)))  # delta log size that triggers a merge
+
+# Intent router model artifacts (shared by all worker processes)
+INTENT_MODEL_DIR = Path(os.getenv("INTENT_MODEL_DIR", BASE_DIR / "var" / "intent_models"))
+INTENT_MODEL_CHECK_INTERVAL = float(os.getenv("INTENT_MODEL_CHECK_INTERVAL", "5"))
+# "auto" (sklearn when installed), "sklearn", or "ngram" (pure-Python hashed n-gram softmax)
+INTENT_ROUTER_BACKEND = os.getenv("INTENT_ROUTER_BACKEND", "auto")
+# "full" (TF-IDF + LogisticRegression refit) or "incremental" (hashing + SGD partial_fit)
+INTENT_TRAINING_MODE = os.getenv("INTENT_TRAINING_MODE", "full")
+INTENT_INCREMENTAL_EPOCHS = int(os.getenv("INTENT_INCREMENTAL_EPOCHS", "5"))
+# Load the intent model when a WSGI/ASGI worker boots (chat/warmup.py)
+INTENT_WARMUP = bool(int(os.getenv("INTENT_WARMUP", "1")))
+CHAT_INFERENCE_THREADS = int(os.getenv("CHAT_INFERENCE_THREADS", "2"))  # pool used by the async chat API
+CHAT_HISTORY_SIZE = int(os.getenv("CHAT_HISTORY_SIZE", "50"))  # messages per chat window / "load older" page
+CHAT_MAX_COMMANDS = int(os.getenv("CHAT_MAX_COMMANDS", "20"))  # ";"/newline-separated commands run per message
+# Write-behind chat transcript (chat/transcript.py): rows per bulk INSERT, max delay, queue bound
+CHAT_TRANSCRIPT_BATCH = int(os.getenv("CHAT_TRANSCRIPT_BATCH", "50"))
+CHAT_TRANSCRIPT_INTERVAL = float(os.getenv("CHAT_TRANSCRIPT_INTERVAL", "1.0"))
+CHAT_TRANSCRIPT_MAX_PENDING = int(os.getenv("CHAT_TRANSCRIPT_MAX_PENDING", "1000"))
+# Messages older than this many days are moved to monthly archives (opt-in; 0 keeps everything)
+CHAT_RETENTION_DAYS = int(os.getenv("CHAT_RETENTION_DAYS", "0"))
+CHAT_ARCHIVE_DIR = Path(os.getenv("CHAT_ARCHIVE_DIR", BASE_DIR / "var" / "archive" / "messages"))
+INTENT_CACHE_SIZE = int(os.getenv("INTENT_CACHE_SIZE", "1024"))  # 0 disables the prediction cache
+
+# Request profiling (personal_assistant/profiling.py): stage timings, query counts, /metrics/
+PROFILING_ENABLED = bool(int(os.getenv("PROFILING_ENABLED", "0")))
+PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", "0"))  # fraction of requests run under a profiler
+PROFILING_SLOW_MS = float(os.getenv("PROFILING_SLOW_MS", "500"))  # sampled requests slower than this are dumped
+PROFILING_PROFILER = os.getenv("PROFILING_PROFILER", "auto")  # "auto" (pyinstrument if installed), "cprofile", "pyinstrument"
+PROFILING_DIR = Path(os.getenv("PROFILING_DIR", BASE_DIR / "var" / "profiles"))
+PROFILING_KEEP = int(os.getenv("PROFILING_KEEP", "50"))  # newest dumps kept
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")  # lets a Prometheus scraper in with "Authorization: Bearer <token>"
+
+# Due reminders claimed per UPDATE by check_due_reminders and /reminders/api/due/
+REMINDER_BATCH_SIZE = int(os.getenv("REMINDER_BATCH_SIZE", "500"))
+# Upcoming reminders held in memory by `manage.py run_reminder_scheduler`
+REMINDER_SCHEDULER_WINDOW = float(os.getenv("REMINDER_SCHEDULER_WINDOW", "3600"))
+# Beat safety sweep; raise it (e.g. 600) when the scheduler is running
+REMINDER_SWEEP_INTERVAL = float(os.getenv("REMINDER_SWEEP_INTERVAL", "30"))
+
 # Celery
 CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL", "redis://localhost:6379/0")
 CELERY_RESULT_BACKEND = os.getenv("CELERY_RESULT_BACKEND", "redis://localhost:6379/1")
@@ -92,6 +155,11 @@ CELERY_TIMEZONE = TIME_ZONE
 CELERY_BEAT_SCHEDULE = {
     "check-due-reminders": {
         "task": "reminders.tasks.check_due_reminders",
-        "schedule": 30.0,  # every 30s
-    }
+        "schedule": REMINDER_SWEEP_INTERVAL,
+    },
 }
+if CHAT_RETENTION_DAYS > 0:
+    CELERY_BEAT_SCHEDULE["archive-old-messages"] = {
+        "task": "chat.tasks.archive_old_messages",
+        "schedule": 24 * 3600.0,  # daily
+    }
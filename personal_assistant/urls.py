@@ -9,4 +9,5 @@ urlpatterns = [
     path("reminders/", include("reminders.urls")),
     path("events/", include("events.urls")),
     path("about/", include("profileapp.urls")),
+    path("transfer/", include("transfer.urls")),
 ]
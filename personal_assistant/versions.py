@@ -0,0 +1,130 @@
+"""Cross-process version stamps for per-process caches.
+
+Writers call ``bump_version(name)`` (typically from model signals); readers
+keep a ``Versioned`` value that is rebuilt once the stamp in the shared
+cache (``VERSION_CACHE_ALIAS``) changes. Checks are throttled to
+``VERSION_CHECK_INTERVAL`` seconds, so other workers see changes within
+that window while the process that made the change sees it immediately.
+
+A bump may also publish what changed (e.g. row ids); a reader that is only
+a few versions behind can fetch those with ``changes_between`` and update
+in place instead of rebuilding.
+"""
+from __future__ import annotations
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Any, Callable, Generic, List, Optional, Sequence, TypeVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.filebased import FileBasedCache
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows: single writer assumed
+    fcntl = None
+
+T = TypeVar("T")
+_MISSING = object()
+CHANGES_TTL = 600  # seconds a published change stays available
+MAX_CHANGES = 500  # versions behind beyond which readers rebuild instead
+
+
+def _cache():
+    return caches[getattr(settings, "VERSION_CACHE_ALIAS", "default")]
+
+
+def _key(name: str) -> str:
+    return f"version:{name}"
+
+
+def _changes_key(name: str, version: int) -> str:
+    return f"version:{name}:changes:{version}"
+
+
+def get_version(name: str) -> int:
+    try:
+        return int(_cache().get(_key(name), 0))
+    except Exception:
+        # Shared cache unavailable: behave as if nothing changed elsewhere.
+        return 0
+
+
+@contextmanager
+def _file_lock(cache: FileBasedCache):
+    """``FileBasedCache.incr`` is a get then a set: serialise it across processes."""
+    os.makedirs(cache._dir, exist_ok=True)
+    with open(os.path.join(cache._dir, "versions.lock"), "a") as fh:
+        if fcntl:
+            fcntl.flock(fh, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+def bump_version(name: str, changes: Optional[Sequence[Any]] = None) -> int:
+    """Increment the stamp; ``changes`` are published for ``changes_between`` under the new version."""
+    cache = _cache()
+    try:
+        # Redis INCR is atomic; the file cache needs a lock or concurrent bumps can be lost.
+        with _file_lock(cache) if isinstance(cache, FileBasedCache) else nullcontext():
+            cache.add(_key(name), 0, timeout=None)
+            version = int(cache.incr(_key(name)))
+        if changes is not None:
+            cache.set(_changes_key(name, version), list(changes), timeout=CHANGES_TTL)
+        return version
+    except Exception:
+        return 0
+
+
+def changes_between(name: str, since: int, until: int) -> Optional[List[Any]]:
+    """What the bumps after ``since`` up to ``until`` published; None if any is unknown (rebuild instead)."""
+    if since < 0 or until <= since or until - since > MAX_CHANGES:
+        return None
+    keys = [_changes_key(name, v) for v in range(since + 1, until + 1)]
+    try:
+        found = _cache().get_many(keys)
+    except Exception:
+        return None
+    if len(found) != len(keys):
+        return None  # a bump without changes, an expired entry, or one not published yet
+    return [item for k in keys for item in found[k]]
+
+
+class Versioned(Generic[T]):
+    """A lazily built value shared by all threads of one process."""
+
+    def __init__(self, name: str, build: Callable[[], T], check_interval: Optional[float] = None) -> None:
+        self.name = name
+        self.build = build
+        self.check_interval = check_interval
+        self._value: object = _MISSING
+        self._version = 0
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+
+    def get(self) -> T:
+        t = time.monotonic()
+        value = self._value
+        if value is not _MISSING and t < self._next_check:
+            return value  # type: ignore[return-value]
+        interval = self.check_interval
+        if interval is None:
+            interval = float(getattr(settings, "VERSION_CHECK_INTERVAL", 2.0))
+        with self._lock:
+            self._next_check = t + interval
+            version = get_version(self.name)
+            if self._value is _MISSING or version != self._version:
+                # Read the stamp before building so a concurrent bump triggers another rebuild.
+                self._value = self.build()
+                self._version = version
+            return self._value  # type: ignore[return-value]
+
+    def invalidate(self) -> None:
+        """Drop the local value and tell other processes to drop theirs."""
+        bump_version(self.name)
+        self._value = _MISSING
@@ -0,0 +1,96 @@
+"""Batched, race-free claiming of due reminders.
+
+``claim`` flips a flag (``delivered`` or ``notified``) on up to ``limit`` due
+reminders in one statement and returns exactly the rows this caller won:
+``UPDATE ... WHERE id IN (SELECT ... FOR UPDATE SKIP LOCKED) RETURNING id`` on
+PostgreSQL, ``UPDATE ... RETURNING id`` on SQLite (serialised by its write
+lock). Concurrent Celery workers therefore never deliver the same reminder.
+"""
+from __future__ import annotations
+import logging
+from datetime import datetime
+from typing import List, Optional
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils.timezone import now
+
+from .models import Reminder
+
+log = logging.getLogger(__name__)
+
+
+def _supports_returning() -> bool:
+    if connection.vendor == "postgresql":
+        return True
+    if connection.vendor == "sqlite":
+        return connection.Database.sqlite_version_info >= (3, 35, 0)
+    return False
+
+
+def claim(flag: str, limit: int, at: Optional[datetime] = None) -> List[Reminder]:
+    """Set ``flag`` on up to ``limit`` due reminders and return them (due_at order)."""
+    at = at or now()
+    if not _supports_returning():
+        return _claim_locked(flag, limit, at)
+    meta = Reminder._meta
+    table = connection.ops.quote_name(meta.db_table)
+    col = connection.ops.quote_name(meta.get_field(flag).column)
+    due = connection.ops.quote_name(meta.get_field("due_at").column)
+    lock = " FOR UPDATE SKIP LOCKED" if connection.features.has_select_for_update_skip_locked else ""
+    sql = (
+        f"UPDATE {table} SET {col} = %s WHERE id IN ("
+        f"SELECT id FROM {table} WHERE {col} = %s AND {due} <= %s ORDER BY {due}, id LIMIT %s{lock}"
+        f") RETURNING id"
+    )
+    with transaction.atomic():
+        with connection.cursor() as cur:
+            cur.execute(sql, [True, False, connection.ops.adapt_datetimefield_value(at), limit])
+            ids = [row[0] for row in cur.fetchall()]
+    if not ids:
+        return []
+    return list(Reminder.objects.filter(id__in=ids).order_by("due_at", "id"))
+
+
+def _claim_locked(flag: str, limit: int, at: datetime) -> List[Reminder]:
+    # Databases without UPDATE ... RETURNING: lock, then one bulk UPDATE.
+    skip = connection.features.has_select_for_update_skip_locked
+    with transaction.atomic():
+        rows = list(
+            Reminder.objects.select_for_update(skip_locked=skip)
+            .filter(**{flag: False}, due_at__lte=at).order_by("due_at", "id")[:limit]
+        )
+        if rows:
+            Reminder.objects.filter(id__in=[r.id for r in rows]).update(**{flag: True})
+    return rows
+
+
+def send(reminders: List[Reminder]) -> List[int]:
+    """Deliver claimed reminders; returns ids that failed and should be retried."""
+    failed = []
+    for r in reminders:
+        try:
+            # Hook up real notification here (email, SMS, push).
+            log.info("Reminder #%s due at %s: %s", r.id, r.due_at, r.message)
+        except Exception:
+            log.exception("Delivering reminder #%s failed", r.id)
+            failed.append(r.id)
+    return failed
+
+
+def deliver_due(batch_size: Optional[int] = None) -> int:
+    """Claim and deliver due reminders chunk by chunk; returns how many were delivered."""
+    size = batch_size or int(getattr(settings, "REMINDER_BATCH_SIZE", 500))
+    total = 0
+    while True:
+        batch = claim("delivered", size)
+        if not batch:
+            break
+        failed = send(batch)
+        if failed:
+            # Release them for the next run; stop so they aren't re-claimed in a loop.
+            Reminder.objects.filter(id__in=failed).update(delivered=False)
+        total += len(batch) - len(failed)
+        if failed or len(batch) < size:
+            break
+    return total
@@ -0,0 +1,111 @@
+"""Push due reminders to open browser tabs.
+
+Under ASGI every ``/reminders/stream/`` connection subscribes to one
+``DueDispatcher`` per process. The dispatcher claims due reminders (the
+``notified`` flag, see ``delivery.claim``) and fans them out to all
+subscribers, then sleeps until the next due time. Between due times it only
+reads the ``reminders`` version stamp, so database load no longer grows with
+the number of open tabs. ``wait_for_due`` serves the long-polling fallback of
+``/reminders/api/due/`` under ASGI; it waits with ``asyncio.sleep``, so a
+held request doesn't occupy a thread.
+"""
+from __future__ import annotations
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils.timezone import now
+
+from personal_assistant.versions import get_version
+
+from .delivery import claim
+from .models import Reminder
+from .scheduler import NAME
+
+log = logging.getLogger(__name__)
+
+
+def _batch() -> int:
+    return int(getattr(settings, "REMINDER_BATCH_SIZE", 500))
+
+
+def _poll() -> float:
+    return float(getattr(settings, "VERSION_CHECK_INTERVAL", 2.0))
+
+
+def payload(r: Reminder) -> Dict[str, Any]:
+    return {"id": r.id, "message": r.message, "due_at": r.due_at.isoformat()}
+
+
+def next_due() -> Optional[datetime]:
+    return Reminder.objects.filter(notified=False).order_by("due_at").values_list("due_at", flat=True).first()
+
+
+def _seconds_until(due: Optional[datetime]) -> float:
+    return float("inf") if due is None else (due - now()).total_seconds()
+
+
+async def wait_for_due(timeout: float) -> List[Reminder]:
+    """Claim due reminders, waiting up to ``timeout`` seconds until one is due."""
+    deadline = time.monotonic() + timeout
+    while True:
+        rows = await sync_to_async(claim)("notified", _batch())
+        remaining = deadline - time.monotonic()
+        if rows or remaining <= 0:
+            return rows
+        version = await sync_to_async(get_version)(NAME)
+        sleep_until = time.monotonic() + min(remaining, _seconds_until(await sync_to_async(next_due)()))
+        while time.monotonic() < sleep_until:
+            await asyncio.sleep(max(0.0, min(_poll(), sleep_until - time.monotonic())))
+            if await sync_to_async(get_version)(NAME) != version:
+                break  # a reminder changed: the next due time may be sooner
+
+
+class DueDispatcher:
+    def __init__(self) -> None:
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._task: Optional[asyncio.Task] = None
+
+    def subscribe(self) -> asyncio.Queue:
+        q: asyncio.Queue = asyncio.Queue(maxsize=100)
+        self._subscribers.add(q)
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        return q
+
+    def unsubscribe(self, q: asyncio.Queue) -> None:
+        self._subscribers.discard(q)
+
+    def _publish(self, items: List[Dict[str, Any]]) -> None:
+        for q in list(self._subscribers):
+            for item in items:
+                try:
+                    q.put_nowait(item)
+                except asyncio.QueueFull:
+                    break  # stalled client; it will reconnect
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while self._subscribers:
+            try:
+                rows = await sync_to_async(claim)("notified", _batch())
+                if rows:
+                    self._publish([payload(r) for r in rows])
+                    continue
+                version = await sync_to_async(get_version)(NAME)
+                wake = loop.time() + _seconds_until(await sync_to_async(next_due)())
+            except Exception:
+                log.exception("Reminder dispatcher failed; retrying")
+                await asyncio.sleep(1)
+                continue
+            while self._subscribers and loop.time() < wake:
+                await asyncio.sleep(max(0.0, min(_poll(), wake - loop.time())))
+                if await sync_to_async(get_version)(NAME) != version:
+                    break
+
+
+dispatcher = DueDispatcher()
@@ -0,0 +1,23 @@
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+
+from reminders.scheduler import ReminderScheduler
+
+
+class Command(BaseCommand):
+    help = "Deliver reminders at their exact due time (long-running; replaces frequent beat polling)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--window", type=float, default=None, help="Seconds of upcoming reminders kept in memory")
+
+    def handle(self, *args, **options):
+        done = threading.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, lambda *_: done.set())
+        sched = ReminderScheduler(window=options["window"]).start()
+        self.stdout.write(f"Reminder scheduler running (window {sched.window:.0f}s). Ctrl+C to stop.")
+        done.wait()
+        sched.stop(timeout=5)
+        self.stdout.write(self.style.SUCCESS(f"Stopped after delivering {sched.fired} reminders."))
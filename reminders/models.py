@@ -9,6 +9,11 @@ class Reminder(models.Model):
 
     class Meta:
         ordering = ["delivered", "due_at", "id"]
+        indexes = [
+            models.Index(fields=["delivered", "due_at", "id"], name="reminder_list_idx"),
+            # Claimed by /reminders/api/due/ and the SSE dispatcher (reminders.delivery.claim("notified")).
+            models.Index(fields=["notified", "due_at", "id"], name="reminder_notify_idx"),
+        ]
 
     def __str__(self):
         return self.message
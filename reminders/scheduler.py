@@ -0,0 +1,181 @@
+"""Fire reminders at their exact ``due_at`` instead of on a polling interval.
+
+``ReminderScheduler`` keeps the pending reminders due within the next
+``REMINDER_SCHEDULER_WINDOW`` seconds in a heap and sleeps until the earliest
+one. The window is extended incrementally as time passes; reminder changes in
+this process update the heap directly (see ``reminders.signals``). Changes in
+other processes bump a shared version stamp and publish the reminder ids with
+it; the scheduler re-reads just those rows, and reloads its whole window only
+when it can't tell what changed (bulk imports, expired or missing entries).
+On start the window, including anything overdue, is reloaded
+from the database, so restarts lose nothing. Firing goes through
+``delivery.deliver_due``, so the beat sweep and several schedulers can
+overlap safely.
+"""
+from __future__ import annotations
+import heapq
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from personal_assistant.versions import bump_version, changes_between, get_version
+
+from .delivery import deliver_due
+from .models import Reminder
+
+log = logging.getLogger(__name__)
+NAME = "reminders"
+
+_running: Optional["ReminderScheduler"] = None
+
+
+class ReminderScheduler:
+    def __init__(self, window: Optional[float] = None, poll: Optional[float] = None) -> None:
+        self.window = window or float(getattr(settings, "REMINDER_SCHEDULER_WINDOW", 3600))
+        # How often to look at the version stamp for changes made by other processes.
+        self.poll = poll or float(getattr(settings, "VERSION_CHECK_INTERVAL", 2.0))
+        self._heap: List[Tuple[float, int]] = []
+        self._due: Dict[int, float] = {}  # id -> timestamp; heap entries not matching are stale
+        self._horizon = 0.0
+        self._version = -1
+        self._cond = threading.Condition()
+        self._stop = False
+        self._thread: Optional[threading.Thread] = None
+        self.fired = 0
+
+    # --- heap maintenance ---
+    def _push(self, pk: int, ts: float) -> None:
+        self._due[pk] = ts
+        heapq.heappush(self._heap, (ts, pk))
+
+    def _load(self, start: Optional[float], end: float) -> None:
+        qs = Reminder.objects.filter(delivered=False, due_at__lte=_dt(end))
+        if start is not None:
+            qs = qs.filter(due_at__gt=_dt(start))
+        for pk, due_at in qs.values_list("id", "due_at").iterator():
+            self._push(pk, due_at.timestamp())
+        self._horizon = end
+
+    def reload(self) -> None:
+        """Forget the heap and load every pending reminder up to the window end."""
+        version = get_version(NAME)
+        with self._cond:
+            self._heap, self._due = [], {}
+            self._load(None, time.time() + self.window)
+            self._version = version
+            self._cond.notify()
+
+    def _set(self, pk: int, due_at: Optional[datetime], pending: bool) -> None:
+        self._due.pop(pk, None)
+        if pending and due_at is not None and due_at.timestamp() <= self._horizon:
+            self._push(pk, due_at.timestamp())
+
+    def update(self, pk: int, due_at: Optional[datetime], pending: bool, version: int = 0) -> None:
+        """Apply one reminder change made in this process (``pending=False`` cancels)."""
+        with self._cond:
+            self._set(pk, due_at, pending)
+            if version == self._version + 1:
+                self._version = version  # our own bump: nothing else to reload
+            self._cond.notify()
+
+    def refresh(self, version: int) -> None:
+        """Catch up with changes made elsewhere, from the ids published with each bump."""
+        ids = changes_between(NAME, self._version, version)
+        if ids is None:
+            self.reload()
+            return
+        ids = set(ids)
+        pending = dict(Reminder.objects.filter(id__in=ids, delivered=False).values_list("id", "due_at"))
+        with self._cond:
+            for pk in ids:
+                self._set(pk, pending.get(pk), pk in pending)  # missing: delivered or deleted
+            self._version = version
+            self._cond.notify()
+
+    def _pop_due(self, t: float) -> int:
+        n = 0
+        while self._heap and self._heap[0][0] <= t:
+            ts, pk = heapq.heappop(self._heap)
+            if self._due.get(pk) == ts:
+                del self._due[pk]
+                n += 1
+        return n
+
+    def _next(self) -> Optional[float]:
+        while self._heap and self._due.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)  # drop cancelled/rescheduled entries
+        return self._heap[0][0] if self._heap else None
+
+    # --- main loop ---
+    def run(self) -> None:
+        self.reload()
+        next_poll = time.monotonic() + self.poll
+        while not self._stop:
+            try:
+                close_old_connections()
+                if time.monotonic() >= next_poll:
+                    next_poll = time.monotonic() + self.poll
+                    version = get_version(NAME)
+                    if version != self._version:
+                        self.refresh(version)
+                t = time.time()
+                with self._cond:
+                    due = self._pop_due(t)
+                    if t >= self._horizon - self.window / 2:
+                        self._load(self._horizon, t + self.window)
+                if due:
+                    self.fired += deliver_due()
+                    continue
+                with self._cond:
+                    nxt = self._next()
+                    wait = min(
+                        self.poll,
+                        max(0.0, next_poll - time.monotonic()),
+                        (nxt - time.time()) if nxt is not None else self.poll,
+                    )
+                    if wait > 0 and not self._stop:
+                        self._cond.wait(wait)
+            except Exception:
+                log.exception("Reminder scheduler iteration failed")
+                time.sleep(1)
+
+    def start(self) -> "ReminderScheduler":
+        global _running
+        self._thread = threading.Thread(target=self.run, name="reminder-scheduler", daemon=True)
+        _running = self
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        global _running
+        with self._cond:
+            self._stop = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        if _running is self:
+            _running = None
+
+    def pending(self) -> int:
+        return len(self._due)
+
+
+def changed(pk: int, due_at: Optional[datetime], pending: bool) -> None:
+    """Tell schedulers a reminder was saved or deleted (call after commit)."""
+    version = bump_version(NAME, [pk])
+    if _running is not None:
+        _running.update(pk, due_at, pending, version)
+
+
+def bulk_changed(pks: Optional[Sequence[int]] = None) -> None:
+    """Tell schedulers many reminders changed at once; without ``pks`` (bulk imports) they reload their window."""
+    bump_version(NAME, list(pks) if pks and all(pks) else None)
+
+
+def _dt(ts: float) -> datetime:
+    return datetime.fromtimestamp(ts, tz=timezone.utc)
@@ -0,0 +1,18 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import scheduler
+from .models import Reminder
+
+
+@receiver(post_save, sender=Reminder)
+def reminder_saved(sender, instance, **kwargs):
+    pk, due_at, pending = instance.pk, instance.due_at, not instance.delivered
+    transaction.on_commit(lambda: scheduler.changed(pk, due_at, pending))
+
+
+@receiver(post_delete, sender=Reminder)
+def reminder_deleted(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: scheduler.changed(pk, None, False))
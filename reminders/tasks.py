@@ -1,15 +1,7 @@
-from datetime import datetime
-from django.utils.timezone import now
 from celery import shared_task
-from .models import Reminder
+from .delivery import deliver_due
 
 @shared_task
 def check_due_reminders() -> int:
-    n = 0
-    qs = Reminder.objects.filter(delivered=False, due_at__lte=now()).order_by("due_at")
-    for r in qs:
-        # Hook up real notification here (email, SMS, push). For now, mark delivered.
-        r.delivered = True
-        r.save(update_fields=["delivered"])
-        n += 1
-    return n
+    # Claims due reminders in REMINDER_BATCH_SIZE chunks; safe to run on several workers at once.
+    return deliver_due()
@@ -4,6 +4,8 @@ from . import views
 app_name = "reminders"
 urlpatterns = [
     path("", views.list_reminders, name="list"),
+    path("api/", views.api_list, name="api_list"),
     path("cancel/<int:pk>/", views.cancel_reminder, name="cancel"),
     path("api/due/", views.api_due, name="api_due"),
+    path("stream/", views.stream, name="stream"),
 ]
@@ -1,9 +1,19 @@
+import asyncio
+import json
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, redirect, get_object_or_404
 from django.views.decorators.http import require_http_methods
 from django import forms
 from .models import Reminder
-from django.http import JsonResponse
-from django.utils.timezone import now
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, HttpResponseNotAllowed, JsonResponse, StreamingHttpResponse
+from django.conf import settings
+from personal_assistant.pagination import page_size, paginate
+from .delivery import claim
+from .dispatch import dispatcher, payload, wait_for_due
+
+KEEPALIVE = 15.0  # seconds between SSE comments that keep proxies from closing the stream
+SHORT_POLL = 2.0  # seconds between api_due polls when the server can't hold them open
 
 class ReminderForm(forms.ModelForm):
     class Meta:
@@ -19,8 +29,15 @@ def list_reminders(request):
             return redirect("reminders:list")
     else:
         form = ReminderForm()
-    rems = Reminder.objects.all()
-    return render(request, "reminders/list.html", {"reminders": rems, "form": form})
+    page = paginate(Reminder.objects.all(), request.GET.get("cursor"))
+    return render(request, "reminders/list.html", {"reminders": page.items, "next_cursor": page.next_cursor, "form": form})
+
+
+@require_http_methods(["GET"])
+def api_list(request):
+    qs = Reminder.objects.values("id", "message", "due_at", "delivered", "created_at")
+    page = paginate(qs, request.GET.get("cursor"), page_size(request))
+    return JsonResponse({"results": page.items, "next": page.next_cursor})
 
 @require_http_methods(["POST"])
 def cancel_reminder(request, pk: int):
@@ -30,19 +47,54 @@ def cancel_reminder(request, pk: int):
 
 
 @require_http_methods(["GET"])
-def api_due(request):
+async def api_due(request):
     """Return reminders that are due and not yet notified, then mark them notified.
 
     This enables client-side polling to trigger a local beep/notification.
+    The claim is a single UPDATE, so two open tabs never both beep for one reminder.
+    With ``?wait=<seconds>`` (max 30) an ASGI server holds the request until
+    something is due (long-polling fallback for clients without the event
+    stream). Under WSGI that would tie up a worker per open tab, so ``wait``
+    is ignored there; ``retry`` in the reply says when to poll again.
     """
-    qs = Reminder.objects.filter(notified=False, due_at__lte=now()).order_by("due_at")
-    due = [{
-        "id": r.id,
-        "message": r.message,
-        "due_at": r.due_at.isoformat(),
-    } for r in qs]
-    if qs:
-        for r in qs:
-            r.notified = True
-        Reminder.objects.bulk_update(qs, ["notified"])
-    return JsonResponse({"due": due})
+    try:
+        wait = max(0.0, min(float(request.GET.get("wait", 0)), 30.0))
+    except ValueError:
+        wait = 0.0
+    if wait and isinstance(request, ASGIRequest):
+        rows, retry = await wait_for_due(wait), 0.0
+    else:
+        rows = await sync_to_async(claim)("notified", int(getattr(settings, "REMINDER_BATCH_SIZE", 500)))
+        retry = SHORT_POLL if wait else 0.0
+    return JsonResponse({"due": [payload(r) for r in rows], "retry": retry})
+
+
+async def stream(request):
+    """Server-Sent Events: one ``due`` event per reminder as it comes due.
+
+    Only served under ASGI; WSGI replies 204 so the browser falls back to
+    long-polling ``api_due``.
+    """
+    if request.method != "GET":
+        return HttpResponseNotAllowed(["GET"])
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+
+    async def events():
+        q = dispatcher.subscribe()
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    item = await asyncio.wait_for(q.get(), timeout=KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: due\ndata: {json.dumps(item)}\n\n"
+        finally:
+            dispatcher.unsubscribe(q)
+
+    response = StreamingHttpResponse(events(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # don't let nginx buffer the stream
+    return response
@@ -8,6 +8,7 @@ class Task(models.Model):
 
     class Meta:
         ordering = ["is_completed", "due_at", "id"]
+        indexes = [models.Index(fields=["is_completed", "due_at", "id"], name="task_list_idx")]
 
     def __str__(self) -> str:
         return self.title
@@ -4,5 +4,6 @@ from . import views
 app_name = "tasks"
 urlpatterns = [
     path("", views.list_tasks, name="list"),
+    path("api/", views.api_list, name="api_list"),
     path("complete/<int:pk>/", views.complete_task, name="complete"),
 ]
@@ -1,6 +1,8 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.views.decorators.http import require_http_methods
 from django import forms
+from django.http import JsonResponse
+from personal_assistant.pagination import page_size, paginate
 from .models import Task
 
 class TaskForm(forms.ModelForm):
@@ -17,8 +19,15 @@ def list_tasks(request):
             return redirect("tasks:list")
     else:
         form = TaskForm()
-    tasks = Task.objects.all()
-    return render(request, "tasks/list.html", {"tasks": tasks, "form": form})
+    page = paginate(Task.objects.all(), request.GET.get("cursor"))
+    return render(request, "tasks/list.html", {"tasks": page.items, "next_cursor": page.next_cursor, "form": form})
+
+
+@require_http_methods(["GET"])
+def api_list(request):
+    qs = Task.objects.values("id", "title", "is_completed", "due_at", "created_at")
+    page = paginate(qs, request.GET.get("cursor"), page_size(request))
+    return JsonResponse({"results": page.items, "next": page.next_cursor})
 
 @require_http_methods(["POST"])
 def complete_task(request, pk: int):
@@ -0,0 +1,23 @@
+"""Streaming export: rows come from a server-side iterator ``chunk_size`` at a time."""
+from __future__ import annotations
+from typing import Any, Dict, Iterator
+
+from . import formats
+from .specs import get_spec
+
+
+def rows(kind: str, chunk_size: int = 2000) -> Iterator[Dict[str, Any]]:
+    spec = get_spec(kind)
+    return spec.model.objects.order_by("id").values(*spec.export_fields).iterator(chunk_size=chunk_size)
+
+
+def export(kind: str, fmt: str, chunk_size: int = 2000) -> Iterator[str]:
+    """Text chunks of the whole table in ``fmt``; memory stays bounded by ``chunk_size``."""
+    spec = get_spec(kind)
+    if fmt == "csv":
+        return formats.write_csv(rows(kind, chunk_size), spec.export_fields)
+    if fmt == "jsonl":
+        return formats.write_jsonl(rows(kind, chunk_size), spec.export_fields)
+    if fmt == "ics":
+        return formats.write_ics(rows(kind, chunk_size), spec.component, spec.properties, kind, spec.status)
+    raise formats.FormatError(f"Unknown format {fmt!r}; expected one of {', '.join(formats.FORMATS)}")
@@ -0,0 +1,201 @@
+"""Streaming readers and writers for CSV, JSON Lines and iCalendar.
+
+Readers take an iterable of text lines and yield ``(line_no, row)`` with
+``row`` a dict of field name to string (or JSON value), one record at a time.
+Writers take an iterable of row dicts and yield text chunks, so neither side
+ever holds a whole file or table in memory. The mapping between model fields
+and iCalendar properties comes from ``transfer.specs``.
+"""
+from __future__ import annotations
+import csv
+import io
+import json
+import re
+from datetime import date, datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+FORMATS = ("csv", "jsonl", "ics")
+CONTENT_TYPES = {"csv": "text/csv", "jsonl": "application/x-ndjson", "ics": "text/calendar"}
+EXTENSIONS = {"csv": "csv", "jsonl": "jsonl", "ics": "ics", "ical": "ics", "ndjson": "jsonl", "json": "jsonl"}
+
+Row = Dict[str, Any]
+
+
+class FormatError(ValueError):
+    pass
+
+
+def guess_format(filename: str) -> Optional[str]:
+    return EXTENSIONS.get(filename.rsplit(".", 1)[-1].lower()) if "." in filename else None
+
+
+# --- readers ---
+def read_csv(lines: Iterable[str]) -> Iterator[Tuple[int, Row]]:
+    reader = csv.DictReader(lines)
+    for row in reader:
+        # Header is line 1; multi-line quoted cells make this the record's last line.
+        yield reader.line_num, {k.strip().lower(): v for k, v in row.items() if k}
+
+
+def read_jsonl(lines: Iterable[str]) -> Iterator[Tuple[int, Row]]:
+    for n, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            raise FormatError(f"line {n}: invalid JSON ({e})")
+        if not isinstance(row, dict):
+            raise FormatError(f"line {n}: expected a JSON object")
+        yield n, {str(k).lower(): v for k, v in row.items()}
+
+
+def _unfold(lines: Iterable[str]) -> Iterator[Tuple[int, str]]:
+    """RFC 5545 content lines: a line starting with a space or tab continues the previous one."""
+    current, start = None, 0
+    for n, raw in enumerate(lines, 1):
+        line = raw.rstrip("\r\n")
+        if line[:1] in (" ", "\t") and current is not None:
+            current += line[1:]
+            continue
+        if current is not None:
+            yield start, current
+        current, start = line, n
+    if current:
+        yield start, current
+
+
+_ESCAPES = {"n": "\n", "N": "\n", ",": ",", ";": ";", "\\": "\\"}
+
+
+def _unescape(value: str) -> str:
+    return re.sub(r"\\(.)", lambda m: _ESCAPES.get(m.group(1), m.group(1)), value)
+
+
+def _ics_datetime(value: str, params: Dict[str, str]) -> str:
+    """iCalendar DATE / DATE-TIME to ISO 8601 (floating times stay naive)."""
+    value = value.strip()
+    if params.get("VALUE") == "DATE" or re.fullmatch(r"\d{8}", value):
+        return date(int(value[:4]), int(value[4:6]), int(value[6:8])).isoformat()
+    m = re.fullmatch(r"(\d{4})(\d{2})(\d{2})T(\d{2})(\d{2})(\d{2})(Z?)", value)
+    if not m:
+        return value
+    dt = datetime(*map(int, m.groups()[:6]))
+    if m.group(7):
+        dt = dt.replace(tzinfo=timezone.utc)
+    elif "TZID" in params:
+        try:
+            dt = dt.replace(tzinfo=ZoneInfo(params["TZID"]))
+        except (ZoneInfoNotFoundError, ValueError):
+            pass
+    return dt.isoformat()
+
+
+def read_ics(lines: Iterable[str], component: str, properties: Dict[str, str], datetimes: Sequence[str] = ()) -> Iterator[Tuple[int, Row]]:
+    """Yield one row per ``component`` (e.g. VEVENT), mapping ``properties`` to field names."""
+    row: Optional[Row] = None
+    start, depth = 0, 0
+    for n, line in _unfold(lines):
+        name, _, value = line.partition(":")
+        name, *raw_params = name.split(";")
+        name = name.upper()
+        if name == "BEGIN":
+            if value.upper() == component and row is None:
+                row, start, depth = {}, n, 0
+            elif row is not None:
+                depth += 1  # nested component such as VALARM
+            continue
+        if name == "END" and row is not None:
+            if depth:
+                depth -= 1
+            elif value.upper() == component:
+                yield start, row
+                row = None
+            continue
+        if row is None or depth or name not in properties:
+            continue
+        params = dict(p.split("=", 1) for p in raw_params if "=" in p)
+        field = properties[name]
+        row[field] = _ics_datetime(value, params) if field in datetimes else _unescape(value)
+
+
+# --- writers ---
+def write_csv(rows: Iterable[Row], fields: Sequence[str]) -> Iterator[str]:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(fields)
+    for i, row in enumerate(rows, 1):
+        writer.writerow(["" if row.get(f) is None else _text(row.get(f)) for f in fields])
+        if i % 500 == 0:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    yield buf.getvalue()
+
+
+def write_jsonl(rows: Iterable[Row], fields: Sequence[str]) -> Iterator[str]:
+    chunk: List[str] = []
+    for row in rows:
+        chunk.append(json.dumps({f: row.get(f) for f in fields}, default=_text, ensure_ascii=False))
+        if len(chunk) == 500:
+            yield "\n".join(chunk) + "\n"
+            chunk = []
+    if chunk:
+        yield "\n".join(chunk) + "\n"
+
+
+def _text(value: Any) -> str:
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+
+def _ics_escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\r\n", "\\n").replace("\n", "\\n")
+
+
+def _fold(line: str) -> str:
+    """Split content lines longer than 75 octets (RFC 5545 section 3.1)."""
+    data = line.encode("utf-8")
+    if len(data) <= 75:
+        return line + "\r\n"
+    parts, limit = [], 75
+    while data:
+        cut = min(limit, len(data))
+        while cut < len(data) and (data[cut] & 0xC0) == 0x80:  # don't split a UTF-8 sequence
+            cut -= 1
+        parts.append(data[:cut].decode("utf-8"))
+        data, limit = data[cut:], 74
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def _ics_value(value: Any) -> str:
+    if isinstance(value, datetime):
+        return value.astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    return _ics_escape(_text(value))
+
+
+def write_ics(rows: Iterable[Row], component: str, properties: Dict[str, str], uid_prefix: str,
+              status: Optional[Tuple[str, str, str]] = None) -> Iterator[str]:
+    """``properties`` maps iCalendar property to field; ``status`` is (field, value if true, value if false)."""
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    yield "BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//Personal Assistant//Export//EN\r\n"
+    chunk: List[str] = []
+    for row in rows:
+        chunk.append(f"BEGIN:{component}\r\nUID:{uid_prefix}-{row['id']}@personal-assistant\r\nDTSTAMP:{stamp}\r\n")
+        for prop, field in properties.items():
+            value = row.get(field)
+            if value is not None and value != "":
+                chunk.append(_fold(f"{prop}:{_ics_value(value)}"))
+        if status is not None:
+            field, yes, no = status
+            chunk.append(f"STATUS:{yes if row.get(field) else no}\r\n")
+        chunk.append(f"END:{component}\r\n")
+        if len(chunk) >= 2000:
+            yield "".join(chunk)
+            chunk = []
+    chunk.append("END:VCALENDAR\r\n")
+    yield "".join(chunk)
@@ -0,0 +1,191 @@
+"""Chunked bulk import of tasks, notes, reminders and events.
+
+Rows are read lazily from the file and processed ``chunk_size`` at a time:
+each chunk is validated column by column (ISO timestamps parsed directly,
+everything else sent through ``parse_datetimes`` in one call), invalid rows
+are reported with their line number, and the valid ones are written with one
+``bulk_create`` in a transaction. Each chunk commits on its own, so an
+interrupted import keeps the chunks before it.
+
+``bulk_create`` skips model signals, so the side effects they normally have
+are applied once per import instead: the in-process notes index is updated
+and reminder schedulers are told to reload.
+"""
+from __future__ import annotations
+from dataclasses import dataclass, field
+from datetime import datetime, time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from django.db import transaction
+from django.utils.timezone import get_current_timezone, is_naive, make_aware, now
+
+from chat.services import parse_datetimes
+
+from . import formats
+from .specs import Spec, get_spec
+
+TRUE = {"1", "true", "yes", "y", "x", "done", "completed"}
+FALSE = {"0", "false", "no", "n", "", "needs-action", "in-process", "cancelled"}
+MAX_ERRORS = 100  # messages kept; all are counted
+
+
+@dataclass
+class ImportResult:
+    created: int = 0
+    invalid: int = 0
+    errors: List[Tuple[int, str]] = field(default_factory=list)
+
+    def error(self, line: int, message: str) -> None:
+        self.invalid += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append((line, message))
+
+
+def read(fmt: str, lines: Iterable[str], spec: Spec) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    if fmt == "csv":
+        return formats.read_csv(lines)
+    if fmt == "jsonl":
+        return formats.read_jsonl(lines)
+    if fmt == "ics":
+        properties = dict(spec.properties)
+        if spec.status:
+            properties["STATUS"] = spec.status[0]
+        return formats.read_ics(lines, spec.component, properties, spec.datetime_fields())
+    raise formats.FormatError(f"Unknown format {fmt!r}; expected one of {', '.join(formats.FORMATS)}")
+
+
+def _chunks(rows: Iterable[Tuple[int, Dict[str, Any]]], size: int) -> Iterator[List[Tuple[int, Dict[str, Any]]]]:
+    chunk: List[Tuple[int, Dict[str, Any]]] = []
+    for item in rows:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _text_column(values: List[Any], max_length: Optional[int]) -> List[Tuple[Any, Optional[str]]]:
+    out = []
+    for v in values:
+        s = "" if v is None else str(v).strip()
+        out.append((s, f"longer than {max_length} characters") if max_length and len(s) > max_length else (s, None))
+    return out
+
+
+def _bool_column(values: List[Any]) -> List[Tuple[Any, Optional[str]]]:
+    out = []
+    for v in values:
+        if isinstance(v, bool):
+            out.append((v, None))
+            continue
+        s = "" if v is None else str(v).strip().lower()
+        out.append((True, None) if s in TRUE else (False, None) if s in FALSE else (None, f"not a boolean: {v!r}"))
+    return out
+
+
+def _datetime_column(values: List[Any], base: datetime) -> List[Tuple[Any, Optional[str]]]:
+    """ISO 8601 first; the rest ("tomorrow at 9", "in 2 hours") in one ``parse_datetimes`` call."""
+    tz = get_current_timezone()
+    out: List[Tuple[Any, Optional[str]]] = []
+    natural: List[int] = []
+    for i, v in enumerate(values):
+        s = "" if v is None else str(v).strip()
+        if not s:
+            out.append((None, None))
+            continue
+        try:
+            when = datetime.fromisoformat(s)
+            if len(s) == 10:  # a bare date: 09:00 like the chat parser
+                when = datetime.combine(when.date(), time(9))
+            out.append((make_aware(when, tz) if is_naive(when) else when, None))
+        except ValueError:
+            out.append((s, None))
+            natural.append(i)
+    for i, (when, rest) in zip(natural, parse_datetimes([out[i][0] for i in natural], base)):
+        out[i] = (when, None) if when is not None and not rest else (None, f"unrecognised date/time: {out[i][0]!r}")
+    return out
+
+
+def _validate(spec: Spec, chunk: List[Tuple[int, Dict[str, Any]]], base: datetime, result: ImportResult) -> List[Dict[str, Any]]:
+    meta = spec.model._meta
+    columns: Dict[str, List[Tuple[Any, Optional[str]]]] = {}
+    for name in spec.fields:
+        f = meta.get_field(name)
+        values = [row.get(name) for _, row in chunk]
+        kind = f.get_internal_type()
+        if kind == "DateTimeField":
+            columns[name] = _datetime_column(values, base)
+        elif kind == "BooleanField":
+            columns[name] = _bool_column(values)
+        else:
+            columns[name] = _text_column(values, f.max_length)
+    valid = []
+    for i, (line, _) in enumerate(chunk):
+        data, problems = {}, []
+        for name in spec.fields:
+            value, problem = columns[name][i]
+            if problem:
+                problems.append(f"{name}: {problem}")
+            elif name in spec.required and value in (None, ""):
+                problems.append(f"{name}: required")
+            elif value is None and meta.get_field(name).get_internal_type() == "BooleanField":
+                continue  # keep the model default
+            elif value == "" and meta.get_field(name).null:
+                data[name] = None
+            else:
+                data[name] = value
+        if problems:
+            result.error(line, "; ".join(problems))
+            continue
+        for target, source in spec.copies.items():
+            if source in data:
+                data[target] = data[source]
+        valid.append(data)
+    return valid
+
+
+def _after_import(spec: Spec, created: List[Any]) -> None:
+    if spec.model_label == "notes.Note":
+        from notes import index
+        from notes.search import backend
+        if backend() == "index":
+            if all(n.pk for n in created):
+                index.update_many((n.pk, n.title, n.content) for n in created)
+            else:
+                index.rebuild()  # the database didn't return the new ids
+    elif spec.model_label == "reminders.Reminder":
+        from reminders import scheduler
+        scheduler.bulk_changed()
+
+
+def import_rows(kind: str, rows: Iterable[Tuple[int, Dict[str, Any]]], chunk_size: int = 1000, dry_run: bool = False,
+                base: Optional[datetime] = None, progress: Optional[Callable[[ImportResult], None]] = None) -> ImportResult:
+    """Validate and insert ``(line, row)`` records; relative dates are resolved against ``base`` (now)."""
+    spec = get_spec(kind)
+    model = spec.model
+    base = base or now()
+    result = ImportResult()
+    new_notes: List[Any] = []
+    for chunk in _chunks(rows, chunk_size):
+        valid = _validate(spec, chunk, base, result)
+        if valid and not dry_run:
+            with transaction.atomic():
+                objs = model.objects.bulk_create([model(**data) for data in valid], batch_size=chunk_size)
+            result.created += len(objs)
+            if spec.model_label == "notes.Note":
+                new_notes.extend(objs)
+                if len(new_notes) >= 10_000:
+                    _after_import(spec, new_notes)
+                    new_notes = []
+        elif dry_run:
+            result.created += len(valid)
+        if progress:
+            progress(result)
+    if not dry_run and (new_notes or (result.created and spec.model_label != "notes.Note")):
+        _after_import(spec, new_notes)
+    return result
+
+
+def import_file(kind: str, fmt: str, lines: Iterable[str], **kwargs: Any) -> ImportResult:
+    return import_rows(kind, read(fmt, lines, get_spec(kind)), **kwargs)
@@ -0,0 +1,25 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from transfer import exporter, formats
+from transfer.specs import SPECS
+
+
+class Command(BaseCommand):
+    help = "Stream tasks, notes, reminders or events out as CSV, JSON Lines or iCalendar."
+
+    def add_arguments(self, parser):
+        parser.add_argument("kind", choices=list(SPECS))
+        parser.add_argument("--format", choices=formats.FORMATS, default="csv")
+        parser.add_argument("--output", default="-", help="File to write, or - for stdout.")
+        parser.add_argument("--chunk-size", type=int, default=2000, help="Rows fetched per database round-trip.")
+
+    def handle(self, *args, **options):
+        out = sys.stdout if options["output"] == "-" else open(options["output"], "w", encoding="utf-8", newline="")
+        try:
+            for chunk in exporter.export(options["kind"], options["format"], options["chunk_size"]):
+                out.write(chunk)
+        finally:
+            if out is not sys.stdout:
+                out.close()
@@ -0,0 +1,41 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from transfer import formats, importer
+from transfer.specs import SPECS
+
+
+class Command(BaseCommand):
+    help = "Bulk import tasks, notes, reminders or events from CSV, JSON Lines or iCalendar (streamed, chunked bulk_create)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("kind", choices=list(SPECS))
+        parser.add_argument("path", help="File to read, or - for stdin.")
+        parser.add_argument("--format", choices=formats.FORMATS, help="Default: from the file extension.")
+        parser.add_argument("--chunk-size", type=int, default=1000, help="Rows validated and inserted per transaction.")
+        parser.add_argument("--dry-run", action="store_true", help="Validate only.")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["format"] or formats.guess_format(path)
+        if fmt is None:
+            raise CommandError("Can't tell the format from the file name; pass --format")
+        progress = None
+        if options["verbosity"] > 1:
+            progress = lambda r: self.stderr.write(f"{r.created} ok, {r.invalid} invalid")  # noqa: E731
+        fh = sys.stdin if path == "-" else open(path, encoding="utf-8-sig", newline="")
+        try:
+            result = importer.import_file(options["kind"], fmt, fh, chunk_size=options["chunk_size"],
+                                          dry_run=options["dry_run"], progress=progress)
+        except (formats.FormatError, UnicodeDecodeError) as e:
+            raise CommandError(str(e))
+        finally:
+            if fh is not sys.stdin:
+                fh.close()
+        for line, message in result.errors:
+            self.stderr.write(f"line {line}: {message}")
+        if result.invalid > len(result.errors):
+            self.stderr.write(f"... {result.invalid - len(result.errors)} more invalid rows")
+        verb = "Would import" if options["dry_run"] else "Imported"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {result.created} {options['kind']}; {result.invalid} invalid"))
@@ -0,0 +1,54 @@
+"""Which fields of each model are imported and exported, and their iCalendar mapping."""
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple
+
+from django.apps import apps
+
+
+@dataclass(frozen=True)
+class Spec:
+    model_label: str
+    fields: Tuple[str, ...]  # importable columns, in export order
+    required: Tuple[str, ...]
+    component: str  # iCalendar component
+    properties: Dict[str, str] = field(default_factory=dict)  # iCalendar property -> field
+    status: Optional[Tuple[str, str, str]] = None  # (boolean field, STATUS if true, STATUS if false)
+    copies: Dict[str, str] = field(default_factory=dict)  # field set from another imported field
+
+    @property
+    def model(self) -> Any:
+        return apps.get_model(self.model_label)
+
+    @property
+    def export_fields(self) -> Tuple[str, ...]:
+        extra = ("created_at",) if any(f.name == "created_at" for f in self.model._meta.fields) else ()
+        return ("id",) + self.fields + extra
+
+    def datetime_fields(self) -> Tuple[str, ...]:
+        return tuple(f for f in self.fields if self.model._meta.get_field(f).get_internal_type() == "DateTimeField")
+
+
+SPECS: Dict[str, Spec] = {
+    "tasks": Spec(
+        "tasks.Task", ("title", "is_completed", "due_at"), ("title",), "VTODO",
+        {"SUMMARY": "title", "DUE": "due_at"}, status=("is_completed", "COMPLETED", "NEEDS-ACTION"),
+    ),
+    "notes": Spec("notes.Note", ("title", "content"), ("title",), "VJOURNAL", {"SUMMARY": "title", "DESCRIPTION": "content"}),
+    "reminders": Spec(
+        "reminders.Reminder", ("message", "due_at", "delivered"), ("message", "due_at"), "VTODO",
+        {"SUMMARY": "message", "DUE": "due_at"}, status=("delivered", "COMPLETED", "NEEDS-ACTION"),
+        copies={"notified": "delivered"},  # delivered reminders must not beep in open tabs
+    ),
+    "events": Spec(
+        "events.Event", ("title", "starts_at", "ends_at", "location", "details"), ("title", "starts_at"), "VEVENT",
+        {"SUMMARY": "title", "DTSTART": "starts_at", "DTEND": "ends_at", "LOCATION": "location", "DESCRIPTION": "details"},
+    ),
+}
+
+
+def get_spec(name: str) -> Spec:
+    try:
+        return SPECS[name]
+    except KeyError:
+        raise LookupError(f"Unknown kind {name!r}; expected one of {', '.join(SPECS)}")
@@ -0,0 +1,8 @@
+from django.urls import path
+from . import views
+
+app_name = "transfer"
+urlpatterns = [
+    path("", views.index, name="index"),
+    path("export/<str:kind>.<str:fmt>", views.export, name="export"),
+]
@@ -0,0 +1,54 @@
+import io
+
+from django import forms
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import Http404, StreamingHttpResponse
+from django.shortcuts import render
+from django.utils.timezone import now
+from django.views.decorators.http import require_GET, require_http_methods
+
+from . import exporter, formats, importer
+from .specs import SPECS
+
+
+class ImportForm(forms.Form):
+    kind = forms.ChoiceField(choices=[(k, k.title()) for k in SPECS])
+    format = forms.ChoiceField(choices=[("", "From file extension")] + [(f, f.upper()) for f in formats.FORMATS], required=False)
+    file = forms.FileField()
+    dry_run = forms.BooleanField(required=False, help_text="Validate only; nothing is saved.")
+
+
+@staff_member_required
+@require_http_methods(["GET", "POST"])
+def index(request):
+    """Upload form plus export links; the upload is read as a stream, never whole."""
+    form = ImportForm(request.POST or None, request.FILES or None)
+    result = error = None
+    if request.method == "POST" and form.is_valid():
+        upload = form.cleaned_data["file"]
+        fmt = form.cleaned_data["format"] or formats.guess_format(upload.name)
+        if fmt is None:
+            error = "Can't tell the format from the file name; pick one."
+        else:
+            lines = io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline="")
+            try:
+                result = importer.import_file(form.cleaned_data["kind"], fmt, lines, dry_run=form.cleaned_data["dry_run"])
+            except (formats.FormatError, UnicodeDecodeError, ValueError) as e:
+                error = str(e)
+    return render(request, "transfer/index.html", {
+        "form": form, "result": result, "error": error, "kinds": list(SPECS), "formats": formats.FORMATS,
+    })
+
+
+@staff_member_required
+@require_GET
+def export(request, kind: str, fmt: str):
+    """Stream a whole table as CSV, JSONL or iCalendar."""
+    if kind not in SPECS or fmt not in formats.FORMATS:
+        raise Http404("Unknown export")
+    response = StreamingHttpResponse(
+        (chunk.encode("utf-8") for chunk in exporter.export(kind, fmt)),
+        content_type=f"{formats.CONTENT_TYPES[fmt]}; charset=utf-8",
+    )
+    response["Content-Disposition"] = f'attachment; filename="{kind}-{now():%Y%m%d}.{fmt}"'
+    return response